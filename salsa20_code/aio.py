@@ -0,0 +1,128 @@
+"""
+aio.py
+-------
+
+asyncio stream adapters that encrypt/decrypt on the fly.
+
+Provides:
+    1) Salsa20StreamReader --— wraps asyncio.StreamReader; read() returns
+                             XORed (decrypted) bytes
+    2) Salsa20StreamWriter --— wraps asyncio.StreamWriter; write() XORs
+                             (encrypts) and sends with backpressure
+
+Each adapter owns a `stream.Salsa20Encryptor`, so the block counter and
+the unused tail of the current keystream block carry over between
+chunks. Chunks of at least OFFLOAD_BYTES are XORed in an executor, in
+slices of at most SLICE_BYTES, so the event loop never runs more than
+OFFLOAD_BYTES of cipher work in one step.
+"""
+
+import asyncio
+
+from stream import Salsa20Encryptor
+
+OFFLOAD_BYTES = 16 * 1024        # largest chunk XORed directly on the loop
+SLICE_BYTES = 1024 * 1024        # largest piece handed to the executor at once
+
+
+class _CipherSide:
+    """Shared chunk XOR logic: inline for small chunks, executor for large ones."""
+
+    def __init__(self, key32: bytes, nonce8: bytes, initial_block: int, backend,
+                 executor, offload_bytes: int, slice_bytes: int, rounds: int):
+        self._enc = Salsa20Encryptor(key32, nonce8, initial_block, backend, rounds)
+        self._executor = executor
+        self._offload = offload_bytes
+        self._slice = slice_bytes
+
+    async def _xor_slices(self, data):
+        """Yield the XOR of `data` slice by slice, offloading large slices."""
+        view = memoryview(data).cast("B")
+        if len(view) < self._offload:
+            yield self._enc.update(view)
+            return
+        loop = asyncio.get_running_loop()
+        for lo in range(0, len(view), self._slice):
+            piece = view[lo:lo + self._slice]
+            yield await loop.run_in_executor(self._executor, self._enc.update, piece)
+
+    async def _xor(self, data) -> bytes:
+        return b"".join([part async for part in self._xor_slices(data)])
+
+
+class Salsa20StreamReader(_CipherSide):
+    """
+    Decrypting view of an asyncio.StreamReader. Bytes come back in stream
+    order; the keystream position advances by exactly what was read.
+    """
+
+    def __init__(self, reader: asyncio.StreamReader, key32: bytes, nonce8: bytes,
+                 initial_block: int = 0, backend=None, executor=None,
+                 offload_bytes: int = OFFLOAD_BYTES, slice_bytes: int = SLICE_BYTES,
+                 rounds: int = 20):
+        super().__init__(key32, nonce8, initial_block, backend, executor, offload_bytes, slice_bytes,
+                         rounds)
+        self._reader = reader
+        self._lock = asyncio.Lock()
+
+    async def read(self, n: int = -1) -> bytes:
+        """Read up to n bytes (all until EOF for n < 0) and decrypt them."""
+        async with self._lock:
+            return await self._xor(await self._reader.read(n))
+
+    async def readexactly(self, n: int) -> bytes:
+        """Read exactly n bytes and decrypt them (raises IncompleteReadError)."""
+        async with self._lock:
+            return await self._xor(await self._reader.readexactly(n))
+
+    def at_eof(self) -> bool:
+        return self._reader.at_eof()
+
+    @property
+    def position(self) -> int:
+        """Plaintext bytes returned so far."""
+        return self._enc.position
+
+
+class Salsa20StreamWriter(_CipherSide):
+    """
+    Encrypting view of an asyncio.StreamWriter.
+
+    `await write(data)` encrypts and sends slice by slice, awaiting the
+    transport's drain() after each slice, so a slow peer pauses the
+    producer instead of growing the transport buffer.
+    """
+
+    def __init__(self, writer: asyncio.StreamWriter, key32: bytes, nonce8: bytes,
+                 initial_block: int = 0, backend=None, executor=None,
+                 offload_bytes: int = OFFLOAD_BYTES, slice_bytes: int = SLICE_BYTES,
+                 rounds: int = 20):
+        super().__init__(key32, nonce8, initial_block, backend, executor, offload_bytes, slice_bytes,
+                         rounds)
+        self._writer = writer
+        self._lock = asyncio.Lock()
+
+    async def write(self, data) -> None:
+        """Encrypt `data`, send it, and wait for the transport to drain."""
+        async with self._lock:
+            async for part in self._xor_slices(data):
+                self._writer.write(part)
+                await self._writer.drain()
+
+    async def drain(self) -> None:
+        await self._writer.drain()
+
+    def close(self) -> None:
+        self._enc.finalize()
+        self._writer.close()
+
+    async def wait_closed(self) -> None:
+        await self._writer.wait_closed()
+
+    def get_extra_info(self, name, default=None):
+        return self._writer.get_extra_info(name, default)
+
+    @property
+    def position(self) -> int:
+        """Plaintext bytes accepted so far."""
+        return self._enc.position
@@ -0,0 +1,334 @@
+"""
+backends.py
+------------
+
+Registry of interchangeable Salsa20 / ChaCha20 keystream engines.
+
+Provides:
+    1) Backend          --— abstract base class: subclasses implement
+                            blocks_into; blocks / block / stream_xor /
+                            stream_xor_into are derived from it
+    2) ReferenceBackend --— "reference": rounds.py/core.py, one block at a time
+    3) FastBackend      --— "fast": allocation-free pure Python (fastcore.py)
+    4) NumpyBackend     --— "numpy": vectorized multi-block engine (vectorized.py)
+    5) AutoBackend      --— "auto": fast for short inputs, numpy for long ones
+    6) register_backend / get_backend / available_backends
+    7) verify_backend   --— check an engine against the reference and vectors.py
+
+Every backend works on a 16-word state template (see `cipher.Salsa20`),
+a round count (20, 12 or 8) and a core name: "salsa20" (64-bit counter
+in words 8..9) or "chacha20" (RFC 8439, 32-bit counter in word 12).
+All engines must produce identical bytes. The backend is chosen per
+call, per context, or process-wide through the SALSA20_BACKEND
+environment variable (default: "auto").
+"""
+
+import abc
+from array import array
+import os
+
+from core import _initial_state_256, _salsa20_hash
+from chacha_core import _chacha20_hash, _check_chacha_counter, _initial_state_chacha20
+from fastcore import salsa20_blocks_into, chacha20_blocks_into
+from helpers import _xor_bytes
+import metrics
+import vectorized
+
+ENV_VAR = "SALSA20_BACKEND"
+DEFAULT_BACKEND = "auto"
+
+NUMPY_MIN_BYTES = 1024        # below this the fixed NumPy call cost dominates
+NUMPY_BATCH_BLOCKS = 8192     # blocks per vectorized call (512 KiB of keystream)
+XOR_BATCH_BLOCKS = 64         # blocks per wide XOR on the pure-Python path (4 KiB)
+
+CORES = ("salsa20", "chacha20")
+
+
+def _check_core(core: str, start: int, count: int) -> None:
+    """Reject unknown cores and ChaCha20 ranges past the 32-bit counter."""
+    if core == "chacha20":
+        _check_chacha_counter(start, count)
+    elif core != "salsa20":
+        raise ValueError(f"unknown core {core!r}; expected one of {', '.join(CORES)}")
+
+
+def _xor_keystream(data, keystream) -> bytes:
+    """helpers._xor_bytes, counted and timed as the "xor" phase when metrics are on."""
+    timed = metrics.ENABLED
+    if timed:
+        t0 = metrics.now()
+    out = _xor_bytes(data, keystream)
+    if timed:
+        metrics.add_xor(len(out), metrics.now() - t0)
+    return out
+
+
+class Backend(abc.ABC):
+    """
+    Base keystream engine. Subclasses implement `blocks_into`; the rest of
+    the API is derived from it.
+    """
+
+    name = "base"
+
+    def available(self) -> bool:
+        """Return True if this engine can run on this host."""
+        return True
+
+    @abc.abstractmethod
+    def blocks_into(self, template: list[int], start: int, count: int, out, offset: int = 0,
+                    rounds: int = 20, core: str = "salsa20") -> None:
+        """Write `count` keystream blocks for counters start.. into `out` at `offset`."""
+
+    def blocks(self, template: list[int], start: int, count: int, rounds: int = 20,
+               core: str = "salsa20") -> bytes:
+        """Return `count` consecutive keystream blocks starting at `start`."""
+        out = bytearray(64 * count)
+        self.blocks_into(template, start, count, out, 0, rounds, core)
+        return bytes(out)
+
+    def block(self, template: list[int], counter64: int, rounds: int = 20,
+              core: str = "salsa20") -> bytes:
+        """Return the 64-byte keystream block for `counter64`."""
+        return self.blocks(template, counter64, 1, rounds, core)
+
+    def stream_xor(self, template: list[int], data, initial_block: int = 0,
+                   rounds: int = 20, core: str = "salsa20") -> bytes:
+        """
+        XOR 'data' with the keystream starting at `initial_block`.
+        Keystream is made XOR_BATCH_BLOCKS at a time into one reused buffer
+        and each batch is XORed as one wide int; only the last batch is short.
+        """
+        src = memoryview(data).cast("B")
+        n = len(src)
+        step = XOR_BATCH_BLOCKS * 64
+        ks = bytearray(step)
+        ksv = memoryview(ks)
+        parts = []
+        for lo in range(0, n, step):
+            take = min(step, n - lo)
+            self.blocks_into(template, initial_block + lo // 64, (take + 63) // 64, ks, 0,
+                             rounds, core)
+            parts.append(_xor_keystream(src[lo:lo + take], ksv[:take]))
+        return b"".join(parts)
+
+    def stream_xor_into(self, template: list[int], data, out, initial_block: int = 0,
+                        rounds: int = 20, core: str = "salsa20") -> None:
+        """
+        XOR 'data' with the keystream into the writable buffer `out` (same
+        length; may be `data` itself). Nothing proportional to the input is
+        allocated: keystream and XOR results live in one batch at a time.
+        """
+        src = memoryview(data).cast("B")
+        dst = memoryview(out).cast("B")
+        n = len(src)
+        step = XOR_BATCH_BLOCKS * 64
+        ks = bytearray(step)
+        ksv = memoryview(ks)
+        for lo in range(0, n, step):
+            take = min(step, n - lo)
+            self.blocks_into(template, initial_block + lo // 64, (take + 63) // 64, ks, 0,
+                             rounds, core)
+            dst[lo:lo + take] = _xor_keystream(src[lo:lo + take], ksv[:take])
+
+    def __repr__(self) -> str:
+        return f"<{type(self).__name__} {self.name!r}>"
+
+
+class ReferenceBackend(Backend):
+    """The readable reference path: core._salsa20_hash, one block at a time."""
+
+    name = "reference"
+
+    def blocks_into(self, template, start, count, out, offset=0, rounds=20, core="salsa20"):
+        _check_core(core, start, count)
+        timed = metrics.ENABLED
+        if timed:
+            t0 = metrics.now()
+        s = template[:]
+        for i in range(count):
+            if core == "chacha20":
+                s[12] = start + i
+                ks = _chacha20_hash(s, rounds)
+            else:
+                ctr = (start + i) & 0xffffffffffffffff
+                s[8] = ctr & 0xffffffff
+                s[9] = ctr >> 32
+                ks = _salsa20_hash(s, rounds)
+            out[offset + 64 * i:offset + 64 * (i + 1)] = ks
+        if timed:
+            metrics.add_blocks(self.name, count, metrics.now() - t0)
+
+
+class FastBackend(Backend):
+    """Allocation-free pure-Python core (fastcore.py)."""
+
+    name = "fast"
+
+    def blocks_into(self, template, start, count, out, offset=0, rounds=20, core="salsa20"):
+        _check_core(core, start, count)
+        kernel = chacha20_blocks_into if core == "chacha20" else salsa20_blocks_into
+        timed = metrics.ENABLED
+        if timed:
+            t0 = metrics.now()
+        # One state array per call (not per block), so calls stay thread-safe.
+        kernel(array("I", template), start, count, out, offset, rounds)
+        if timed:
+            metrics.add_blocks(self.name, count, metrics.now() - t0)
+
+
+class NumpyBackend(Backend):
+    """NumPy engine: NUMPY_BATCH_BLOCKS blocks per vectorized call."""
+
+    name = "numpy"
+
+    def available(self) -> bool:
+        return vectorized.AVAILABLE
+
+    @staticmethod
+    def _kernel(core: str, start: int, count: int):
+        _check_core(core, start, count)
+        return vectorized.chacha20_blocks if core == "chacha20" else vectorized.salsa20_blocks
+
+    def blocks_into(self, template, start, count, out, offset=0, rounds=20, core="salsa20"):
+        kernel = self._kernel(core, start, count)
+        timed = metrics.ENABLED
+        for first in range(0, count, NUMPY_BATCH_BLOCKS):
+            n = min(NUMPY_BATCH_BLOCKS, count - first)
+            lo = offset + 64 * first
+            if timed:
+                t0 = metrics.now()
+            out[lo:lo + 64 * n] = kernel(template, start + first, n, rounds)
+            if timed:
+                metrics.add_blocks(self.name, n, metrics.now() - t0)
+
+    def stream_xor(self, template, data, initial_block=0, rounds=20, core="salsa20"):
+        np = vectorized.np
+        src = np.frombuffer(data, dtype=np.uint8)
+        out = np.empty_like(src)
+        self._xor(template, src, out, initial_block, rounds, core)
+        return out.tobytes()
+
+    def stream_xor_into(self, template, data, out, initial_block=0, rounds=20, core="salsa20"):
+        np = vectorized.np
+        src = np.frombuffer(memoryview(data).cast("B"), dtype=np.uint8)
+        dst = np.frombuffer(memoryview(out).cast("B"), dtype=np.uint8)
+        self._xor(template, src, dst, initial_block, rounds, core)
+
+    def _xor(self, template, src, dst, initial_block, rounds, core):
+        """XOR the uint8 array `src` with the keystream into `dst`, a batch at a time."""
+        np = vectorized.np
+        nblocks = (len(src) + 63) // 64
+        kernel = self._kernel(core, initial_block, nblocks)
+        timed = metrics.ENABLED
+        for first in range(0, nblocks, NUMPY_BATCH_BLOCKS):
+            count = min(NUMPY_BATCH_BLOCKS, nblocks - first)
+            if timed:
+                t0 = metrics.now()
+            ks = kernel(template, initial_block + first, count, rounds)
+            lo = first * 64
+            hi = min(lo + count * 64, len(src))
+            if timed:
+                t1 = metrics.now()
+                metrics.add_blocks(self.name, count, t1 - t0)
+            np.bitwise_xor(src[lo:hi], np.frombuffer(ks, dtype=np.uint8, count=hi - lo),
+                           out=dst[lo:hi])
+            if timed:
+                metrics.add_xor(hi - lo, metrics.now() - t1)
+
+
+class AutoBackend(Backend):
+    """
+    Pick the fastest engine for each call: "numpy" for inputs of at least
+    NUMPY_MIN_BYTES when NumPy is installed, "fast" otherwise.
+    """
+
+    name = "auto"
+
+    def _pick(self, nbytes: int) -> Backend:
+        if nbytes >= NUMPY_MIN_BYTES and _BACKENDS["numpy"].available():
+            return _BACKENDS["numpy"]
+        return _BACKENDS["fast"]
+
+    def blocks_into(self, template, start, count, out, offset=0, rounds=20, core="salsa20"):
+        self._pick(64 * count).blocks_into(template, start, count, out, offset, rounds, core)
+
+    def stream_xor(self, template, data, initial_block=0, rounds=20, core="salsa20"):
+        return self._pick(memoryview(data).nbytes).stream_xor(template, data, initial_block,
+                                                              rounds, core)
+
+    def stream_xor_into(self, template, data, out, initial_block=0, rounds=20, core="salsa20"):
+        self._pick(memoryview(data).nbytes).stream_xor_into(template, data, out, initial_block,
+                                                            rounds, core)
+
+
+_BACKENDS: dict[str, Backend] = {}
+
+
+def register_backend(backend: Backend) -> Backend:
+    """Add (or replace) a backend under `backend.name`."""
+    if not isinstance(backend, Backend):
+        raise TypeError(f"expected a Backend instance, got {type(backend).__name__}")
+    _BACKENDS[backend.name] = backend
+    return backend
+
+
+for _b in (ReferenceBackend(), FastBackend(), NumpyBackend(), AutoBackend()):
+    register_backend(_b)
+
+
+def available_backends() -> list[str]:
+    """Names of the registered backends that can run on this host."""
+    return [name for name, b in _BACKENDS.items() if b.available()]
+
+
+def get_backend(backend=None) -> Backend:
+    """
+    Resolve a backend. `backend` may be a Backend instance, a registered
+    name, or None (use $SALSA20_BACKEND, falling back to "auto").
+    """
+    if isinstance(backend, Backend):
+        return backend
+    name = backend or os.environ.get(ENV_VAR) or DEFAULT_BACKEND
+    try:
+        b = _BACKENDS[name]
+    except KeyError:
+        raise ValueError(f"unknown Salsa20 backend {name!r}; "
+                         f"choose from {sorted(_BACKENDS)}") from None
+    if not b.available():
+        raise ValueError(f"Salsa20 backend {name!r} is not available on this host")
+    return b
+
+
+def verify_backend(backend=None) -> None:
+    """
+    Check a backend against the bundled vectors and the reference engine.
+    Raises AssertionError on the first mismatch.
+    """
+    from vectors import SALSA20_VECTORS, CHACHA20_VECTORS
+
+    b = get_backend(backend)
+    ref = _BACKENDS["reference"]
+    for core, vectors, make_state in (("salsa20", SALSA20_VECTORS, _initial_state_256),
+                                      ("chacha20", CHACHA20_VECTORS, _initial_state_chacha20)):
+        for v in vectors:
+            counter, skip = divmod(v["offset"], 64)
+            template = make_state(v["key"], v["nonce"], 0)
+            n = len(v["keystream"])
+            got = b.blocks(template, counter, (skip + n + 63) // 64, v.get("rounds", 20), core)
+            if got[skip:skip + n] != v["keystream"]:
+                raise AssertionError(f"{b.name}: vector {v['name']} mismatch")
+
+    template = _initial_state_256(bytes(range(32)), b"\x01" * 8, 0)
+    for start, nbytes in ((0, 1), (5, 200), (0xfffffffe, 300), (2**64 - 2, 4 * 64 + 9)):
+        data = bytes(i & 0xff for i in range(nbytes))
+        for rounds in (20, 12, 8):
+            if b.stream_xor(template, data, start, rounds) != ref.stream_xor(template, data, start, rounds):
+                raise AssertionError(f"{b.name}: stream_xor/{rounds} mismatch at block {start}")
+
+    template = _initial_state_chacha20(bytes(range(32)), b"\x02" * 12, 0)
+    for start, nbytes in ((0, 1), (7, 200), (2**32 - 5, 4 * 64 + 9)):
+        data = bytes(i & 0xff for i in range(nbytes))
+        if b.stream_xor(template, data, start, core="chacha20") != \
+                ref.stream_xor(template, data, start, core="chacha20"):
+            raise AssertionError(f"{b.name}: chacha20 stream_xor mismatch at block {start}")
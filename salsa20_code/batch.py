@@ -0,0 +1,161 @@
+"""
+batch.py
+---------
+
+Encrypt many small messages, each under its own (key, nonce), in a few
+vectorized calls.
+
+Provides:
+    1) salsa20_xor_batch(keys, nonces, messages, initial_block=0, rounds=20,
+                         backend=None)   --— list of XORed messages
+    2) chacha20_xor_batch(...)           --— the same with ChaCha20 (12-byte nonces)
+
+With NumPy, messages are grouped up to BATCH_BLOCKS keystream blocks.
+For each group the initial states of every block of every message are
+built as one (T, 16) uint32 array. Keys and nonces are decoded together,
+counters come from a per-message arange, and the rounds run once over
+the whole array (vectorized.salsa20_hash_states). The keystream is then
+gathered back against the concatenated messages with a single XOR. The
+Python work per group is fixed, so a 30-byte message costs a few hundred
+bytes of array traffic instead of a context and a lone 20-round core.
+
+Without NumPy, or when `backend` names an engine other than "numpy" or
+"auto", each message goes through its own cipher context instead, with
+the same results. Messages of BATCH_BLOCKS blocks or more always do:
+they already amortize the per-call cost.
+
+IMPORTANT: as everywhere, never reuse a (key, nonce) pair across messages.
+"""
+
+from backends import NUMPY_BATCH_BLOCKS, get_backend
+from chacha20 import ChaCha20
+from chacha_core import _check_chacha_counter
+from cipher import Salsa20
+from core import _check_rounds
+import metrics
+import vectorized
+
+BATCH_BLOCKS = NUMPY_BATCH_BLOCKS   # keystream blocks per vectorized group
+
+
+def _check_inputs(keys, nonces, messages, nonce_size: int) -> list[int]:
+    if not len(keys) == len(nonces) == len(messages):
+        raise ValueError("keys, nonces and messages must have the same length")
+    if any(len(k) != 32 for k in keys):
+        raise ValueError("every key must be 32 bytes")
+    if any(len(n) != nonce_size for n in nonces):
+        raise ValueError(f"every nonce must be {nonce_size} bytes")
+    return [memoryview(m).nbytes for m in messages]
+
+
+def _templates(ctx_class, keys, nonces):
+    """(M, 16) uint32 initial states with the counter words left at zero."""
+    np = vectorized.np
+    m = len(keys)
+    key_words = np.frombuffer(b"".join(keys), dtype="<u4").reshape(m, 8)
+    nonce_words = np.frombuffer(b"".join(nonces), dtype="<u4").reshape(m, -1)
+    states = np.zeros((m, 16), dtype=np.uint32)
+    states[:] = ctx_class._initial_state(bytes(32), bytes(ctx_class.nonce_size), 0)
+    if ctx_class.core == "chacha20":
+        states[:, 4:12] = key_words
+        states[:, 13:16] = nonce_words
+    else:
+        states[:, 1:5] = key_words[:, :4]
+        states[:, 11:15] = key_words[:, 4:]
+        states[:, 6:8] = nonce_words
+    return states
+
+
+def _xor_group(ctx_class, templates, messages, lengths, initial_block, rounds) -> list[bytes]:
+    """XOR one group of messages; `templates` holds their (M, 16) states."""
+    np = vectorized.np
+    lengths = np.asarray(lengths, dtype=np.int64)
+    nblocks = (lengths + 63) // 64
+    total = int(nblocks.sum())
+    first_block = np.cumsum(nblocks) - nblocks
+    first_byte = np.cumsum(lengths) - lengths
+
+    timed = metrics.ENABLED
+    if timed:
+        t0 = metrics.now()
+    # Row r is block r - first_block[i] of message i
+    states = np.repeat(templates, nblocks, axis=0)
+    ctr = (np.arange(total, dtype=np.uint64) - np.repeat(first_block, nblocks).astype(np.uint64)
+           + np.uint64(initial_block & 0xffffffffffffffff))
+    if ctx_class.core == "chacha20":
+        states[:, 12] = ctr & np.uint64(0xffffffff)
+        vectorized.chacha20_hash_states(states, rounds)
+    else:
+        states[:, 8] = ctr & np.uint64(0xffffffff)
+        states[:, 9] = ctr >> np.uint64(32)
+        vectorized.salsa20_hash_states(states, rounds)
+    ks = states.astype("<u4", copy=False).view(np.uint8).reshape(-1)
+
+    if timed:
+        t1 = metrics.now()
+        metrics.add_blocks("numpy", total, t1 - t0)
+    # Byte j of message i uses keystream byte 64 * first_block[i] + j
+    data = np.frombuffer(b"".join(messages), dtype=np.uint8)
+    index = np.arange(len(data)) + np.repeat(64 * first_block - first_byte, lengths)
+    out = np.bitwise_xor(data, ks[index]).tobytes()
+    if timed:
+        metrics.add_xor(len(data), metrics.now() - t1)
+    return [out[lo:lo + n] for lo, n in zip(first_byte.tolist(), lengths.tolist())]
+
+
+def _xor_batch(ctx_class, keys, nonces, messages, initial_block, rounds, backend) -> list[bytes]:
+    _check_rounds(rounds)
+    lengths = _check_inputs(keys, nonces, messages, ctx_class.nonce_size)
+    if ctx_class.core == "chacha20" and lengths:
+        _check_chacha_counter(initial_block, (max(lengths) + 63) // 64)
+
+    engine = get_backend(backend)
+    if not vectorized.AVAILABLE or engine.name not in ("numpy", "auto"):
+        return [ctx_class(k, n, engine, rounds=rounds).stream_xor(m, initial_block)
+                for k, n, m in zip(keys, nonces, messages)]
+
+    results: list = [None] * len(messages)
+    group: list[int] = []
+    blocks = 0
+
+    def flush():
+        if group:
+            templates = _templates(ctx_class, [keys[i] for i in group], [nonces[i] for i in group])
+            outs = _xor_group(ctx_class, templates, [messages[i] for i in group],
+                              [lengths[i] for i in group], initial_block, rounds)
+            for i, out in zip(group, outs):
+                results[i] = out
+            group.clear()
+
+    for i, n in enumerate(lengths):
+        nb = (n + 63) // 64
+        if nb >= BATCH_BLOCKS:
+            results[i] = ctx_class(keys[i], nonces[i], engine, rounds=rounds).stream_xor(
+                messages[i], initial_block)
+            continue
+        if blocks + nb > BATCH_BLOCKS:
+            flush()
+            blocks = 0
+        group.append(i)
+        blocks += nb
+    flush()
+    return results
+
+
+def salsa20_xor_batch(keys, nonces, messages, initial_block: int = 0, rounds: int = 20,
+                      backend=None) -> list[bytes]:
+    """
+    XOR messages[i] with the Salsa20 keystream of (keys[i], nonces[i]),
+    for every i, and return the results in order. Same function for
+    enc/dec. keys are 32 bytes and nonces 8 bytes each.
+    """
+    return _xor_batch(Salsa20, keys, nonces, messages, initial_block, rounds, backend)
+
+
+def chacha20_xor_batch(keys, nonces, messages, initial_block: int = 0, rounds: int = 20,
+                       backend=None) -> list[bytes]:
+    """
+    XOR messages[i] with the ChaCha20 (RFC 8439) keystream of
+    (keys[i], nonces[i]); nonces are 12 bytes each.
+    """
+    return _xor_batch(ChaCha20, keys, nonces, messages, initial_block, rounds, backend)
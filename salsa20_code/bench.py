@@ -0,0 +1,255 @@
+"""
+bench.py
+---------
+
+Microbenchmark suite for the Salsa20 (and ChaCha20) implementation.
+
+Provides:
+    1) run_benchmarks   --— time the round functions, the block function and
+                          stream XOR at each message size on each backend,
+                          both through the public one-shot functions and
+                          on a prebuilt context
+    2) compare          --— find results that regressed past a threshold
+                          against a stored baseline
+    3) cpu_ghz          --— clock estimate used for cycles/byte
+    4) a command line   --— `python bench.py --out results.json
+                          --baseline baseline.json --threshold 0.1`
+
+Every result records ns/op, MB/s and an estimated cycles/byte
+(ns/op × GHz / bytes). The clock comes from --ghz, $SALSA20_BENCH_GHZ or
+/proc/cpuinfo, so cycles/byte is only comparable between runs on the
+same machine. Each timing is the best of `repeat` runs, each run looping
+until it lasts at least `min_time` seconds.
+
+With --baseline the command exits with status 1 when any benchmark is
+slower than the baseline by more than --threshold (a fraction; 0.10 is
+10%). Results are matched by their "id" field,
+"name/backend/core/r<rounds>/bytes" ("name/backend/core/bytes" for the
+round functions that take no rounds count), so a baseline from a
+different size list simply compares the sizes both runs share.
+"""
+
+import json
+import os
+import platform
+import sys
+import time
+
+from backends import available_backends, get_backend
+from chacha20 import CIPHERS, chacha20_stream_xor
+from core import _initial_state_256, _salsa20_hash, salsa20_block
+from rounds import _quarterround, _doubleround
+from stream import salsa20_stream_xor
+import vectorized
+
+DEFAULT_SIZES = (1, 64, 1024, 16 * 1024, 1024 * 1024, 64 * 1024 * 1024)
+QUICK_SIZES = (1, 64, 1024, 16 * 1024)
+DEFAULT_THRESHOLD = 0.10
+LONG_RUN_SECONDS = 2.0   # runs at least this long are timed once, not `repeat` times
+GHZ_ENV_VAR = "SALSA20_BENCH_GHZ"
+STREAM_FUNCTIONS = {"salsa20": salsa20_stream_xor, "chacha20": chacha20_stream_xor}
+
+
+def cpu_ghz(override: float | None = None) -> tuple[float | None, str]:
+    """
+    Return (GHz, source) for the cycles/byte estimate. The source is
+    "argument", "env", "/proc/cpuinfo" or "unknown" (GHz None).
+    """
+    if override:
+        return float(override), "argument"
+    if os.environ.get(GHZ_ENV_VAR):
+        return float(os.environ[GHZ_ENV_VAR]), "env"
+    try:
+        with open("/proc/cpuinfo", encoding="utf-8") as f:
+            for line in f:
+                if line.startswith("cpu MHz"):
+                    return float(line.split(":")[1]) / 1000, "/proc/cpuinfo"
+    except OSError:
+        pass
+    return None, "unknown"
+
+
+def _time_ns(fn, min_time: float, repeat: int) -> tuple[float, int]:
+    """
+    Return (best ns per call, calls per run). The loop count doubles until
+    one run takes at least `min_time`, then `repeat` runs are timed
+    (just the one for runs over LONG_RUN_SECONDS, e.g. 64 MB in pure Python).
+    """
+    loops = 1
+    while True:
+        t0 = time.perf_counter_ns()
+        for _ in range(loops):
+            fn()
+        elapsed = time.perf_counter_ns() - t0
+        if elapsed >= min_time * 1e9:
+            break
+        loops *= 2
+    best = elapsed
+    if elapsed >= LONG_RUN_SECONDS * 1e9:
+        repeat = 1
+    for _ in range(repeat - 1):
+        t0 = time.perf_counter_ns()
+        for _ in range(loops):
+            fn()
+        best = min(best, time.perf_counter_ns() - t0)
+    return best / loops, loops
+
+
+def _result(name: str, backend: str, core: str, rounds: int | None, nbytes: int,
+            ns: float, loops: int, ghz: float | None) -> dict:
+    rounds_part = "" if rounds is None else f"r{rounds}/"
+    return {
+        "id": f"{name}/{backend}/{core}/{rounds_part}{nbytes}",
+        "name": name,
+        "backend": backend,
+        "core": core,
+        "rounds": rounds,
+        "bytes": nbytes,
+        "ns_per_op": ns,
+        "mb_per_s": nbytes / ns * 1e3 if nbytes else None,
+        "cycles_per_byte": ns * ghz / nbytes if ghz and nbytes else None,
+        "iterations": loops,
+    }
+
+
+def run_benchmarks(sizes=DEFAULT_SIZES, backends=None, cores=("salsa20", "chacha20"),
+                   rounds: int = 20, min_time: float = 0.2, repeat: int = 3,
+                   ghz: float | None = None, progress=None) -> dict:
+    """
+    Run the suite and return {"meta": {...}, "results": [...]}.
+
+    The reference round functions (_quarterround, _doubleround,
+    _salsa20_hash, salsa20_block) are timed once; the first two do not
+    depend on `rounds` and carry none. For every (backend, core, size)
+    "stream_xor" times the public salsa20_stream_xor / chacha20_stream_xor,
+    context setup included, and "ctx_stream_xor" the stream_xor method of
+    a context built beforehand. `progress`, if given, is called with each
+    result as it completes.
+    """
+    ghz, ghz_source = cpu_ghz(ghz)
+    backends = list(backends or available_backends())
+    key = bytes(range(32))
+    state = _initial_state_256(key, bytes(8), 0)
+    results = []
+
+    def add(r):
+        results.append(r)
+        if progress is not None:
+            progress(r)
+
+    micro = (
+        ("_quarterround", None, 0, lambda: _quarterround(*state[:4])),
+        ("_doubleround", None, 0, lambda: _doubleround(state)),
+        ("_salsa20_hash", rounds, 64, lambda: _salsa20_hash(state, rounds)),
+        ("salsa20_block", rounds, 64, lambda: salsa20_block(key, bytes(8), 0, rounds=rounds)),
+    )
+    for name, micro_rounds, nbytes, fn in micro:
+        ns, loops = _time_ns(fn, min_time, repeat)
+        add(_result(name, "reference", "salsa20", micro_rounds, nbytes, ns, loops, ghz))
+
+    for core in cores:
+        ctx_class, stream_xor = CIPHERS[core], STREAM_FUNCTIONS[core]
+        nonce = bytes(ctx_class.nonce_size)
+        for name in backends:
+            ctx = ctx_class(key, nonce, get_backend(name), rounds=rounds)
+            for nbytes in sizes:
+                data = bytes(nbytes)
+                ns, loops = _time_ns(lambda: stream_xor(key, nonce, data, backend=name, rounds=rounds),
+                                     min_time, repeat)
+                add(_result("stream_xor", name, core, rounds, nbytes, ns, loops, ghz))
+                ns, loops = _time_ns(lambda: ctx.stream_xor(data), min_time, repeat)
+                add(_result("ctx_stream_xor", name, core, rounds, nbytes, ns, loops, ghz))
+
+    meta = {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "numpy": vectorized.np.__version__ if vectorized.AVAILABLE else None,
+        "cpu_ghz": ghz,
+        "cpu_ghz_source": ghz_source,
+        "min_time": min_time,
+        "repeat": repeat,
+    }
+    return {"meta": meta, "results": results}
+
+
+def compare(current: dict, baseline: dict, threshold: float = DEFAULT_THRESHOLD) -> list[dict]:
+    """
+    Return one {"id", "baseline_ns", "current_ns", "slowdown"} dict per
+    benchmark whose ns/op grew by more than `threshold` (0.10 = 10%).
+    Benchmarks missing from either run are ignored.
+    """
+    if threshold < 0:
+        raise ValueError("threshold must be non-negative")
+    base = {r["id"]: r for r in baseline["results"]}
+    regressions = []
+    for r in current["results"]:
+        b = base.get(r["id"])
+        if b is None:
+            continue
+        slowdown = r["ns_per_op"] / b["ns_per_op"] - 1
+        if slowdown > threshold:
+            regressions.append({
+                "id": r["id"],
+                "baseline_ns": b["ns_per_op"],
+                "current_ns": r["ns_per_op"],
+                "slowdown": slowdown,
+            })
+    return regressions
+
+
+def _format(r: dict) -> str:
+    mbs = f"{r['mb_per_s']:10.2f}" if r["mb_per_s"] is not None else " " * 10
+    cpb = f"{r['cycles_per_byte']:10.1f}" if r["cycles_per_byte"] is not None else " " * 10
+    return f"{r['id']:<48} {r['ns_per_op']:14.0f} {mbs} {cpb}"
+
+
+def main(argv=None) -> int:
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Salsa20 microbenchmarks")
+    parser.add_argument("--sizes", type=lambda s: [int(x) for x in s.split(",")],
+                        default=None, help="comma-separated message sizes in bytes")
+    parser.add_argument("--quick", action="store_true",
+                        help=f"sizes {','.join(map(str, QUICK_SIZES))} and shorter runs")
+    parser.add_argument("--backends", type=lambda s: s.split(","), default=None,
+                        help="comma-separated backend names (default: all available)")
+    parser.add_argument("--cores", type=lambda s: s.split(","), default=["salsa20", "chacha20"])
+    parser.add_argument("--rounds", type=int, default=20)
+    parser.add_argument("--min-time", type=float, default=None, help="seconds per timed run")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--ghz", type=float, default=None, help="CPU clock for cycles/byte")
+    parser.add_argument("--out", default=None, help="write JSON results here")
+    parser.add_argument("--baseline", default=None, help="JSON results to compare against")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="allowed slowdown as a fraction (default 0.10)")
+    args = parser.parse_args(argv)
+
+    sizes = args.sizes or (QUICK_SIZES if args.quick else DEFAULT_SIZES)
+    min_time = args.min_time if args.min_time is not None else (0.05 if args.quick else 0.2)
+
+    print(f"{'benchmark':<48} {'ns/op':>14} {'MB/s':>10} {'cycles/B':>10}")
+    report = run_benchmarks(sizes, args.backends, args.cores, args.rounds, min_time,
+                            args.repeat, args.ghz, progress=lambda r: print(_format(r)))
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+            f.write("\n")
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(report, baseline, args.threshold)
+        for reg in regressions:
+            print(f"REGRESSION {reg['id']}: {reg['baseline_ns']:.0f} -> "
+                  f"{reg['current_ns']:.0f} ns/op (+{reg['slowdown']:.0%})", file=sys.stderr)
+        if regressions:
+            return 1
+        print(f"no regressions past {args.threshold:.0%} against {args.baseline}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
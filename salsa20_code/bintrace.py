@@ -0,0 +1,127 @@
+"""
+bintrace.py
+------------
+
+Compact binary format for Salsa20 round traces, and a lazy viewer.
+
+Provides:
+    1) pack_header(state_words, rounds) --— the file header for one message
+    2) pack_block(counter, states)      --— one fixed-size block record
+    3) TraceView(path)                  --— memory-mapped reader
+         len(view), counter(i), find(counter)
+         state(i, step)  --— 16 words after `step` doublerounds (0 = initial)
+         states(i)       --— all of them
+         keystream(i)    --— the 64-byte block (final state + feed-forward)
+
+Layout (all integers little-endian):
+
+    header  40 bytes  magic "SALSA20T", version u16, rounds u8,
+                      steps u8 (= rounds // 2 + 1), key id (16 bytes,
+                      kscache.key_id), nonce (8 bytes), record size u32
+    record  per traced block: counter u64, then `steps` states of 16 u32
+
+Every record has the same size (712 bytes for Salsa20/20), so block i
+starts at 40 + i * record_size and doubleround r of it 64 * r bytes
+after its counter. The viewer maps the file and unpacks only the states
+it is asked for; nothing is recomputed.
+"""
+
+import mmap
+import struct
+
+from helpers import _u32_to_le_bytes
+from kscache import key_id
+
+MAGIC = b"SALSA20T"
+VERSION = 1
+HEADER = struct.Struct("<8sHBB16s8sI")
+COUNTER = struct.Struct("<Q")
+STATE = struct.Struct("<16I")
+
+
+def _record_size(steps: int) -> int:
+    return COUNTER.size + steps * STATE.size
+
+
+def pack_header(state_words: list[int], rounds: int = 20) -> bytes:
+    """Header for a trace of the message whose block states look like `state_words`."""
+    key = b"".join(_u32_to_le_bytes(state_words[i]) for i in (1, 2, 3, 4, 11, 12, 13, 14))
+    nonce = b"".join(_u32_to_le_bytes(state_words[i]) for i in (6, 7))
+    steps = rounds // 2 + 1
+    return HEADER.pack(MAGIC, VERSION, rounds, steps, key_id(key, rounds), nonce,
+                       _record_size(steps))
+
+
+def pack_block(counter: int, states: list[list[int]]) -> bytes:
+    """Record for one block: its counter and its round states (see tracer.round_states)."""
+    return COUNTER.pack(counter) + b"".join(STATE.pack(*s) for s in states)
+
+
+class TraceView:
+    """
+    Read-only, memory-mapped view of a binary trace file. Usable as a
+    context manager; raises ValueError for files that are not traces.
+    """
+
+    def __init__(self, path: str):
+        with open(path, "rb") as f:
+            head = f.read(HEADER.size)
+            if len(head) < HEADER.size:
+                raise ValueError(f"{path}: not a binary Salsa20 trace (too short)")
+            magic, version, rounds, steps, kid, nonce, size = HEADER.unpack(head)
+            if magic != MAGIC or version != VERSION or size != _record_size(steps):
+                raise ValueError(f"{path}: not a binary Salsa20 trace (bad header)")
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self.path = path
+        self.rounds = rounds
+        self.steps = steps
+        self.key_id = kid
+        self.nonce = nonce
+        self.record_size = size
+
+    def __len__(self) -> int:
+        """Number of complete block records."""
+        return (len(self._map) - HEADER.size) // self.record_size
+
+    def _offset(self, i: int) -> int:
+        if not 0 <= i < len(self):
+            raise IndexError(f"trace has {len(self)} blocks, no record {i}")
+        return HEADER.size + i * self.record_size
+
+    def counter(self, i: int) -> int:
+        """Block counter of record `i`."""
+        return COUNTER.unpack_from(self._map, self._offset(i))[0]
+
+    def find(self, counter: int) -> int | None:
+        """Record index of block `counter`, or None if it was not traced."""
+        lo, hi = 0, len(self)
+        while lo < hi:                  # records are written in counter order
+            mid = (lo + hi) // 2
+            if self.counter(mid) < counter:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo if lo < len(self) and self.counter(lo) == counter else None
+
+    def state(self, i: int, step: int) -> list[int]:
+        """State of record `i` after `step` doublerounds (0 = initial state)."""
+        if not 0 <= step < self.steps:
+            raise IndexError(f"step must be in 0..{self.steps - 1}")
+        return list(STATE.unpack_from(self._map, self._offset(i) + COUNTER.size + step * STATE.size))
+
+    def states(self, i: int) -> list[list[int]]:
+        return [self.state(i, step) for step in range(self.steps)]
+
+    def keystream(self, i: int) -> bytes:
+        """The keystream block of record `i`: final state plus initial state."""
+        first, last = self.state(i, 0), self.state(i, self.steps - 1)
+        return STATE.pack(*((a + b) & 0xffffffff for a, b in zip(first, last)))
+
+    def close(self) -> None:
+        self._map.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
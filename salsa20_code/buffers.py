@@ -0,0 +1,78 @@
+"""
+buffers.py
+-----------
+
+Reusable output buffers for steady-state encryption.
+
+Provides:
+    1) BufferPool --— hands out bytearrays by power-of-two size class and
+                      takes them back, so a stream of similarly sized
+                      messages allocates nothing once the pool is warm
+
+Pair with `stream.salsa20_stream_xor_into`:
+
+    pool = BufferPool()
+    with pool.lease(len(packet)) as out:
+        salsa20_stream_xor_into(key, nonce, packet, out)
+        send(out)
+"""
+
+from contextlib import contextmanager
+import threading
+
+MIN_CLASS_BYTES = 64
+
+
+class BufferPool:
+    """
+    Pool of bytearrays grouped by size class (next power of two, at least
+    MIN_CLASS_BYTES). At most `per_class` idle buffers are kept per class.
+    Thread-safe.
+    """
+
+    def __init__(self, per_class: int = 8):
+        self.per_class = per_class
+        self._free: dict[int, list[bytearray]] = {}
+        self._lock = threading.Lock()
+        self.allocations = 0
+        self.reuses = 0
+
+    @staticmethod
+    def size_class(size: int) -> int:
+        """Capacity of the buffers that serve requests of `size` bytes."""
+        return max(MIN_CLASS_BYTES, 1 << (size - 1).bit_length()) if size > 0 else MIN_CLASS_BYTES
+
+    def acquire(self, size: int) -> bytearray:
+        """Return a bytearray with capacity >= size (contents are undefined)."""
+        cls = self.size_class(size)
+        with self._lock:
+            free = self._free.get(cls)
+            if free:
+                self.reuses += 1
+                return free.pop()
+            self.allocations += 1
+        return bytearray(cls)
+
+    def release(self, buf: bytearray) -> None:
+        """Give a buffer from acquire() back to the pool."""
+        cls = len(buf)
+        if cls != self.size_class(cls):
+            raise ValueError("buffer was not acquired from this pool")
+        with self._lock:
+            free = self._free.setdefault(cls, [])
+            if len(free) < self.per_class:
+                free.append(buf)
+
+    @contextmanager
+    def lease(self, size: int):
+        """
+        Yield a memoryview of exactly `size` bytes over a pooled buffer and
+        return the buffer to the pool afterwards. Do not keep the view.
+        """
+        buf = self.acquire(size)
+        view = memoryview(buf)[:size]
+        try:
+            yield view
+        finally:
+            view.release()
+            self.release(buf)
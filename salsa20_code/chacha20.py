@@ -0,0 +1,78 @@
+"""
+chacha20.py
+------------
+
+ChaCha20 (RFC 8439) on the same context, stream and backend machinery
+as Salsa20.
+
+Provides:
+    1) ChaCha20(key, nonce12)    --— a cipher.Salsa20 context running the
+                                   ChaCha20 core: blocks, ranges, stream XOR,
+                                   zero-copy XOR and the keystream cache
+    2) chacha20_stream_xor(key, nonce12, data, initial_block=0, ...)
+    3) chacha20_stream_xor_into(key, nonce12, data, out=None, ...)
+    4) ChaCha20Encryptor         --— incremental update()/finalize()
+    5) CIPHERS                   --— context class by name, for front ends
+                                   that let the caller pick the cipher
+
+The block counter is the 32-bit word 12 and the nonce is 96 bits, so one
+(key, nonce) covers 2^32 blocks (256 GiB); ranges past that raise
+ValueError instead of wrapping. `initial_block` defaults to 0 like
+libsodium's crypto_stream_chacha20_ietf; the RFC 8439 AEAD construction
+starts its payload at block 1. Round tracing is Salsa20-only.
+"""
+
+from chacha_core import _initial_state_chacha20
+from cipher import Salsa20
+from stream import Salsa20Encryptor
+
+
+class ChaCha20(Salsa20):
+    """
+    ChaCha20 keystream generator for a fixed 32-byte key and 12-byte nonce.
+    Same API as cipher.Salsa20 (backend, cache, rounds), minus tracers.
+    IMPORTANT: Never reuse (key, nonce) across distinct messages.
+    """
+
+    core = "chacha20"
+    nonce_size = 12
+    _initial_state = staticmethod(_initial_state_chacha20)
+
+    def __init__(self, key32: bytes, nonce12: bytes, backend=None, cache=None, rounds: int = 20):
+        super().__init__(key32, nonce12, backend, cache, rounds)
+
+    def state(self, counter32: int) -> list[int]:
+        """Return the 16-word initial state for block `counter32`."""
+        s = self._template[:]
+        s[12] = counter32 & 0xffffffff
+        return s
+
+    def _trace(self, tracer, first: int, count: int) -> None:
+        raise ValueError("round tracing is only available for the Salsa20 core")
+
+
+class ChaCha20Encryptor(Salsa20Encryptor):
+    """stream.Salsa20Encryptor for ChaCha20: 32-byte key, 12-byte nonce."""
+
+    _context = ChaCha20
+
+
+def chacha20_stream_xor(key32: bytes, nonce12: bytes, data, initial_block: int = 0,
+                        backend=None, cache=None, rounds: int = 20) -> bytes:
+    """
+    XOR 'data' with the ChaCha20 keystream. Same function for enc/dec.
+    IMPORTANT: Never reuse (key, nonce) across distinct messages.
+    """
+    return ChaCha20(key32, nonce12, backend, cache, rounds).stream_xor(data, initial_block)
+
+
+def chacha20_stream_xor_into(key32: bytes, nonce12: bytes, data, out=None, initial_block: int = 0,
+                             backend=None, rounds: int = 20):
+    """
+    XOR 'data' with the ChaCha20 keystream into `out`, or in place when
+    out is None. Returns the buffer written to.
+    """
+    return ChaCha20(key32, nonce12, backend, rounds=rounds).stream_xor_into(data, out, initial_block)
+
+
+CIPHERS = {"salsa20": Salsa20, "chacha20": ChaCha20}
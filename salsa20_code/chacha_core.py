@@ -0,0 +1,117 @@
+"""
+chacha_core.py
+---------------
+
+Reference implementation of the ChaCha20 block function (RFC 8439).
+
+This module provides:
+    1) _chacha_quarterround   --— the ChaCha ARX quarterround on 4 words
+    2) _chacha_doubleround    --— column round + diagonal round
+    3) _initial_state_chacha20 --— RFC 8439 state: constants, key,
+                                 32-bit block counter, 96-bit nonce
+    4) _chacha20_hash         --— rounds // 2 doublerounds + feed-forward
+    5) chacha20_block         --— one 64-byte keystream block
+    6) _check_chacha_counter  --— keeps a block range inside the 32-bit counter
+
+ChaCha20 is Bernstein's refinement of Salsa20: the same 16-word state and
+ARX operations, but each quarterround updates every word twice and the
+second half of a doubleround works on diagonals instead of rows. The
+constant words sit in the first row, so the layout is
+
+      0..3: "expand 32-byte k"   4..11: key
+        12: block counter       13..15: nonce
+
+Like core.py this is the readable path; fastcore.py and vectorized.py
+hold the production engines, and all three must agree bit for bit.
+"""
+
+from helpers import _rotl32, _u32, _le_bytes_to_u32, _u32_to_le_bytes
+from constants import SIGMA
+from core import _check_rounds
+import metrics
+
+CHACHA20_MAX_BLOCKS = 1 << 32   # the RFC 8439 counter is a single 32-bit word
+
+
+def _chacha_quarterround(a: int, b: int, c: int, d: int) -> tuple[int, int, int, int]:
+    """
+    ChaCha quarterround (RFC 8439, Section 2.1):
+
+    a += b; d ^= a; d <<<= 16
+    c += d; b ^= c; b <<<= 12
+    a += b; d ^= a; d <<<= 8
+    c += d; b ^= c; b <<<= 7
+    """
+    a = _u32(a + b); d = _rotl32(d ^ a, 16)
+    c = _u32(c + d); b = _rotl32(b ^ c, 12)
+    a = _u32(a + b); d = _rotl32(d ^ a, 8)
+    c = _u32(c + d); b = _rotl32(b ^ c, 7)
+    return a, b, c, d
+
+
+def _chacha_doubleround(x: list[int]) -> list[int]:
+    """
+    One ChaCha doubleround: quarterrounds on the four columns
+    (0,4,8,12) (1,5,9,13) (2,6,10,14) (3,7,11,15), then on the four
+    diagonals (0,5,10,15) (1,6,11,12) (2,7,8,13) (3,4,9,14).
+    Returns a new 16-word list.
+    """
+    assert len(x) == 16
+    x = x[:]
+    for a, b, c, d in ((0, 4, 8, 12), (1, 5, 9, 13), (2, 6, 10, 14), (3, 7, 11, 15),
+                       (0, 5, 10, 15), (1, 6, 11, 12), (2, 7, 8, 13), (3, 4, 9, 14)):
+        x[a], x[b], x[c], x[d] = _chacha_quarterround(x[a], x[b], x[c], x[d])
+    return x
+
+
+def _initial_state_chacha20(key32: bytes, nonce12: bytes, counter32: int) -> list[int]:
+    """
+    Build the 4x4 ChaCha20 state (row-major) for a 32-byte key, 12-byte
+    nonce and 32-bit block counter, as laid out in RFC 8439 Section 2.3.
+    """
+    if len(key32) != 32:
+        raise ValueError("key must be 32 bytes")
+    if len(nonce12) != 12:
+        raise ValueError("chacha20 nonce must be 12 bytes")
+
+    return [
+        *(_le_bytes_to_u32(SIGMA[i:i + 4]) for i in range(0, 16, 4)),
+        *(_le_bytes_to_u32(key32[i:i + 4]) for i in range(0, 32, 4)),
+        counter32 & 0xffffffff,
+        *(_le_bytes_to_u32(nonce12[i:i + 4]) for i in range(0, 12, 4)),
+    ]
+
+
+def _chacha20_hash(state_words: list[int], rounds: int = 20) -> bytes:
+    """
+    Apply ChaCha20/rounds (default 20) to a 16-word state and return 64 bytes.
+    """
+    assert len(state_words) == 16
+    timed = metrics.ENABLED
+    if timed:
+        t0 = metrics.now()
+    w = state_words
+    for _ in range(rounds // 2):
+        w = _chacha_doubleround(w)
+    if timed:
+        t1 = metrics.now()
+        metrics.add_phase("rounds", t1 - t0)
+    block = b"".join(_u32_to_le_bytes((w[i] + state_words[i]) & 0xffffffff) for i in range(16))
+    if timed:
+        metrics.add_phase("serialize", metrics.now() - t1)
+    return block
+
+
+def _check_chacha_counter(start: int, count: int) -> None:
+    """Raise ValueError unless blocks start .. start + count - 1 fit the 32-bit counter."""
+    if start < 0 or start + count > CHACHA20_MAX_BLOCKS:
+        raise ValueError("chacha20 block counter out of range (RFC 8439 allows 2^32 blocks)")
+
+
+def chacha20_block(key32: bytes, nonce12: bytes, counter32: int, rounds: int = 20) -> bytes:
+    """
+    Return one 64-byte ChaCha20 keystream block for (key, nonce, counter).
+    """
+    _check_rounds(rounds)
+    _check_chacha_counter(counter32, 1)
+    return _chacha20_hash(_initial_state_chacha20(key32, nonce12, counter32), rounds)
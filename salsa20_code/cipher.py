@@ -0,0 +1,212 @@
+"""
+cipher.py
+----------
+
+Reusable Salsa20 cipher context.
+
+Provides:
+    1) Salsa20(key, nonce) --— holds the 16-word state template for one
+                             (key, nonce) pair and hands out keystream
+                             blocks, block ranges and stream XOR by counter,
+                             plus byte-addressed access (keystream_at,
+                             xor_at, decrypt_range) for random reads
+
+The round count (20, 12 or 8) is fixed per context; Salsa20/12 and
+Salsa20/8 trade security margin for roughly 1.7x and 2.5x the speed.
+
+Only words 8 and 9 (the 64-bit block counter) change from block to block,
+so the key/nonce/constant words are decoded and validated once when the
+context is built instead of once per block.
+
+The blocks themselves come from a keystream engine in backends.py,
+chosen per context or per call (default: $SALSA20_BACKEND, else "auto").
+An optional kscache.KeystreamCache lets repeated reads of the same blocks
+skip the core entirely.
+"""
+
+from core import _initial_state_256, _check_rounds
+from backends import _xor_keystream, get_backend
+from kscache import key_id
+import metrics
+
+
+class Salsa20:
+    """
+    Salsa20 keystream generator for a fixed 32-byte key and 8-byte nonce.
+    IMPORTANT: Never reuse (key, nonce) across distinct messages.
+
+    backend (optional): a backends.Backend or registered name.
+    cache (optional): a kscache.KeystreamCache shared across contexts.
+    rounds: 20 (default), 12 or 8 for Salsa20/12 and Salsa20/8.
+    """
+
+    core = "salsa20"    # keystream core name passed to the backend
+    nonce_size = 8
+    _initial_state = staticmethod(_initial_state_256)
+
+    def __init__(self, key32: bytes, nonce8: bytes, backend=None, cache=None, rounds: int = 20):
+        timed = metrics.ENABLED
+        if timed:
+            t0 = metrics.now()
+        # Validates key/nonce lengths and decodes the 14 fixed words once.
+        self._template = self._initial_state(key32, nonce8, 0)
+        if timed:
+            metrics.add_phase("state_setup", metrics.now() - t0)
+            metrics.inc("contexts_created", 1, self.core)
+        self.nonce = bytes(nonce8)
+        self.rounds = _check_rounds(rounds)
+        self.backend = get_backend(backend)
+        self.cache = cache
+        self._key_id = key_id(key32, self.rounds) if cache is not None else None
+
+    def state(self, counter64: int) -> list[int]:
+        """Return the 16-word initial state for block `counter64`."""
+        s = self._template[:]
+        s[8] = counter64 & 0xffffffff
+        s[9] = (counter64 >> 32) & 0xffffffff
+        return s
+
+    def block(self, counter64: int, tracer=None) -> bytes:
+        """Return the 64-byte keystream block for `counter64`."""
+        if tracer is not None:
+            self._trace(tracer, counter64, 1)
+        if self.cache is not None:
+            return self._cached_blocks(counter64, 1)
+        return self.backend.block(self._template, counter64, self.rounds, self.core)
+
+    def blocks(self, start: int, count: int) -> bytes:
+        """Return `count` consecutive keystream blocks starting at `start`."""
+        if self.cache is not None:
+            return self._cached_blocks(start, count)
+        return self.backend.blocks(self._template, start, count, self.rounds, self.core)
+
+    def blocks_into(self, start: int, count: int, out, offset: int = 0) -> None:
+        """Write `count` keystream blocks starting at `start` into `out` at `offset`."""
+        if self.cache is not None:
+            out[offset:offset + 64 * count] = self._cached_blocks(start, count)
+            return
+        self.backend.blocks_into(self._template, start, count, out, offset, self.rounds, self.core)
+
+    def stream_xor(self, data: bytes, initial_block: int = 0, tracer=None, backend=None) -> bytes:
+        """
+        XOR 'data' with the keystream starting at block `initial_block`.
+        Same function for enc/dec. `backend` overrides the context's engine
+        for this call only.
+        """
+        if tracer is not None:
+            tracer.begin(initial_block)
+            try:
+                self._trace(tracer, initial_block, (memoryview(data).nbytes + 63) // 64)
+            finally:
+                tracer.end()
+        if backend is not None:
+            return get_backend(backend).stream_xor(self._template, data, initial_block,
+                                                   self.rounds, self.core)
+        return self._stream_xor(data, initial_block)
+
+    def stream_xor_into(self, data, out=None, initial_block: int = 0, backend=None):
+        """
+        XOR 'data' (any buffer: bytes, bytearray, memoryview, mmap, NumPy
+        array) with the keystream into `out`, or into `data` itself when
+        out is None. Returns the buffer written to.
+        """
+        if out is None:
+            out = data
+        if memoryview(out).nbytes != memoryview(data).nbytes:
+            raise ValueError("out must be the same size as data")
+        if self.cache is not None and backend is None:
+            memoryview(out).cast("B")[:] = self._stream_xor(data, initial_block)
+        else:
+            engine = self.backend if backend is None else get_backend(backend)
+            engine.stream_xor_into(self._template, data, out, initial_block, self.rounds, self.core)
+        return out
+
+    def keystream_at(self, offset: int, length: int) -> bytes:
+        """
+        Return `length` keystream bytes starting at byte `offset` of the stream.
+        Only the blocks overlapping [offset, offset + length) are computed.
+        """
+        if offset < 0 or length < 0:
+            raise ValueError("offset and length must be non-negative")
+        if length == 0:
+            return b""
+        first, skip = divmod(offset, 64)
+        count = (skip + length + 63) // 64
+        return self.blocks(first, count)[skip:skip + length]
+
+    def xor_at(self, data: bytes, offset: int) -> bytes:
+        """
+        XOR 'data' with the keystream as if it sat at byte `offset` of the
+        stream: the unaligned head and tail blocks are handled here, the
+        aligned middle goes straight to the backend.
+        """
+        if offset < 0:
+            raise ValueError("offset must be non-negative")
+        src = memoryview(data).cast("B")
+        n = len(src)
+        first, skip = divmod(offset, 64)
+        if skip == 0:
+            return self._stream_xor(src, first)
+        head = min(64 - skip, n)
+        out = _xor_keystream(src[:head], self.block(first)[skip:skip + head])
+        if head == n:
+            return out
+        return out + self._stream_xor(src[head:], first + 1)
+
+    def decrypt_range(self, ciphertext, offset: int, length: int) -> bytes:
+        """
+        Decrypt bytes [offset, offset + length) of a ciphertext that was
+        encrypted from block 0. `ciphertext` may be any buffer (bytes,
+        mmap, ...); only the requested slice is read, so the cost is
+        O(length) regardless of `offset`. A range running past the end of
+        `ciphertext` raises ValueError rather than returning fewer bytes.
+        """
+        if offset < 0 or length < 0:
+            raise ValueError("offset and length must be non-negative")
+        view = memoryview(ciphertext).cast("B")
+        if offset + length > len(view):
+            raise ValueError(f"range [{offset}, {offset + length}) runs past the end of "
+                             f"the {len(view)}-byte ciphertext")
+        return self.xor_at(view[offset:offset + length], offset)
+
+    def _stream_xor(self, data, first: int) -> bytes:
+        """Block-aligned XOR through the cache when there is one, else the backend."""
+        if self.cache is None:
+            return self.backend.stream_xor(self._template, data, first, self.rounds, self.core)
+        src = memoryview(data).cast("B")
+        n = len(src)
+        return _xor_keystream(src, self._cached_blocks(first, (n + 63) // 64)[:n])
+
+    def _cached_blocks(self, start: int, count: int) -> bytes:
+        """
+        Serve blocks start..start+count-1 from the cache; runs of consecutive
+        misses are computed in one backend call each and then cached.
+        """
+        cache, kid, nonce = self.cache, self._key_id, self.nonce
+        mask = 0xffffffffffffffff
+        parts = [cache.get(kid, nonce, (start + i) & mask) for i in range(count)]
+        i = 0
+        while i < count:
+            if parts[i] is not None:
+                i += 1
+                continue
+            j = i + 1
+            while j < count and parts[j] is None:
+                j += 1
+            run = self.backend.blocks(self._template, start + i, j - i, self.rounds, self.core)
+            for k in range(i, j):
+                ks = run[64 * (k - i):64 * (k - i + 1)]
+                parts[k] = ks
+                cache.put(kid, nonce, (start + k) & mask, ks)
+            i = j
+        return b"".join(parts)
+
+    def _trace(self, tracer, first: int, count: int) -> None:
+        """Hand the blocks of one stream call that `tracer` wants to it."""
+        timed = metrics.ENABLED
+        for block in tracer.counters(first, count):
+            if timed:
+                t0 = metrics.now()
+            tracer.record(block, self.state(block), self.rounds)
+            if timed:
+                metrics.add_phase("trace_write", metrics.now() - t0)
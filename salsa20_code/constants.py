@@ -6,10 +6,11 @@ Constants used in building the Salsa20 initial state.
 
 Currently includes:
     1) SIGMA — the ASCII constant "expand 32-byte k" used in the
-               256-bit key schedule (Salsa20/20).
+               256-bit key schedule (Salsa20/20, HSalsa20 / XSalsa20,
+               and ChaCha20, where it fills the first row of the state).
 
 Keeping constants in a dedicated module makes it easier to extend
-the implementation later (e.g., Chacha or XSalsa20 constants).
+the implementation later.
 """
 
 SIGMA = b"expand 32-byte k"  # 16 ASCII bytes
@@ -10,6 +10,10 @@ This module provides:
                             + feed-forward to produce 64 bytes
     3) salsa20_block      --— public function returning one 64-byte
                             keystream block for (key, nonce, counter)
+    4) _check_rounds      --— validates a round count (20, 12, 8, ...)
+
+The round count defaults to 20 everywhere; Salsa20/12 and Salsa20/8 are
+the same core with fewer doublerounds.
 
 These functions transform key/nonce/counter inputs into keystream bytes.
 They implement the Salsa20/20 specification as documented by D. J. Bernstein.
@@ -18,6 +22,16 @@ They implement the Salsa20/20 specification as documented by D. J. Bernstein.
 from helpers import _u32_to_le_bytes, _le_bytes_to_u32
 from rounds import _doubleround
 from constants import SIGMA
+import metrics
+
+def _check_rounds(rounds: int) -> int:
+    """
+    Validate a Salsa20 round count: a positive even integer, since the
+    core runs rounds // 2 doublerounds (Salsa20/20, /12 and /8).
+    """
+    if not isinstance(rounds, int) or rounds <= 0 or rounds % 2:
+        raise ValueError("rounds must be a positive even integer (e.g. 20, 12 or 8)")
+    return rounds
 
 def _initial_state_256(key32: bytes, nonce8: bytes, counter64: int) -> list[int]:
     """
@@ -73,61 +87,97 @@ def format_state_matrix(words) -> str:
 
 import json
 
-def trace_salsa20_rounds(state_words, path="logs/salsa20_trace.txt"):
+def _write_trace(f, state_words, header=True, rounds=20):
     """
-    Write the initial state AND each doubleround state to a file.
-    The first line is a JSON header containing the initial state.
+    Write the initial state AND each doubleround state to an open text file.
+    With header=True the first line is a JSON header containing the initial
+    state and the round count.
     """
     state = state_words[:]
 
-    with open(path, "w", encoding="utf-8") as f:
-
+    if header:
         # --- NEW: Save initial state as JSON header ---
-        header = {"initial_state": state_words}
-        f.write(json.dumps(header) + "\n")
+        f.write(json.dumps({"initial_state": list(state_words), "rounds": rounds}) + "\n")
         f.write("\n")  # spacing
 
-        # Initial matrix display
-        f.write("Initial state (round 0):\n")
+    # Initial matrix display
+    f.write("Initial state (round 0):\n")
+    f.write(format_state_matrix(state))
+    f.write("\n\n")
+
+    # Doublerounds
+    for dr in range(rounds // 2):
+        state = _doubleround(state)
+        f.write(f"After doubleround {dr+1} (round {2*(dr+1)}):\n")
         f.write(format_state_matrix(state))
         f.write("\n\n")
 
-        # Doublerounds
-        for dr in range(10):
-            state = _doubleround(state)
-            f.write(f"After doubleround {dr+1} (round {2*(dr+1)}):\n")
-            f.write(format_state_matrix(state))
-            f.write("\n\n")
+def trace_salsa20_rounds(state_words, path="logs/salsa20_trace.txt", rounds=20):
+    """
+    Write the initial state AND each doubleround state to a file.
+    The first line is a JSON header containing the initial state.
+    """
+    with open(path, "w", encoding="utf-8") as f:
+        _write_trace(f, state_words, rounds=rounds)
 
-def _salsa20_hash(state_words: list[int]) -> bytes:
+def _salsa20_hash(state_words: list[int], rounds: int = 20) -> bytes:
     """
     Apply the Salsa20/20 core hash function to a 16-word state
     and return a 64-byte keystream block.
 
     Steps:
       1. Copy original state (x)
-      2. Run 10 doublerounds (20 rounds total)
+      2. Run 10 doublerounds (20 rounds total; rounds // 2 for Salsa20/rounds)
       3. Feed-forward: add original state words to final state words
       4. Serialize 16 words into 64 little-endian bytes
     """
     assert len(state_words) == 16
+    timed = metrics.ENABLED
+    if timed:
+        t0 = metrics.now()
 
     # Original state
     x = state_words[:]       # 16 words
     w = state_words[:]       # Working buffer
 
     # Perform 20 rounds (10 double-rounds)
-    for _ in range(10):
+    for _ in range(rounds // 2):
         w = _doubleround(w)
 
+    if timed:
+        t1 = metrics.now()
+        metrics.add_phase("rounds", t1 - t0)
+
     # Feed-forward addition: (w + x) mod 2^32
     out = [(w[i] + x[i]) & 0xffffffff for i in range(16)]
 
     # Serialize 16 words → 64 bytes (little endian)
-    return b"".join(_u32_to_le_bytes(v) for v in out)
+    block = b"".join(_u32_to_le_bytes(v) for v in out)
+    if timed:
+        metrics.add_phase("serialize", metrics.now() - t1)
+    return block
 
 # --- 3) One keystream block (64 bytes) ---
-def salsa20_block(key32: bytes, nonce8: bytes, counter64: int) -> bytes:
+def salsa20_block(key32: bytes, nonce8: bytes, counter64: int, tracer=None,
+                  rounds: int = 20) -> bytes:
+    """
+    Return the 64-byte keystream block for (key, nonce, counter).
+    Pass a tracer (see tracer.py) to record the rounds of this block,
+    and rounds=12 or 8 for the reduced-round variants.
+    """
+    _check_rounds(rounds)
+    timed = metrics.ENABLED
+    if timed:
+        t0 = metrics.now()
     state = _initial_state_256(key32, nonce8, counter64)
-    trace_salsa20_rounds(state, "logs/salsa20_trace.txt") # Show all rounds in a separate file
-    return _salsa20_hash(state)
+    if timed:
+        metrics.add_phase("state_setup", metrics.now() - t0)
+    if tracer is not None and tracer.wants(counter64):
+        if timed:
+            t0 = metrics.now()
+        tracer.record(counter64, state, rounds)
+        if timed:
+            metrics.add_phase("trace_write", metrics.now() - t0)
+    if timed:
+        metrics.inc("blocks_generated", 1, "reference")
+    return _salsa20_hash(state, rounds)
@@ -0,0 +1,266 @@
+"""
+fastcore.py
+------------
+
+Allocation-free production path for the Salsa20 and ChaCha20 cores (any
+even round count; 20 by default).
+
+Provides:
+    1) salsa20_hash_into    --— one block: rounds + feed-forward, packed
+                              straight into a caller-owned buffer
+    2) salsa20_blocks_into  --— consecutive blocks for one state array,
+                              bumping the counter words in place
+    3) chacha20_hash_into   --— the same for the ChaCha20 core
+    4) chacha20_blocks_into --— (RFC 8439 layout, counter in word 12)
+
+The reference functions in rounds.py / core.py build a new list per
+column/row round and a tuple per quarterround, then join 16 separate
+`to_bytes` calls. Here the 16 words live in local variables for the
+whole 20 rounds, and the feed-forward result is serialized with a single
+`struct.pack_into` into a preallocated output buffer. Both paths produce
+identical output; rounds.py stays the readable reference.
+"""
+
+from array import array
+import struct
+
+M = 0xffffffff
+_BLOCK = struct.Struct("<16I")
+
+
+def salsa20_hash_into(state, out, offset: int = 0, rounds: int = 20) -> None:
+    """
+    Apply Salsa20/rounds to the 16-word `state` (list or array('I')) and write
+    the 64-byte result into the writable buffer `out` at `offset`.
+    `state` itself is not modified.
+    """
+    (j0, j1, j2, j3, j4, j5, j6, j7,
+     j8, j9, j10, j11, j12, j13, j14, j15) = state
+    x0, x1, x2, x3, x4, x5, x6, x7 = j0, j1, j2, j3, j4, j5, j6, j7
+    x8, x9, x10, x11, x12, x13, x14, x15 = j8, j9, j10, j11, j12, j13, j14, j15
+
+    for _ in range(rounds >> 1):
+        # columnround
+        t = (x0 + x12) & M
+        x4 ^= ((t << 7) & M) | (t >> 25)
+        t = (x4 + x0) & M
+        x8 ^= ((t << 9) & M) | (t >> 23)
+        t = (x8 + x4) & M
+        x12 ^= ((t << 13) & M) | (t >> 19)
+        t = (x12 + x8) & M
+        x0 ^= ((t << 18) & M) | (t >> 14)
+        t = (x5 + x1) & M
+        x9 ^= ((t << 7) & M) | (t >> 25)
+        t = (x9 + x5) & M
+        x13 ^= ((t << 9) & M) | (t >> 23)
+        t = (x13 + x9) & M
+        x1 ^= ((t << 13) & M) | (t >> 19)
+        t = (x1 + x13) & M
+        x5 ^= ((t << 18) & M) | (t >> 14)
+        t = (x10 + x6) & M
+        x14 ^= ((t << 7) & M) | (t >> 25)
+        t = (x14 + x10) & M
+        x2 ^= ((t << 9) & M) | (t >> 23)
+        t = (x2 + x14) & M
+        x6 ^= ((t << 13) & M) | (t >> 19)
+        t = (x6 + x2) & M
+        x10 ^= ((t << 18) & M) | (t >> 14)
+        t = (x15 + x11) & M
+        x3 ^= ((t << 7) & M) | (t >> 25)
+        t = (x3 + x15) & M
+        x7 ^= ((t << 9) & M) | (t >> 23)
+        t = (x7 + x3) & M
+        x11 ^= ((t << 13) & M) | (t >> 19)
+        t = (x11 + x7) & M
+        x15 ^= ((t << 18) & M) | (t >> 14)
+        # rowround
+        t = (x0 + x3) & M
+        x1 ^= ((t << 7) & M) | (t >> 25)
+        t = (x1 + x0) & M
+        x2 ^= ((t << 9) & M) | (t >> 23)
+        t = (x2 + x1) & M
+        x3 ^= ((t << 13) & M) | (t >> 19)
+        t = (x3 + x2) & M
+        x0 ^= ((t << 18) & M) | (t >> 14)
+        t = (x5 + x4) & M
+        x6 ^= ((t << 7) & M) | (t >> 25)
+        t = (x6 + x5) & M
+        x7 ^= ((t << 9) & M) | (t >> 23)
+        t = (x7 + x6) & M
+        x4 ^= ((t << 13) & M) | (t >> 19)
+        t = (x4 + x7) & M
+        x5 ^= ((t << 18) & M) | (t >> 14)
+        t = (x10 + x9) & M
+        x11 ^= ((t << 7) & M) | (t >> 25)
+        t = (x11 + x10) & M
+        x8 ^= ((t << 9) & M) | (t >> 23)
+        t = (x8 + x11) & M
+        x9 ^= ((t << 13) & M) | (t >> 19)
+        t = (x9 + x8) & M
+        x10 ^= ((t << 18) & M) | (t >> 14)
+        t = (x15 + x14) & M
+        x12 ^= ((t << 7) & M) | (t >> 25)
+        t = (x12 + x15) & M
+        x13 ^= ((t << 9) & M) | (t >> 23)
+        t = (x13 + x12) & M
+        x14 ^= ((t << 13) & M) | (t >> 19)
+        t = (x14 + x13) & M
+        x15 ^= ((t << 18) & M) | (t >> 14)
+
+    _BLOCK.pack_into(
+        out, offset,
+        (x0 + j0) & M, (x1 + j1) & M, (x2 + j2) & M, (x3 + j3) & M,
+        (x4 + j4) & M, (x5 + j5) & M, (x6 + j6) & M, (x7 + j7) & M,
+        (x8 + j8) & M, (x9 + j9) & M, (x10 + j10) & M, (x11 + j11) & M,
+        (x12 + j12) & M, (x13 + j13) & M, (x14 + j14) & M, (x15 + j15) & M,
+    )
+
+
+def salsa20_blocks_into(state: array, start: int, count: int, out, offset: int = 0,
+                        rounds: int = 20) -> None:
+    """
+    Write `count` consecutive keystream blocks for counters start, start+1, ...
+    into `out` starting at `offset`. `state` is a preallocated array('I')
+    whose counter words 8..9 are overwritten in place.
+    """
+    ctr = start & 0xffffffffffffffff
+    for _ in range(count):
+        state[8] = ctr & M
+        state[9] = ctr >> 32
+        salsa20_hash_into(state, out, offset, rounds)
+        offset += 64
+        ctr = (ctr + 1) & 0xffffffffffffffff
+
+
+def chacha20_hash_into(state, out, offset: int = 0, rounds: int = 20) -> None:
+    """
+    Apply ChaCha20/rounds to the 16-word `state` (RFC 8439 layout) and write
+    the 64-byte result into the writable buffer `out` at `offset`.
+    `state` itself is not modified.
+    """
+    (j0, j1, j2, j3, j4, j5, j6, j7,
+     j8, j9, j10, j11, j12, j13, j14, j15) = state
+    x0, x1, x2, x3, x4, x5, x6, x7 = j0, j1, j2, j3, j4, j5, j6, j7
+    x8, x9, x10, x11, x12, x13, x14, x15 = j8, j9, j10, j11, j12, j13, j14, j15
+
+    for _ in range(rounds >> 1):
+        # column round
+        x0 = (x0 + x4) & M
+        t = x12 ^ x0
+        x12 = ((t << 16) & M) | (t >> 16)
+        x8 = (x8 + x12) & M
+        t = x4 ^ x8
+        x4 = ((t << 12) & M) | (t >> 20)
+        x0 = (x0 + x4) & M
+        t = x12 ^ x0
+        x12 = ((t << 8) & M) | (t >> 24)
+        x8 = (x8 + x12) & M
+        t = x4 ^ x8
+        x4 = ((t << 7) & M) | (t >> 25)
+        x1 = (x1 + x5) & M
+        t = x13 ^ x1
+        x13 = ((t << 16) & M) | (t >> 16)
+        x9 = (x9 + x13) & M
+        t = x5 ^ x9
+        x5 = ((t << 12) & M) | (t >> 20)
+        x1 = (x1 + x5) & M
+        t = x13 ^ x1
+        x13 = ((t << 8) & M) | (t >> 24)
+        x9 = (x9 + x13) & M
+        t = x5 ^ x9
+        x5 = ((t << 7) & M) | (t >> 25)
+        x2 = (x2 + x6) & M
+        t = x14 ^ x2
+        x14 = ((t << 16) & M) | (t >> 16)
+        x10 = (x10 + x14) & M
+        t = x6 ^ x10
+        x6 = ((t << 12) & M) | (t >> 20)
+        x2 = (x2 + x6) & M
+        t = x14 ^ x2
+        x14 = ((t << 8) & M) | (t >> 24)
+        x10 = (x10 + x14) & M
+        t = x6 ^ x10
+        x6 = ((t << 7) & M) | (t >> 25)
+        x3 = (x3 + x7) & M
+        t = x15 ^ x3
+        x15 = ((t << 16) & M) | (t >> 16)
+        x11 = (x11 + x15) & M
+        t = x7 ^ x11
+        x7 = ((t << 12) & M) | (t >> 20)
+        x3 = (x3 + x7) & M
+        t = x15 ^ x3
+        x15 = ((t << 8) & M) | (t >> 24)
+        x11 = (x11 + x15) & M
+        t = x7 ^ x11
+        x7 = ((t << 7) & M) | (t >> 25)
+        # diagonal round
+        x0 = (x0 + x5) & M
+        t = x15 ^ x0
+        x15 = ((t << 16) & M) | (t >> 16)
+        x10 = (x10 + x15) & M
+        t = x5 ^ x10
+        x5 = ((t << 12) & M) | (t >> 20)
+        x0 = (x0 + x5) & M
+        t = x15 ^ x0
+        x15 = ((t << 8) & M) | (t >> 24)
+        x10 = (x10 + x15) & M
+        t = x5 ^ x10
+        x5 = ((t << 7) & M) | (t >> 25)
+        x1 = (x1 + x6) & M
+        t = x12 ^ x1
+        x12 = ((t << 16) & M) | (t >> 16)
+        x11 = (x11 + x12) & M
+        t = x6 ^ x11
+        x6 = ((t << 12) & M) | (t >> 20)
+        x1 = (x1 + x6) & M
+        t = x12 ^ x1
+        x12 = ((t << 8) & M) | (t >> 24)
+        x11 = (x11 + x12) & M
+        t = x6 ^ x11
+        x6 = ((t << 7) & M) | (t >> 25)
+        x2 = (x2 + x7) & M
+        t = x13 ^ x2
+        x13 = ((t << 16) & M) | (t >> 16)
+        x8 = (x8 + x13) & M
+        t = x7 ^ x8
+        x7 = ((t << 12) & M) | (t >> 20)
+        x2 = (x2 + x7) & M
+        t = x13 ^ x2
+        x13 = ((t << 8) & M) | (t >> 24)
+        x8 = (x8 + x13) & M
+        t = x7 ^ x8
+        x7 = ((t << 7) & M) | (t >> 25)
+        x3 = (x3 + x4) & M
+        t = x14 ^ x3
+        x14 = ((t << 16) & M) | (t >> 16)
+        x9 = (x9 + x14) & M
+        t = x4 ^ x9
+        x4 = ((t << 12) & M) | (t >> 20)
+        x3 = (x3 + x4) & M
+        t = x14 ^ x3
+        x14 = ((t << 8) & M) | (t >> 24)
+        x9 = (x9 + x14) & M
+        t = x4 ^ x9
+        x4 = ((t << 7) & M) | (t >> 25)
+
+    _BLOCK.pack_into(
+        out, offset,
+        (x0 + j0) & M, (x1 + j1) & M, (x2 + j2) & M, (x3 + j3) & M,
+        (x4 + j4) & M, (x5 + j5) & M, (x6 + j6) & M, (x7 + j7) & M,
+        (x8 + j8) & M, (x9 + j9) & M, (x10 + j10) & M, (x11 + j11) & M,
+        (x12 + j12) & M, (x13 + j13) & M, (x14 + j14) & M, (x15 + j15) & M,
+    )
+
+
+def chacha20_blocks_into(state: array, start: int, count: int, out, offset: int = 0,
+                         rounds: int = 20) -> None:
+    """
+    ChaCha20 counterpart of salsa20_blocks_into: the 32-bit block counter
+    lives in word 12 only, so the caller keeps start + count within 2^32.
+    """
+    ctr = start
+    for _ in range(count):
+        state[12] = ctr & M
+        chacha20_hash_into(state, out, offset, rounds)
+        offset += 64
+        ctr += 1
@@ -8,6 +8,7 @@ This module implements basic 32-bit operations required by the cipher:
     1) _u32                                --— enforce 32-bit modular arithmetic
     2) _rotl32                             --— 32-bit left rotation
     3) _le_bytes_to_u32 / _u32_to_le_bytes --— little-endian conversions
+    4) _xor_bytes                          --— XOR two equal-length byte strings
 
 These are the primitive building blocks for ARX operations (Add-Rotate-Xor)
 and for interpreting key, nonce, and state words in the Salsa20 core.
@@ -61,3 +62,21 @@ def _u32_to_le_bytes(w: int) -> bytes:
     :return w, converted to bytes, bytes
     """
     return (w & 0xffffffff).to_bytes(4, "little")
+
+
+def _xor_bytes(a: bytes, b: bytes) -> bytes:
+    """
+    XOR two equal-length byte strings in one wide operation.
+
+    Why: a Python loop costs one interpreted step per byte. Converting
+    each side to a single big integer lets the XOR run word-at-a-time
+    in C, close to memcpy speed for kilobyte-sized chunks.
+
+    :param a, first operand (any bytes-like object), bytes
+    :param b, second operand, same length as a, bytes
+    :return a ^ b, bytes
+    """
+    n = len(a)
+    if len(b) != n:
+        raise ValueError("operands must have the same length")
+    return (int.from_bytes(a, "little") ^ int.from_bytes(b, "little")).to_bytes(n, "little")
@@ -0,0 +1,323 @@
+"""
+histindex.py
+-------------
+
+Sidecar index and paged queries over the JSONL history log.
+
+Provides:
+    1) HistoryIndex(log_path)   --— byte offsets of every record, keyed by
+                                  timestamp, op, key and nonce
+         add(offset, length, record) --— index one appended record
+         query(op=, key=, nonce=, since=, until=, newest_first=, skip=, limit=)
+                                     --— lazily yield matching records
+         page(number, size, ...)     --— one page of a query
+         count(...)                  --— number of matches, without reading the log
+         refresh()                   --— pick up records appended by others
+         first / last                --— timestamps of the oldest and newest record
+
+The index lives next to the log (`history.log.idx`), one tab-separated
+line per record:
+
+    offset  length  timestamp  op  key-tag  nonce-tag
+
+Keys and nonces are stored as 64-bit BLAKE2b tags, so the index stays
+small and never holds key material; a query compares tags in memory and
+then seeks to, reads and parses only the candidate lines, re-checking
+the real values. Records are assumed to be appended in timestamp order
+(as HistoryWriter does), which lets `since`/`until` bisect.
+
+When the index is missing or behind the log (e.g. after a crash, or a
+log written before indexing existed) the missing tail is scanned once
+and appended to the index; if the log was truncated the index is rebuilt.
+Lines that are not a JSON object (a record torn by a crash, say) are
+left out of the index, and so out of every query and count.
+
+A sealed index belongs to a closed segment (see histstore.py): its log
+never grows and may be gzip-compressed, in which case offsets refer to
+the uncompressed data and the segment is decompressed only when a query
+actually has a candidate in it.
+"""
+
+from array import array
+from bisect import bisect_left, bisect_right
+from datetime import datetime
+import gzip
+import hashlib
+import io
+import json
+import os
+
+INDEX_SUFFIX = ".idx"
+
+
+def _tag(value) -> int:
+    """64-bit tag of a key/nonce hex string (0 for missing values)."""
+    if not value:
+        return 0
+    digest = hashlib.blake2b(str(value).lower().encode("ascii", "replace"),
+                             digest_size=8, person=b"salsa20-histidx").digest()
+    return int.from_bytes(digest, "little")
+
+
+def _ts(value) -> str:
+    """Timestamps compare as ISO-8601 strings; accept datetimes too."""
+    return value.isoformat() if isinstance(value, datetime) else str(value)
+
+
+def _identity(path: str) -> tuple[int, int] | None:
+    """(st_dev, st_ino) of a file, or None if it does not exist."""
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return st.st_dev, st.st_ino
+
+
+def _clean(text: str) -> str:
+    """Keep index fields on one tab-separated line."""
+    return text.replace("\t", " ").replace("\n", " ").replace("\r", " ")
+
+
+class _Paged:
+    """page() on top of a query() method that takes `skip`."""
+
+    def page(self, number: int, size: int = 20, newest_first: bool = True, **filters) -> list[dict]:
+        """
+        Return page `number` (0-based) of `size` records of a query. Earlier
+        pages are skipped in the index; only this page's records are read.
+        """
+        if number < 0 or size <= 0:
+            raise ValueError("page number must be >= 0 and size > 0")
+        return list(self.query(newest_first=newest_first, skip=number * size, limit=size, **filters))
+
+
+class HistoryIndex(_Paged):
+    """
+    In-memory view of the sidecar index for one log file, plus the
+    queries built on it. Single writer; readers call refresh() to see
+    records appended since they loaded.
+    """
+
+    def __init__(self, log_path: str, index_path: str | None = None, sealed: bool = False):
+        self.log_path = log_path
+        self.index_path = index_path or log_path + INDEX_SUFFIX
+        self.sealed = sealed
+        self._clear()
+        self._out = None
+        self.refresh()
+
+    def _clear(self) -> None:
+        self._offsets = array("Q")
+        self._lengths = array("I")
+        self._stamps: list[str] = []
+        self._ops = array("B")
+        self._op_names: list[str] = []
+        self._keys = array("Q")
+        self._nonces = array("Q")
+        self._sorted = True
+        self._index_bytes = 0
+        self._log_id = None
+        self._index_id = None
+
+    def __len__(self) -> int:
+        return len(self._offsets)
+
+    @property
+    def end(self) -> int:
+        """Log offset just past the last indexed record."""
+        return self._offsets[-1] + self._lengths[-1] if self._offsets else 0
+
+    @property
+    def first(self) -> str | None:
+        """Timestamp of the oldest indexed record."""
+        return self._stamps[0] if self._stamps else None
+
+    @property
+    def last(self) -> str | None:
+        """Timestamp of the newest indexed record."""
+        return self._stamps[-1] if self._stamps else None
+
+    def _open_log(self):
+        if self.log_path.endswith(".gz"):
+            with gzip.open(self.log_path, "rb") as f:
+                return io.BytesIO(f.read())
+        return open(self.log_path, "rb")
+
+    # --- building ---------------------------------------------------------
+
+    def _remember(self, offset: int, length: int, stamp: str, op: str,
+                  key_tag: int, nonce_tag: int) -> None:
+        if self._stamps and stamp < self._stamps[-1]:
+            self._sorted = False
+        if op not in self._op_names:
+            self._op_names.append(op)
+        self._offsets.append(offset)
+        self._lengths.append(length)
+        self._stamps.append(stamp)
+        self._ops.append(self._op_names.index(op))
+        self._keys.append(key_tag)
+        self._nonces.append(nonce_tag)
+
+    def add(self, offset: int, length: int, record: dict) -> None:
+        """Index one record that occupies log bytes [offset, offset + length)."""
+        stamp = _clean(_ts(record.get("timestamp", "")))
+        op = _clean(str(record.get("op", "")))
+        key_tag, nonce_tag = _tag(record.get("key")), _tag(record.get("nonce"))
+        self._remember(offset, length, stamp, op, key_tag, nonce_tag)
+        if self._out is None:
+            self._out = open(self.index_path, "a", encoding="utf-8")
+        line = f"{offset}\t{length}\t{stamp}\t{op}\t{key_tag:016x}\t{nonce_tag:016x}\n"
+        self._out.write(line)
+        self._index_bytes += len(line.encode("utf-8"))
+
+    def flush(self) -> None:
+        if self._out is not None:
+            self._out.flush()
+
+    def close(self) -> None:
+        if self._out is not None:
+            self._out.close()
+            self._out = None
+
+    def refresh(self) -> None:
+        """
+        Load index lines not seen yet, then index any unindexed log tail.
+        If the log or index file was replaced (the writer rotated), the
+        in-memory entries are dropped and the new files read from the start.
+        """
+        self.flush()
+        log_id, index_id = _identity(self.log_path), _identity(self.index_path)
+        if ((self._log_id is not None and log_id != self._log_id)
+                or (self._index_id is not None and index_id != self._index_id)):
+            self.close()
+            self._clear()
+        try:
+            self._load()
+        finally:
+            self._log_id = _identity(self.log_path)
+            self._index_id = _identity(self.index_path)
+
+    def _load(self) -> None:
+        if os.path.exists(self.index_path):
+            with open(self.index_path, "rb") as f:
+                f.seek(self._index_bytes)
+                for raw in f:
+                    if not raw.endswith(b"\n"):
+                        break           # half-written line; rebuilt below
+                    try:
+                        off, n, stamp, op, k, nc = raw.decode("utf-8").rstrip("\n").split("\t")
+                        entry = (int(off), int(n), stamp, op, int(k, 16), int(nc, 16))
+                    except ValueError:
+                        break           # damaged line; rebuilt below
+                    self._index_bytes += len(raw)
+                    self._remember(*entry)
+            if os.path.getsize(self.index_path) != self._index_bytes:
+                self._rebuild()
+                return
+
+        if self.sealed:
+            if not os.path.exists(self.index_path):
+                self._rebuild()
+            return
+        log_size = os.path.getsize(self.log_path) if os.path.exists(self.log_path) else 0
+        if self.end > log_size:
+            self._rebuild()
+        elif self.end < log_size:
+            self._scan_log(self.end)
+
+    def _rebuild(self) -> None:
+        self.close()
+        if os.path.exists(self.index_path):
+            os.remove(self.index_path)
+        self._clear()
+        if os.path.exists(self.log_path):
+            self._scan_log(0)
+
+    def _scan_log(self, start: int) -> None:
+        with self._open_log() as f:
+            f.seek(start)
+            offset = start
+            for raw in f:
+                if not raw.endswith(b"\n"):
+                    break               # the writer has not finished this line
+                try:
+                    record = json.loads(raw)
+                except ValueError:
+                    record = None       # e.g. a line torn by a crash mid-write
+                if isinstance(record, dict):
+                    self.add(offset, len(raw), record)
+                offset += len(raw)
+        if self.sealed:
+            self.close()
+        else:
+            self.flush()
+
+    # --- querying ---------------------------------------------------------
+
+    def _candidates(self, op, key, nonce, since, until, newest_first):
+        lo, hi = 0, len(self._offsets)
+        if self._sorted:
+            if since is not None:
+                lo = bisect_left(self._stamps, _ts(since))
+            if until is not None:
+                hi = bisect_right(self._stamps, _ts(until))
+        op_code = self._op_names.index(op) if op in self._op_names else -1
+        key_tag = _tag(key) if key is not None else None
+        nonce_tag = _tag(nonce) if nonce is not None else None
+        ids = range(hi - 1, lo - 1, -1) if newest_first else range(lo, hi)
+        for i in ids:
+            if op is not None and self._ops[i] != op_code:
+                continue
+            if key_tag is not None and self._keys[i] != key_tag:
+                continue
+            if nonce_tag is not None and self._nonces[i] != nonce_tag:
+                continue
+            if not self._sorted:
+                if since is not None and self._stamps[i] < _ts(since):
+                    continue
+                if until is not None and self._stamps[i] > _ts(until):
+                    continue
+            yield i
+
+    def query(self, op: str | None = None, key: str | None = None, nonce: str | None = None,
+              since=None, until=None, newest_first: bool = False, skip: int = 0,
+              limit: int | None = None):
+        """
+        Yield matching records (dicts) lazily, oldest first unless
+        newest_first. Only the candidate lines are read from the log; the
+        first `skip` matches are passed over in the index without reading
+        them (a 64-bit tag collision could shift such a page by a record).
+        """
+        if limit is not None and limit <= 0:
+            return
+        found = 0
+        f = None
+        try:
+            for i in self._candidates(op, key, nonce, since, until, newest_first):
+                if skip:
+                    skip -= 1
+                    continue
+                if f is None:
+                    f = self._open_log()
+                f.seek(self._offsets[i])
+                try:
+                    record = json.loads(f.read(self._lengths[i]))
+                except ValueError:
+                    continue        # damaged line indexed by an older version
+                if not isinstance(record, dict):
+                    continue
+                if key is not None and str(record.get("key", "")).lower() != key.lower():
+                    continue        # tag collision
+                if nonce is not None and str(record.get("nonce", "")).lower() != nonce.lower():
+                    continue
+                yield record
+                found += 1
+                if limit is not None and found >= limit:
+                    return
+        finally:
+            if f is not None:
+                f.close()
+
+    def count(self, op=None, key=None, nonce=None, since=None, until=None) -> int:
+        """Number of index entries matching the filters (tags only, no log reads)."""
+        return sum(1 for _ in self._candidates(op, key, nonce, since, until, False))
@@ -0,0 +1,265 @@
+"""
+history.py
+-----------
+
+Append-only writer for the encrypt/decrypt history log (JSON lines).
+
+Provides:
+    1) HistoryWriter(path, window, flush_every, flush_interval, fsync,
+                     index, max_bytes, max_age, keep, compress)
+         append(record) --— write one record, O(1): nothing already
+                            written is ever rewritten
+         flush()        --— push buffered records to the OS (and disk,
+                            with fsync=True)
+         recent() / last() --— the in-memory window of newest records
+         index          --— a histstore.HistoryLog over every segment,
+                            sharing the live index of the active one
+         rotate()       --— close the active segment now
+         close()        --— also waits for background compression
+
+Each record is serialized once, when it is appended, and goes through a
+buffered file opened in append mode. `written` counts records handed to
+the file, `persisted` those flushed (and fsynced, if enabled), so
+`pending` is what a crash could still lose. Only the newest `window`
+records stay in memory; older ones live only in the log.
+
+The writer tracks the byte offset of every record it writes and hands
+it to the sidecar index (index=False turns this off), so queries over
+old records seek straight to them. It assumes it is the only writer of
+its log.
+
+Flush policy:
+    flush_every    -- flush after this many records (1 = every record,
+                      0 = only on flush()/close() or when the buffer fills)
+    flush_interval -- also flush when this many seconds have passed since
+                      the last flush (checked on append)
+    fsync          -- os.fsync after each flush, for durability across
+                      power loss rather than just process exit
+
+Rotation (off unless max_bytes or max_age is set; needs the index):
+    max_bytes      -- start a new segment once the active log reaches
+                      this size
+    max_age        -- ... or once it has been open this many seconds
+                      (tracked in the manifest, so it survives restarts)
+    keep           -- delete the oldest closed segments beyond this many,
+                      bounding disk use (None keeps everything)
+    compress       -- gzip closed segments on a background thread
+
+See histstore.py for the segment layout and manifest.
+"""
+
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+import json
+import os
+import threading
+import time
+
+from histindex import HistoryIndex
+from histstore import (HistoryLog, compress_segment, load_manifest, prune_segments,
+                       save_manifest, seal_segment, _remove)
+
+DEFAULT_PATH = "logs/history.log"
+DEFAULT_WINDOW = 100
+BUFFER_BYTES = 64 * 1024
+
+
+class HistoryWriter:
+    """
+    Buffered, append-only JSONL history log with a bounded in-memory window.
+    The file is opened (and its directory created) on the first append.
+    Usable as a context manager.
+    """
+
+    def __init__(self, path: str = DEFAULT_PATH, window: int = DEFAULT_WINDOW,
+                 flush_every: int = 1, flush_interval: float | None = None,
+                 fsync: bool = False, index: bool = True,
+                 max_bytes: int | None = None, max_age: float | None = None,
+                 keep: int | None = None, compress: bool = True):
+        if window < 0 or flush_every < 0:
+            raise ValueError("window and flush_every must be non-negative")
+        if flush_interval is not None and flush_interval <= 0:
+            raise ValueError("flush_interval must be positive")
+        if (max_bytes is not None and max_bytes <= 0) or (max_age is not None and max_age <= 0):
+            raise ValueError("max_bytes and max_age must be positive")
+        if keep is not None and keep < 0:
+            raise ValueError("keep must be non-negative")
+        if not index and (max_bytes or max_age):
+            raise ValueError("rotation needs the index (index=True)")
+        self.path = path
+        self.flush_every = flush_every
+        self.flush_interval = flush_interval
+        self.fsync = fsync
+        self._window: deque = deque(maxlen=window)
+        self._file = None
+        self._offset = 0
+        self._use_index = index
+        self._index = None
+        self._log = None
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.keep = keep
+        self.compress = compress
+        self._active_started = None
+        self._manifest_lock = threading.Lock()
+        self._compressor = None
+        self._last_flush = time.monotonic()
+        self.written = 0
+        self.persisted = 0
+
+    @property
+    def pending(self) -> int:
+        """Records written to the buffer but not yet flushed."""
+        return self.written - self.persisted
+
+    def _open(self):
+        parent = os.path.dirname(self.path)
+        if parent:
+            os.makedirs(parent, exist_ok=True)
+        if self._use_index and self._index is None:
+            self._index = HistoryIndex(self.path)
+        self._file = open(self.path, "ab", buffering=BUFFER_BYTES)
+        self._offset = self._file.tell()
+        if self.max_age and self._active_started is None:
+            with self._manifest_lock:
+                manifest = load_manifest(self.path)
+                if manifest["active_started"] is None or not self._offset:
+                    manifest["active_started"] = time.time()
+                    save_manifest(self.path, manifest)
+                self._active_started = manifest["active_started"]
+        return self._file
+
+    @property
+    def index(self) -> HistoryLog | None:
+        """
+        Flushed, up-to-date view of the whole log across segments
+        (None with index=False).
+        """
+        if not self._use_index:
+            return None
+        self.flush()
+        if self._index is None:
+            self._index = HistoryIndex(self.path)
+        if self._log is None:
+            self._log = HistoryLog(self.path, active=self._index)
+        else:
+            self._log.refresh()
+        return self._log
+
+    def _due(self) -> bool:
+        if not self._offset:
+            return False
+        if self.max_bytes and self._offset >= self.max_bytes:
+            return True
+        return bool(self.max_age and time.time() - self._active_started >= self.max_age)
+
+    def rotate(self) -> dict | None:
+        """
+        Seal the active log as a numbered segment (compressing it in the
+        background if enabled) and start a new one. Returns the segment's
+        manifest entry, or None if the active log is empty.
+        """
+        if not self._use_index:
+            raise ValueError("rotation needs the index (index=True)")
+        self.flush()
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        if self._index is None:
+            self._index = HistoryIndex(self.path)
+        if not os.path.exists(self.path) or not os.path.getsize(self.path):
+            return None
+
+        with self._manifest_lock:
+            manifest = load_manifest(self.path)
+            entry = seal_segment(self.path, self._index, manifest)
+            if self.keep is not None:
+                prune_segments(self.path, manifest, self.keep)
+            manifest["active_started"] = None
+            save_manifest(self.path, manifest)
+        self._index = HistoryIndex(self.path)
+        self._log = None
+        self._offset = 0
+        self._active_started = None
+
+        if self.compress:
+            if self._compressor is None:
+                self._compressor = ThreadPoolExecutor(max_workers=1)
+            self._compressor.submit(self._compress, entry["name"])
+        return entry
+
+    def _compress(self, name: str) -> None:
+        filename = compress_segment(self.path, name)
+        if filename is None:
+            return
+        parent = os.path.dirname(self.path)
+        with self._manifest_lock:
+            manifest = load_manifest(self.path)
+            for entry in manifest["segments"]:
+                if entry["name"] == name:
+                    entry["file"] = filename
+                    entry["compressed"] = True
+                    save_manifest(self.path, manifest)
+                    break
+            else:
+                _remove(os.path.join(parent, filename))     # pruned meanwhile
+        _remove(os.path.join(parent, name))
+
+    def append(self, record: dict) -> None:
+        """Append one record to the log and the in-memory window."""
+        f = self._file or self._open()
+        if self._due():
+            self.rotate()
+            f = self._open()
+        line = (json.dumps(record) + "\n").encode("utf-8")
+        f.write(line)
+        if self._index is not None:
+            self._index.add(self._offset, len(line), record)
+        self._offset += len(line)
+        self.written += 1
+        self._window.append(record)
+        if self.flush_every and self.pending >= self.flush_every:
+            self.flush()
+        elif (self.flush_interval is not None
+              and time.monotonic() - self._last_flush >= self.flush_interval):
+            self.flush()
+
+    def flush(self) -> None:
+        """Flush buffered records (and fsync them when fsync=True)."""
+        if self._file is not None and self.pending:
+            self._file.flush()
+            if self.fsync:
+                os.fsync(self._file.fileno())
+        if self._index is not None:
+            self._index.flush()
+        self.persisted = self.written
+        self._last_flush = time.monotonic()
+
+    def recent(self) -> list[dict]:
+        """The newest records still held in memory, oldest first."""
+        return list(self._window)
+
+    def last(self) -> dict | None:
+        """The most recent record, or None before the first append."""
+        return self._window[-1] if self._window else None
+
+    def close(self) -> None:
+        """
+        Flush and close the log and wait for pending compression; a later
+        append reopens it.
+        """
+        self.flush()
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        if self._index is not None:
+            self._index.close()
+        if self._compressor is not None:
+            self._compressor.shutdown(wait=True)
+            self._compressor = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
@@ -0,0 +1,227 @@
+"""
+histstore.py
+-------------
+
+Segmented storage for the history log: rotation, compression of closed
+segments, the segment manifest, and a reader that queries across them.
+
+Provides:
+    1) HistoryLog(path)           --— query / page / count over every closed
+                                     segment plus the active log, with the
+                                     filters of histindex.HistoryIndex
+    2) load_manifest / save_manifest --— the JSON list of closed segments
+    3) seal_segment(path, index, manifest) --— move the active log and its
+                                     index aside as the next numbered segment
+    4) compress_segment(path, name) --— gzip a sealed segment
+    5) prune_segments(path, manifest, keep) --— drop the oldest segments
+
+Layout, for path = logs/history.log:
+
+    history.log                  active segment, appended to
+    history.log.idx              its index
+    history.log.000001.gz        closed segment, gzip-compressed
+    history.log.000001.idx       its index (offsets into the uncompressed data)
+    history.log.manifest.json    {"active_started": <epoch seconds>,
+                                  "segments": [{"seq", "name", "file", "first",
+                                                "last", "records", "bytes",
+                                                "compressed"}, ...]}
+
+"first"/"last" are the timestamps of a segment's oldest and newest
+record. A query skips segments whose time range cannot match `since` /
+`until`, filters the rest by their (uncompressed, in-memory) index, and
+decompresses a segment only when it holds a candidate record.
+
+HistoryWriter (history.py) does the rotating; it is the only process
+that changes the manifest, and it replaces the file atomically, so a
+reader sees either the old or the new list.
+"""
+
+import gzip
+import json
+import os
+import shutil
+
+from histindex import HistoryIndex, INDEX_SUFFIX, _Paged, _ts
+
+MANIFEST_SUFFIX = ".manifest.json"
+GZIP_SUFFIX = ".gz"
+
+
+def manifest_path(path: str) -> str:
+    return path + MANIFEST_SUFFIX
+
+
+def load_manifest(path: str) -> dict:
+    """The manifest of log `path` (an empty one if it does not exist yet)."""
+    try:
+        with open(manifest_path(path), encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {"active_started": None, "segments": []}
+
+
+def save_manifest(path: str, manifest: dict) -> None:
+    """Write the manifest atomically (temporary file + rename)."""
+    target = manifest_path(path)
+    tmp = target + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=1)
+        f.write("\n")
+    os.replace(tmp, target)
+
+
+def _segment_path(path: str, name: str) -> str:
+    return os.path.join(os.path.dirname(path), name)
+
+
+def seal_segment(path: str, index: HistoryIndex, manifest: dict) -> dict:
+    """
+    Rename the active log and its index to the next numbered segment and
+    add it to `manifest` (not saved). `index` must be the active log's
+    index; it is closed. Returns the new manifest entry.
+    """
+    index.close()
+    seq = max((seg["seq"] for seg in manifest["segments"]), default=0) + 1
+    name = f"{os.path.basename(path)}.{seq:06d}"
+    base = _segment_path(path, name)
+    os.replace(path, base)
+    if os.path.exists(index.index_path):
+        os.replace(index.index_path, base + INDEX_SUFFIX)
+    entry = {
+        "seq": seq,
+        "name": name,
+        "file": name,
+        "first": index.first,
+        "last": index.last,
+        "records": len(index),
+        "bytes": index.end,
+        "compressed": False,
+    }
+    manifest["segments"].append(entry)
+    return entry
+
+
+def compress_segment(path: str, name: str, level: int = 6) -> str | None:
+    """
+    Gzip segment `name` of log `path` to `<name>.gz` and return the new
+    file name, or None if the segment is gone (pruned meanwhile). The
+    uncompressed file is left for the caller to remove once the
+    manifest points at the compressed one.
+    """
+    src = _segment_path(path, name)
+    dst = src + GZIP_SUFFIX
+    try:
+        with open(src, "rb") as fi, gzip.open(dst + ".tmp", "wb", compresslevel=level) as fo:
+            shutil.copyfileobj(fi, fo, 1 << 20)
+    except FileNotFoundError:
+        return None
+    os.replace(dst + ".tmp", dst)
+    return name + GZIP_SUFFIX
+
+
+def _remove(filename: str) -> None:
+    try:
+        os.remove(filename)
+    except FileNotFoundError:
+        pass
+
+
+def prune_segments(path: str, manifest: dict, keep: int) -> list[dict]:
+    """Delete the oldest segments beyond the newest `keep`; returns their entries."""
+    removed = []
+    while len(manifest["segments"]) > keep:
+        entry = manifest["segments"].pop(0)
+        base = _segment_path(path, entry["name"])
+        for filename in (base, base + GZIP_SUFFIX, base + INDEX_SUFFIX):
+            _remove(filename)
+        removed.append(entry)
+    return removed
+
+
+class HistoryLog(_Paged):
+    """
+    Read-side view of a segmented history log. `active` lets a writer
+    share its live index for the active segment; otherwise the reader
+    keeps its own and refresh() catches it up with the log.
+    """
+
+    def __init__(self, path: str, active: HistoryIndex | None = None):
+        self.path = path
+        self._shared_active = active is not None
+        self.active = active if active is not None else HistoryIndex(path)
+        self._sealed: dict = {}
+        self.manifest = load_manifest(path)
+
+    def refresh(self) -> None:
+        """Re-read the manifest and pick up records appended to the active log."""
+        old = [seg["name"] for seg in self.segments]
+        self.manifest = load_manifest(self.path)
+        names = [seg["name"] for seg in self.segments]
+        self._sealed = {k: v for k, v in self._sealed.items() if k[0] in names}
+        if self._shared_active:
+            return
+        if names != old:
+            # The writer rotated: the active log and index are new files
+            self.active.close()
+            self.active = HistoryIndex(self.path)
+        else:
+            self.active.refresh()
+
+    @property
+    def segments(self) -> list[dict]:
+        return self.manifest["segments"]
+
+    def __len__(self) -> int:
+        return sum(seg["records"] for seg in self.segments) + len(self.active)
+
+    def _segment_index(self, entry: dict) -> HistoryIndex:
+        filename = _segment_path(self.path, entry["file"])
+        if not entry["compressed"] and not os.path.exists(filename):
+            filename += GZIP_SUFFIX     # compressed since the manifest was read
+        key = (entry["name"], filename)
+        if key not in self._sealed:
+            index_path = _segment_path(self.path, entry["name"]) + INDEX_SUFFIX
+            self._sealed[key] = HistoryIndex(filename, index_path, sealed=True)
+        return self._sealed[key]
+
+    def _parts(self, since, until, newest_first):
+        """Indexes of the segments that can hold records in [since, until]."""
+        parts = []
+        for entry in self.segments:
+            if since is not None and entry["last"] is not None and entry["last"] < _ts(since):
+                continue
+            if until is not None and entry["first"] is not None and entry["first"] > _ts(until):
+                continue
+            parts.append(entry)
+        indexes = [self._segment_index(entry) for entry in parts] + [self.active]
+        return indexes[::-1] if newest_first else indexes
+
+    def query(self, op: str | None = None, key: str | None = None, nonce: str | None = None,
+              since=None, until=None, newest_first: bool = False, skip: int = 0,
+              limit: int | None = None):
+        """
+        Yield matching records across all segments, oldest first unless
+        newest_first. Segments lying wholly inside the first `skip`
+        matches are passed over by their index counts, without reading them.
+        """
+        if limit is not None and limit <= 0:
+            return
+        found = 0
+        for index in self._parts(since, until, newest_first):
+            if skip:
+                matches = index.count(op, key, nonce, since, until)
+                if skip >= matches:
+                    skip -= matches
+                    continue
+            remaining = None if limit is None else limit - found
+            for record in index.query(op, key, nonce, since, until, newest_first, skip, remaining):
+                yield record
+                found += 1
+            skip = 0            # consumed inside this segment
+            if limit is not None and found >= limit:
+                return
+
+    def count(self, op=None, key=None, nonce=None, since=None, until=None) -> int:
+        """Number of index entries matching the filters, across segments."""
+        return sum(index.count(op, key, nonce, since, until)
+                   for index in self._parts(since, until, False))
@@ -5,11 +5,12 @@ main.py
 Example driver for the Salsa20 implementation with session history.
 """
 
-from stream import salsa20_stream_xor
-from rounds import _doubleround
+from cipher import Salsa20
+from history import HistoryWriter
+from tracer import BinaryFileTracer
+from bintrace import TraceView
 from helpers import _u32_to_le_bytes
 import secrets as s
-import json
 from datetime import datetime
 
 def fmt_char(b: int) -> str:
@@ -52,56 +53,55 @@ def show_xor_with_final_block(plaintext: bytes, keystream: bytes) -> bytes:
 
     return ciphertext
 
-def view_trace_file(pt: bytes, path: str = "logs/salsa20_trace.txt"):
+def view_trace_file(pt: bytes, path: str = "logs/salsa20_trace.bin", block: int = 0):
     """
-    Display the Salsa20 round trace stored in 'path', then:
-      - recompute the 20-round core state
-      - compute the final keystream block via feed-forward
-      - show plaintext ⊕ keystream = ciphertext using `pt`
+    Display the Salsa20 round trace of keystream block `block` stored in
+    the binary trace at 'path', then:
+      - show the core state after the last doubleround (read from the trace)
+      - show the final keystream block via feed-forward
+      - show plaintext ⊕ keystream = ciphertext for that block of `pt`
     `pt` must be the plaintext bytes you want to demo.
     """
     try:
-        with open(path, "r", encoding="utf-8") as f:
-            lines = f.readlines()
+        trace = TraceView(path)
     except FileNotFoundError:
         print(f"[!] Trace file '{path}' not found.")
         return
-
-    print("\n=== SALSA20 ROUND TRACE ===\n")
-
-    # 1) First line: JSON header with initial_state
-    try:
-        header = json.loads(lines[0].strip())
-        initial_state = header["initial_state"]
-    except Exception:
-        print("[!] Could not parse initial state from trace file.")
+    except ValueError as e:
+        print(f"[!] {e}")
         return
 
-    # 2) Print the rest (the matrices and text written by trace_salsa20_rounds)
-    for line in lines[1:]:
-        print(line.rstrip())
+    with trace:
+        i = trace.find(block)
+        if i is None:
+            traced = [trace.counter(j) for j in range(len(trace))]
+            print(f"[!] Block {block} is not in the trace (traced blocks: {traced}).")
+            return
+        rounds = trace.rounds
 
-    print("\n=== END OF TRACE ===\n")
+        print("\n=== SALSA20 ROUND TRACE ===\n")
+        print(f"Key id: {trace.key_id.hex()}  Nonce: {trace.nonce.hex()}  "
+              f"Block: {block}  Rounds: {rounds}")
 
-    # 3) Recompute 20-round core state via 10 doublerounds
-    w = initial_state[:]
-    for _ in range(10):
-        w = _doubleround(w)
+        # 1) The initial state and the state after each doubleround
+        print_state_matrix(trace.state(i, 0), "Initial state (round 0)")
+        for step in range(1, trace.steps):
+            print_state_matrix(trace.state(i, step), f"After doubleround {step} (round {2 * step})")
 
-    core_words = w[:]
-    core_bytes = b"".join(_u32_to_le_bytes(v) for v in core_words)
+        print("\n=== END OF TRACE ===\n")
 
-    print("\n=== CORE STATE AFTER 20 ROUNDS (before feed-forward) ===\n")
-    print("Words (hex):", [hex(v) for v in core_words])
-    print("\nBytes (LE):", core_bytes.hex())
-    print_state_matrix(core_words, "4×4 Core Matrix (20 rounds, no feed-forward)")
+        # 2) The core state after the last doubleround, as traced
+        core_words = trace.state(i, trace.steps - 1)
+        core_bytes = b"".join(_u32_to_le_bytes(v) for v in core_words)
 
-    # 4) Feed-forward with initial_state to get final Salsa20 block
-    out_words = [
-        (core_words[i] + initial_state[i]) & 0xffffffff
-        for i in range(16)
-    ]
-    out_bytes = b"".join(_u32_to_le_bytes(v) for v in out_words)
+        print(f"\n=== CORE STATE AFTER {rounds} ROUNDS (before feed-forward) ===\n")
+        print("Words (hex):", [hex(v) for v in core_words])
+        print("\nBytes (LE):", core_bytes.hex())
+        print_state_matrix(core_words, f"4×4 Core Matrix ({rounds} rounds, no feed-forward)")
+
+        # 3) Feed-forward with the initial state gives the keystream block
+        out_bytes = trace.keystream(i)
+        out_words = [int.from_bytes(out_bytes[k:k + 4], "little") for k in range(0, 64, 4)]
 
     print("\n=== FINAL SALSA20 BLOCK (after feed-forward) ===\n")
     print("Words (hex):", [hex(v) for v in out_words])
@@ -110,12 +110,8 @@ def view_trace_file(pt: bytes, path: str = "logs/salsa20_trace.txt"):
 
     print("\n=== END ===\n")
 
-    # 5) XOR demo: plaintext ⊕ keystream = ciphertext
-    # out_bytes is 64 bytes, so pt must be <= 64 bytes
-    if len(pt) > len(out_bytes):
-        print(f"[!] Warning: plaintext longer than one block ({len(pt)} > 64).")
-        print("    Only the first 64 bytes will be shown in the XOR demo.\n")
-    show_xor_with_final_block(pt, out_bytes)
+    # 4) XOR demo: this block's 64 bytes of plaintext ⊕ keystream = ciphertext
+    show_xor_with_final_block(pt[64 * block:64 * block + 64], out_bytes)
 
 def print_state_matrix(words, title="State Matrix"):
     print(f"\n{title}:")
@@ -123,56 +119,76 @@ def print_state_matrix(words, title="State Matrix"):
         row = words[4*r : 4*r + 4]
         print("  " + "  ".join(f"{v:08x}" for v in row))
 
-def pretty_print_history(path="logs/history.log"):
-    print("\n=== SALSA20 HISTORY LOG ===\n")
-
-    with open(path, "r", encoding="utf-8") as f:
-        for line in f:
-            line = line.strip()
-            if not line:
-                continue
-
-            try:
-                record = json.loads(line)
-            except json.JSONDecodeError:
-                print(f"[!] Skipping invalid JSON: {line}")
-                continue
-
-            print("Timestamp  : ", record.get("timestamp"))
-            print("Operation  : ", record.get("op"))
-            print("Key        : ", record.get("key"))
-            print("Nonce      : ", record.get("nonce"))
-
-            if record.get("op") == "encrypt":
-                print("Plaintext  : ", record.get("plaintext"))
-                print("Plain(hex) : ", record.get("plaintext_hex"))
-                print("Cipher(hex):", record.get("ciphertext_hex"))
+def print_log_record(record: dict) -> None:
+    print("Timestamp  : ", record.get("timestamp"))
+    print("Operation  : ", record.get("op"))
+    print("Key        : ", record.get("key"))
+    print("Nonce      : ", record.get("nonce"))
+
+    if record.get("op") == "encrypt":
+        print("Plaintext  : ", record.get("plaintext"))
+        print("Plain(hex) : ", record.get("plaintext_hex"))
+        print("Cipher(hex):", record.get("ciphertext_hex"))
+
+    if record.get("op") == "decrypt":
+        print("Cipher(hex):", record.get("ciphertext_hex"))
+        print("Plain(hex) :", record.get("plaintext_hex"))
+        print("Plaintext  :", record.get("plaintext"))
+
+    print("-" * 60)
+
+HISTORY_FILTERS = ("op", "key", "nonce", "since", "until")
+
+def parse_history_filters(text: str) -> dict:
+    """Parse 'op=encrypt nonce=<hex> since=2026-01-01' into query filters."""
+    filters = {}
+    for token in text.split():
+        name, sep, value = token.partition("=")
+        if not sep or name not in HISTORY_FILTERS or not value:
+            raise ValueError(f"bad filter {token!r}; use {', '.join(HISTORY_FILTERS)}=value")
+        filters[name] = value
+    return filters
+
+def pretty_print_history(index, page_size: int = 5):
+    """Page through the log newest first, reading only the records shown."""
+    text = input("Filter (e.g. op=encrypt nonce=<hex> since=2026-01-01; blank for all): ")
+    try:
+        filters = parse_history_filters(text)
+    except ValueError as e:
+        print(f"[!] {e}\n")
+        return
 
-            if record.get("op") == "decrypt":
-                print("Cipher(hex):", record.get("ciphertext_hex"))
-                print("Plain(hex) :", record.get("plaintext_hex"))
-                print("Plaintext  :", record.get("plaintext"))
+    total = index.count(**filters)
+    print(f"\n=== SALSA20 HISTORY LOG ({total} matching, newest first) ===\n")
 
-            print("-" * 60)
+    shown = 0
+    for record in index.query(newest_first=True, **filters):
+        print_log_record(record)
+        shown += 1
+        if shown % page_size == 0 and shown < total:
+            more = input(f"-- {shown}/{total} -- Enter for more, q to stop: ").strip().lower()
+            if more == "q":
+                break
 
     print("\n=== END OF LOG ===\n")
 
-def append_history_to_file(filename="logs/history.log") -> None:
-    """Dump HISTORY entries to a file without modifying them."""
-    if not HISTORY:
-        return
-
-    with open(filename, "a", encoding="utf-8") as f:
-        for entry in HISTORY:
-            f.write(json.dumps(entry) + "\n")
-
 ENC = 1
 DEC = 2
 VIEW_HISTORY = 3
 VIEW_ROUNDS = 4
 QUIT = 5
 
-HISTORY: list[dict] = []  # stores all operations in this session
+HISTORY_PATH = "logs/history.log"
+TRACE_PATH = "logs/salsa20_trace.bin"
+
+# Appends each operation to HISTORY_PATH as it happens; keeps only the
+# newest records of this session in memory. The log rotates into gzipped
+# segments at 4 MiB or after a day, and only the newest 50 are kept.
+HISTORY_SEGMENT_BYTES = 4 * 1024 * 1024
+HISTORY_SEGMENT_SECONDS = 24 * 60 * 60
+HISTORY_KEEP_SEGMENTS = 50
+HISTORY = HistoryWriter(HISTORY_PATH, window=100, max_bytes=HISTORY_SEGMENT_BYTES,
+                        max_age=HISTORY_SEGMENT_SECONDS, keep=HISTORY_KEEP_SEGMENTS)
 
 
 def main() -> None:
@@ -188,28 +204,27 @@ def main() -> None:
 
         if menu_option == ENC:
             pt = do_encrypt()
-            append_history_to_file()
 
         elif menu_option == DEC:
             do_decrypt()
-            append_history_to_file()
 
         elif menu_option == VIEW_HISTORY:
-            pretty_print_history()
+            pretty_print_history(HISTORY.index)
 
         #elif menu_option == VIEW_ROUNDS:
         #    view_trace_file(demo_plaintext=pt)
 
         elif menu_option == VIEW_ROUNDS:
-            if HISTORY and "plaintext" in HISTORY[-1]:
-                pt = HISTORY[-1]["plaintext"].encode("utf-8")
-                view_trace_file(pt)
+            last = HISTORY.last()
+            if last and last.get("plaintext") is not None:
+                pt = last["plaintext"].encode("utf-8")
+                view_trace_file(pt, TRACE_PATH, ask_block(len(pt)))
             else:
                 print("[!] No plaintext available for XOR demo.")
 
         elif menu_option == QUIT:
             print_history()
-            append_history_to_file()
+            HISTORY.close()
             print("History saved to history.log")
             print("Thanks for testing Salsa20!")
             break
@@ -223,7 +238,8 @@ def do_encrypt() -> str:
         user_msg = "hello salsa20"
     msg = user_msg.encode("utf-8")
 
-    ct = salsa20_stream_xor(key, nonce, msg)
+    # Trace every block; the round viewer can jump to any of them.
+    ct = Salsa20(key, nonce).stream_xor(msg, tracer=BinaryFileTracer(TRACE_PATH))
 
     print("\n[+] Key        :", key.hex())
     print("[+] Nonce      :", nonce.hex())
@@ -264,7 +280,7 @@ def do_decrypt() -> None:
         print("[!] Nonce must be 8 bytes (16 hex chars).\n")
         return
 
-    pt = salsa20_stream_xor(key, nonce, ct)
+    pt = Salsa20(key, nonce).stream_xor(ct, tracer=BinaryFileTracer(TRACE_PATH))
 
     try:
         pt_text = pt.decode("utf-8")
@@ -291,6 +307,18 @@ def do_decrypt() -> None:
         "plaintext": pt_text if printable else None,
     })
 
+def ask_block(nbytes: int) -> int:
+    """Ask which 64-byte block of an `nbytes` message to view (0 if there is one)."""
+    last = max(nbytes - 1, 0) // 64
+    while last:
+        choice = input(f"Block to view (0-{last}, blank for 0): ").strip()
+        if not choice:
+            break
+        if choice.isdigit() and int(choice) <= last:
+            return int(choice)
+        print("Please enter a valid block number.\n")
+    return 0
+
 def print_menu() -> None:
     print("1) Encrypt")
     print("2) Decrypt")
@@ -307,12 +335,15 @@ def get_menu_option() -> int:
 
 def print_history() -> None:
     print("\n========== SESSION HISTORY ==========")
-    if not HISTORY:
+    recent = HISTORY.recent()
+    if not recent:
         print("No operations performed.")
         print("=====================================\n")
         return
 
-    for idx, entry in enumerate(HISTORY, start=1):
+    # Only the newest records are kept in memory; number them session-wide.
+    first = HISTORY.written - len(recent) + 1
+    for idx, entry in enumerate(recent, start=first):
         op = entry["op"]
         print(f"\n[{idx}] Operation: {op.upper()}")
         print(f"    Key   : {entry['key']}")
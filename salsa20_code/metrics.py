@@ -0,0 +1,174 @@
+"""
+metrics.py
+-----------
+
+Opt-in performance counters and phase timings for the cipher hot path.
+
+Provides:
+    1) enable / disable / recording() --— switch collection on and off
+    2) inc(name, n, label)            --— bump a counter
+    3) add_phase(phase, ns)           --— accumulate wall time for a phase
+       add_blocks / add_xor           --— the two hot-path updates, one lock each
+    4) snapshot()                     --— counters and phase totals as a dict
+    5) prometheus_text()              --— the same in Prometheus text format
+    6) reset()                        --— zero everything
+
+Counters:
+    blocks_generated{backend}  keystream blocks computed by an engine
+    bytes_xored                bytes XORed with keystream (backends._xor_keystream
+                               and the NumPy engine)
+    contexts_created{core}     cipher contexts built (salsa20 / chacha20)
+
+Phases (wall time and number of timed sections):
+    state_setup   decoding key/nonce into the state (salsa20_block, contexts)
+    keystream     engine block generation
+    rounds        doublerounds on the reference core
+    serialize     feed-forward + little-endian packing on the reference core
+    xor           XOR of data with keystream
+    trace_write   tracer.record calls
+
+Phases nest where the code does: on the reference engine `keystream`
+includes that call's `rounds` and `serialize` time.
+
+Collection is off unless SALSA20_METRICS=1 is set or enable() is called.
+Instrumented code reads the module-level ENABLED flag once per call (or
+per batch of blocks), so the disabled cost is one attribute lookup; the
+counters and timers themselves only run while enabled.
+"""
+
+from contextlib import contextmanager
+import os
+import threading
+import time
+
+ENV_VAR = "SALSA20_METRICS"
+
+ENABLED = os.environ.get(ENV_VAR, "") not in ("", "0")
+
+now = time.perf_counter_ns
+
+COUNTERS = {
+    "blocks_generated": ("backend", "Keystream blocks computed, by engine."),
+    "bytes_xored": (None, "Bytes XORed with keystream."),
+    "contexts_created": ("core", "Cipher contexts built, by core."),
+}
+PHASES = ("state_setup", "keystream", "rounds", "serialize", "xor", "trace_write")
+
+_lock = threading.Lock()
+_counts: dict = {}
+_phase_ns: dict = {}
+_phase_calls: dict = {}
+
+
+def enable() -> None:
+    """Start collecting."""
+    global ENABLED
+    ENABLED = True
+
+
+def disable() -> None:
+    """Stop collecting; the values gathered so far are kept."""
+    global ENABLED
+    ENABLED = False
+
+
+@contextmanager
+def recording(reset_first: bool = True):
+    """Collect inside a `with` block, restoring the previous on/off state after."""
+    global ENABLED
+    previous = ENABLED
+    if reset_first:
+        reset()
+    ENABLED = True
+    try:
+        yield
+    finally:
+        ENABLED = previous
+
+
+def inc(name: str, n: int = 1, label: str = "") -> None:
+    """Add `n` to counter `name` (with its label value, if it has one)."""
+    with _lock:
+        key = (name, label)
+        _counts[key] = _counts.get(key, 0) + n
+
+
+def add_phase(phase: str, ns: int) -> None:
+    """Add `ns` nanoseconds of wall time to `phase`."""
+    with _lock:
+        _phase_ns[phase] = _phase_ns.get(phase, 0) + ns
+        _phase_calls[phase] = _phase_calls.get(phase, 0) + 1
+
+
+def add_blocks(backend: str, count: int, ns: int) -> None:
+    """Record `count` keystream blocks made by `backend` in `ns` nanoseconds."""
+    with _lock:
+        key = ("blocks_generated", backend)
+        _counts[key] = _counts.get(key, 0) + count
+        _phase_ns["keystream"] = _phase_ns.get("keystream", 0) + ns
+        _phase_calls["keystream"] = _phase_calls.get("keystream", 0) + 1
+
+
+def add_xor(nbytes: int, ns: int) -> None:
+    """Record `nbytes` XORed with keystream in `ns` nanoseconds."""
+    with _lock:
+        key = ("bytes_xored", "")
+        _counts[key] = _counts.get(key, 0) + nbytes
+        _phase_ns["xor"] = _phase_ns.get("xor", 0) + ns
+        _phase_calls["xor"] = _phase_calls.get("xor", 0) + 1
+
+
+def reset() -> None:
+    """Zero all counters and phase timings."""
+    with _lock:
+        _counts.clear()
+        _phase_ns.clear()
+        _phase_calls.clear()
+
+
+def snapshot() -> dict:
+    """
+    Return a consistent copy of everything collected so far:
+    labelled counters as {label: count}, unlabelled ones as ints, and
+    phases as {"seconds": float, "calls": int}.
+    """
+    with _lock:
+        counts = dict(_counts)
+        phase_ns = dict(_phase_ns)
+        phase_calls = dict(_phase_calls)
+    snap = {"enabled": ENABLED}
+    for name, (label, _) in COUNTERS.items():
+        if label is None:
+            snap[name] = counts.get((name, ""), 0)
+        else:
+            snap[name] = {lv: c for (n, lv), c in sorted(counts.items()) if n == name}
+    snap["phases"] = {
+        p: {"seconds": phase_ns.get(p, 0) / 1e9, "calls": phase_calls.get(p, 0)}
+        for p in PHASES
+    }
+    return snap
+
+
+def prometheus_text(prefix: str = "salsa20") -> str:
+    """Render snapshot() in the Prometheus text exposition format."""
+    snap = snapshot()
+    lines = []
+    for name, (label, help_text) in COUNTERS.items():
+        metric = f"{prefix}_{name}_total"
+        lines.append(f"# HELP {metric} {help_text}")
+        lines.append(f"# TYPE {metric} counter")
+        if label is None:
+            lines.append(f"{metric} {snap[name]}")
+        else:
+            for lv, c in snap[name].items():
+                lines.append(f'{metric}{{{label}="{lv}"}} {c}')
+
+    for metric, key, help_text in (
+        (f"{prefix}_phase_seconds_total", "seconds", "Wall time spent per phase."),
+        (f"{prefix}_phase_calls_total", "calls", "Timed sections per phase."),
+    ):
+        lines.append(f"# HELP {metric} {help_text}")
+        lines.append(f"# TYPE {metric} counter")
+        for p in PHASES:
+            lines.append(f'{metric}{{phase="{p}"}} {snap["phases"][p][key]}')
+    return "\n".join(lines) + "\n"
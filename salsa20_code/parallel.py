@@ -0,0 +1,148 @@
+"""
+parallel.py
+------------
+
+Multi-process Salsa20 encryption by partitioning the block counter space.
+
+Provides:
+    1) parallel_stream_xor(key, nonce, data, ...) --— buffer in, bytes out
+    2) parallel_xor_file(key, nonce, src, dst=None, ...) --— file in place
+                             or into `dst`, via per-worker mmap windows
+
+Salsa20 blocks are independent given (key, nonce, counter), so a message
+can be cut into 64-byte-aligned segments and each segment XORed by a
+different process with its own starting counter. Data never travels
+through pickles: buffers go through `multiprocessing.shared_memory` and
+files are mapped by each worker, and every worker writes only its own
+byte range of the output, so the result is in order by construction.
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+import mmap
+import os
+
+from backends import available_backends, get_backend
+from cipher import Salsa20
+import fileio
+
+MIN_SEGMENT_BYTES = 1024 * 1024    # below this per worker, process start-up dominates
+SEGMENTS_PER_WORKER = 4            # a few segments each keeps workers evenly busy
+
+
+def _segments(size: int, workers: int, align: int, min_segment: int) -> list[tuple[int, int]]:
+    """Split [0, size) into `align`-aligned (start, end) ranges for `workers` processes."""
+    target = max(min_segment, -(-size // (workers * SEGMENTS_PER_WORKER)))
+    seg = -(-target // align) * align
+    return [(lo, min(lo + seg, size)) for lo in range(0, size, seg)]
+
+
+def _backend_name(backend):
+    """
+    Backends cross the process boundary by registered name, so only a
+    registered, available backend can be sent to the workers.
+    """
+    if backend is None:
+        return None
+    engine = get_backend(backend)
+    if engine.name not in available_backends() or get_backend(engine.name) is not engine:
+        raise ValueError(f"backend {engine.name!r} is not a registered, available backend; "
+                         "worker processes look backends up by name (see register_backend)")
+    return engine.name
+
+
+def _xor_shared_segment(key32, nonce8, backend, rounds, in_name, out_name, start, end, initial_block):
+    """Worker: XOR bytes [start, end) of shared block `in_name` into `out_name`."""
+    src = shared_memory.SharedMemory(name=in_name)
+    dst = shared_memory.SharedMemory(name=out_name)
+    try:
+        ctx = Salsa20(key32, nonce8, backend, rounds=rounds)
+        with src.buf[start:end] as data, dst.buf[start:end] as out:
+            ctx.stream_xor_into(data, out, initial_block + start // 64)
+    finally:
+        src.close()
+        dst.close()
+
+
+def _xor_file_segment(key32, nonce8, backend, rounds, src_path, dst_path, start, end, initial_block,
+                      window):
+    """Worker: XOR bytes [start, end) of `src_path` into `dst_path` through mmap."""
+    ctx = Salsa20(key32, nonce8, backend, rounds=rounds)
+    if dst_path == src_path:
+        with open(src_path, "r+b") as f:
+            fileio.xor_mapped_range(ctx, f.fileno(), f.fileno(), start, end, initial_block, window)
+    else:
+        with open(src_path, "rb") as src, open(dst_path, "r+b") as dst:
+            fileio.xor_mapped_range(ctx, src.fileno(), dst.fileno(), start, end, initial_block, window)
+
+
+def parallel_stream_xor(key32: bytes, nonce8: bytes, data, initial_block: int = 0,
+                        workers: int | None = None, backend=None,
+                        min_segment: int = MIN_SEGMENT_BYTES, rounds: int = 20) -> bytes:
+    """
+    XOR 'data' with the Salsa20 keystream using a pool of `workers`
+    processes (default: os.cpu_count()). Same result as salsa20_stream_xor.
+    Inputs that would give a single segment are processed in this process.
+    """
+    workers = workers or os.cpu_count() or 1
+    src = memoryview(data).cast("B")
+    n = len(src)
+    segments = _segments(n, workers, 64, min_segment)
+    if workers == 1 or len(segments) <= 1:
+        return Salsa20(key32, nonce8, backend, rounds=rounds).stream_xor(src, initial_block)
+
+    name = _backend_name(backend)
+    shm_in = shared_memory.SharedMemory(create=True, size=n)
+    shm_out = shared_memory.SharedMemory(create=True, size=n)
+    try:
+        shm_in.buf[:n] = src
+        with ProcessPoolExecutor(max_workers=min(workers, len(segments))) as pool:
+            futures = [
+                pool.submit(_xor_shared_segment, key32, nonce8, name, rounds,
+                            shm_in.name, shm_out.name, lo, hi, initial_block)
+                for lo, hi in segments
+            ]
+            for fut in futures:
+                fut.result()
+        return bytes(shm_out.buf[:n])
+    finally:
+        for shm in (shm_in, shm_out):
+            shm.close()
+            shm.unlink()
+
+
+def parallel_xor_file(key32: bytes, nonce8: bytes, src_path: str, dst_path: str | None = None,
+                      initial_block: int = 0, workers: int | None = None, backend=None,
+                      window: int = fileio.WINDOW_BYTES,
+                      min_segment: int = MIN_SEGMENT_BYTES, rounds: int = 20) -> int:
+    """
+    Parallel version of fileio.salsa20_xor_file: each worker maps and XORs
+    its own window-aligned range of the file. Returns the bytes processed.
+    """
+    fileio._check_window(window)
+    workers = workers or os.cpu_count() or 1
+    size = os.path.getsize(src_path)
+    src_path = os.path.abspath(src_path)
+    dst_path = src_path if dst_path is None else os.path.abspath(dst_path)
+    if dst_path != src_path:
+        with open(dst_path, "wb") as f:
+            f.truncate(size)
+
+    align = max(window, mmap.ALLOCATIONGRANULARITY)
+    segments = _segments(size, workers, align, min_segment)
+    if workers == 1 or len(segments) <= 1:
+        for lo, hi in segments:
+            _xor_file_segment(key32, nonce8, backend, rounds, src_path, dst_path, lo, hi, initial_block,
+                              window)
+        return size
+
+    name = _backend_name(backend)
+    with ProcessPoolExecutor(max_workers=min(workers, len(segments))) as pool:
+        futures = [
+            pool.submit(_xor_file_segment, key32, nonce8, name, rounds, src_path, dst_path,
+                        lo, hi, initial_block, window)
+            for lo, hi in segments
+        ]
+        for fut in futures:
+            fut.result()
+    return size
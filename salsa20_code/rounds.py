@@ -15,7 +15,7 @@ directly to the steps described in the Salsa20 specification. They form
 the core diffusion mechanism in the 20-round Salsa20 block function.
 """
 
-from helpers import _rotl32, _u32
+from helpers import _rotl32, _u32, _u32_to_le_bytes
 
 def _quarterround(y0: int, y1: int, y2: int, y3: int) -> tuple[int, int, int, int]:
     """
@@ -79,14 +79,14 @@ def _doubleround(x: list[int]) -> list[int]:
     """
     return _rowround(_columnround(x))
 
-def _salsa20_hash(state_words: list[int]) -> bytes:
+def _salsa20_hash(state_words: list[int], rounds: int = 20) -> bytes:
     """
-    Apply Salsa20/20 to a 16-word (32-bit) state and return 64 bytes.
+    Apply Salsa20/rounds (default 20) to a 16-word (32-bit) state and return 64 bytes.
     """
     assert len(state_words) == 16
     x = state_words[:]            # original
     w = state_words[:]            # working
-    for _ in range(10):           # 20 rounds = 10 doublerounds
+    for _ in range(rounds // 2):  # 20 rounds = 10 doublerounds
         w = _doubleround(w)
     out = [(w[i] + x[i]) & 0xffffffff for i in range(16)]
     return b"".join(_u32_to_le_bytes(v) for v in out)
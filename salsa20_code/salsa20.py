@@ -0,0 +1,36 @@
+"""
+salsa20.py
+-----------
+
+One-stop import for the Salsa20 implementation (and its ChaCha20 sibling).
+
+Re-exports the helpers, rounds, core, context, stream and backend APIs
+so callers (and the tests) can simply `from salsa20 import ...`.
+"""
+
+from helpers import _u32, _rotl32, _le_bytes_to_u32, _u32_to_le_bytes, _xor_bytes
+from rounds import _quarterround, _rowround, _columnround, _doubleround
+from core import _initial_state_256, _salsa20_hash, salsa20_block
+from cipher import Salsa20
+from stream import (
+    salsa20_stream_xor,
+    salsa20_stream_xor_into,
+    salsa20_decrypt_range,
+    Salsa20Encryptor,
+)
+from backends import (
+    Backend,
+    register_backend,
+    get_backend,
+    available_backends,
+    verify_backend,
+)
+from xsalsa20 import hsalsa20, XSalsa20, xsalsa20_stream_xor
+from chacha_core import chacha20_block
+from chacha20 import (
+    ChaCha20,
+    ChaCha20Encryptor,
+    chacha20_stream_xor,
+    chacha20_stream_xor_into,
+)
+from batch import salsa20_xor_batch, chacha20_xor_batch
@@ -5,31 +5,134 @@ stream.py
 High-level streaming API for Salsa20 encryption/decryption.
 
 Provides:
-    1) salsa20_stream_xor(key, nonce, data, initial_block=0)
+    1) salsa20_stream_xor(key, nonce, data, initial_block=0, tracer=None, backend=None, cache=None,
+                          rounds=20)
+    2) salsa20_decrypt_range(key, nonce, ciphertext, offset, length, backend=None, cache=None,
+                             rounds=20)
+    3) Salsa20Encryptor(key, nonce) --— incremental update()/finalize() object
+    4) salsa20_stream_xor_into(key, nonce, data, out=None, ...) --— zero-copy
+       variant writing into a caller-supplied (or the input) buffer
 
-This function XORs arbitrary-length data with the Salsa20 keystream,
-generated block-by-block using the Salsa20 core. Because XOR is its own
+salsa20_stream_xor XORs arbitrary-length data with the Salsa20 keystream,
+generated block-by-block by a `cipher.Salsa20` context. Because XOR is its own
 inverse, the same function performs both encryption and decryption.
 
+Every entry point takes `rounds` (20, 12 or 8) to select Salsa20/20,
+Salsa20/12 or Salsa20/8; both sides of a message must use the same value.
+
 This is the user-facing interface: the part applications call.
 """
 
-from core import salsa20_block
+from backends import _xor_keystream
+from cipher import Salsa20
 
 # Stream XOR (encrypt/decrypt)
-def salsa20_stream_xor(key32: bytes, nonce8: bytes, data: bytes, initial_block: int = 0) -> bytes:
+def salsa20_stream_xor(key32: bytes, nonce8: bytes, data: bytes, initial_block: int = 0,
+                       tracer=None, backend=None, cache=None, rounds: int = 20) -> bytes:
     """
     XOR 'data' with the Salsa20 keystream. Same function for enc/dec.
     IMPORTANT: Never reuse (key, nonce) across distinct messages.
+
+    tracer (optional): a tracer from tracer.py; it decides which blocks
+    of this call get their rounds recorded.
+    backend (optional): keystream engine name or instance (see backends.py).
+    cache (optional): a kscache.KeystreamCache to reuse keystream blocks.
+    rounds: 20 (default), 12 or 8.
+
+    Builds a one-shot Salsa20 context; callers encrypting several pieces
+    under the same (key, nonce) can keep a `cipher.Salsa20` themselves.
+    """
+    return Salsa20(key32, nonce8, backend, cache, rounds).stream_xor(data, initial_block, tracer)
+
+
+def salsa20_decrypt_range(key32: bytes, nonce8: bytes, ciphertext, offset: int, length: int,
+                          backend=None, cache=None, rounds: int = 20) -> bytes:
+    """
+    Decrypt bytes [offset, offset + length) of 'ciphertext' (encrypted from
+    block 0) without touching the keystream before `offset`.
+    """
+    return Salsa20(key32, nonce8, backend, cache, rounds).decrypt_range(ciphertext, offset, length)
+
+
+def salsa20_stream_xor_into(key32: bytes, nonce8: bytes, data, out=None, initial_block: int = 0,
+                            backend=None, rounds: int = 20):
+    """
+    XOR 'data' with the Salsa20 keystream into the writable buffer `out`
+    (same size as data), or in place when out is None. Accepts any
+    buffer-protocol object; pair with buffers.BufferPool to avoid
+    per-message allocation. Returns the buffer written to.
+    """
+    return Salsa20(key32, nonce8, backend, rounds=rounds).stream_xor_into(data, out, initial_block)
+
+
+class Salsa20Encryptor:
+    """
+    Incremental Salsa20 stream XOR for data that arrives in chunks.
+
+    Remembers the next block counter and the unused tail of the current
+    keystream block between update() calls, so chunks of any size give the
+    same bytes as one salsa20_stream_xor over their concatenation, with
+    O(chunk) memory and no keystream computed twice. Encryption and
+    decryption are the same operation.
+    IMPORTANT: Never reuse (key, nonce) across distinct messages.
     """
-    out = bytearray(len(data))
-    block = initial_block
-    i = 0
-    while i < len(data):
-        ks = salsa20_block(key32, nonce8, block)
-        take = min(64, len(data) - i)
-        for j in range(take):
-            out[i + j] = data[i + j] ^ ks[j]
-        i += take
-        block += 1
-    return bytes(out)
+
+    _context = Salsa20    # context class; chacha20.ChaCha20Encryptor swaps in ChaCha20
+
+    def __init__(self, key32: bytes, nonce8: bytes, initial_block: int = 0, backend=None,
+                 rounds: int = 20):
+        self._ctx = self._context(key32, nonce8, backend, rounds=rounds)
+        self._block = initial_block     # next keystream block to generate
+        self._leftover = b""            # unused keystream of the previous block
+        self._bytes = 0
+        self._finalized = False
+
+    @property
+    def position(self) -> int:
+        """Number of bytes processed so far."""
+        return self._bytes
+
+    def update(self, data) -> bytes:
+        """XOR the next chunk of the stream and return the result."""
+        if self._finalized:
+            raise ValueError("update() called after finalize()")
+        src = memoryview(data).cast("B")
+        n = len(src)
+        self._bytes += n
+        parts = []
+        i = 0
+
+        # 1) Finish the partially used block from the previous call
+        if self._leftover:
+            take = min(len(self._leftover), n)
+            parts.append(_xor_keystream(src[:take], self._leftover[:take]))
+            self._leftover = self._leftover[take:]
+            i = take
+
+        # 2) Whole blocks go straight to the backend
+        full = (n - i) // 64 * 64
+        if full:
+            ctx = self._ctx
+            parts.append(ctx.backend.stream_xor(ctx._template, src[i:i + full], self._block,
+                                                ctx.rounds, ctx.core))
+            self._block += full // 64
+            i += full
+
+        # 3) Short tail: keep the rest of this block for the next call
+        if i < n:
+            ks = self._ctx.block(self._block)
+            self._block += 1
+            rem = n - i
+            parts.append(_xor_keystream(src[i:], ks[:rem]))
+            self._leftover = ks[rem:]
+
+        return b"".join(parts)
+
+    def finalize(self) -> bytes:
+        """
+        End the stream. A stream cipher has nothing buffered, so this
+        returns b""; it drops the leftover keystream and rejects further updates.
+        """
+        self._finalized = True
+        self._leftover = b""
+        return b""
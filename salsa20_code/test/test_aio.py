@@ -0,0 +1,52 @@
+"""
+test_aio.py
+------------
+
+Tests for the asyncio adapters in aio.py.
+
+"""
+
+import asyncio
+import socket
+
+import aio, stream
+
+KEY = bytes(range(32))
+NONCE = b"\x66" * 8
+
+
+def test_reader_decrypts_across_odd_chunks():
+    msg = bytes(range(256)) * 10
+    ct = stream.salsa20_stream_xor(KEY, NONCE, msg)
+
+    async def run():
+        raw = asyncio.StreamReader()
+        raw.feed_data(ct)
+        raw.feed_eof()
+        r = aio.Salsa20StreamReader(raw, KEY, NONCE, offload_bytes=100, slice_bytes=64)
+        parts = [await r.readexactly(n) for n in (1, 63, 65, 300)]
+        parts.append(await r.read())
+        return b"".join(parts), r.position, r.at_eof()
+
+    pt, pos, eof = asyncio.run(run())
+    assert pt == msg and pos == len(msg) and eof
+
+
+def test_writer_encrypts_over_socket_pair():
+    chunks = [b"a" * 5, b"b" * 70, b"c" * 5000, b"", b"d" * 3]
+    msg = b"".join(chunks)
+
+    async def run():
+        left, right = socket.socketpair()
+        _, w = await asyncio.open_connection(sock=left)
+        r, rw = await asyncio.open_connection(sock=right)
+        sw = aio.Salsa20StreamWriter(w, KEY, NONCE, offload_bytes=1024, slice_bytes=1000)
+        for c in chunks:
+            await sw.write(c)
+        sw.close()
+        await sw.wait_closed()
+        received = await r.read()
+        rw.close()
+        return received
+
+    assert asyncio.run(run()) == stream.salsa20_stream_xor(KEY, NONCE, msg)
@@ -0,0 +1,90 @@
+"""
+test_backends.py
+-----------------
+
+Every available backend must match the reference engine and the
+bundled known-answer vectors.
+
+"""
+
+import pytest
+
+import backends, cipher, stream
+from vectors import SALSA20_VECTORS
+
+KEY = bytes(range(32))
+NONCE = b"\x01\x02\x03\x04\x05\x06\x07\x08"
+
+
+@pytest.mark.parametrize("name", backends.available_backends())
+def test_backend_verifies(name):
+    backends.verify_backend(name)
+
+
+@pytest.mark.parametrize("name", backends.available_backends())
+@pytest.mark.parametrize("vector", SALSA20_VECTORS, ids=lambda v: v["name"])
+def test_backend_matches_vectors_through_context(name, vector):
+    ctx = cipher.Salsa20(vector["key"], vector["nonce"], backend=name, rounds=vector.get("rounds", 20))
+    counter, skip = divmod(vector["offset"], 64)
+    n = len(vector["keystream"])
+    zeros = bytes(skip + n)
+    assert ctx.stream_xor(zeros, initial_block=counter)[skip:] == vector["keystream"]
+
+
+@pytest.mark.parametrize("name", backends.available_backends())
+def test_backend_large_stream_matches_reference(name):
+    data = bytes(range(256)) * 40 + b"odd"
+    ref = stream.salsa20_stream_xor(KEY, NONCE, data, 9, backend="reference")
+    assert stream.salsa20_stream_xor(KEY, NONCE, data, 9, backend=name) == ref
+
+
+@pytest.mark.parametrize("name", backends.available_backends())
+@pytest.mark.parametrize("rounds", [12, 8])
+def test_reduced_rounds_match_reference(name, rounds):
+    data = bytes(range(256)) * 12 + b"tail"
+    ref = stream.salsa20_stream_xor(KEY, NONCE, data, 3, backend="reference", rounds=rounds)
+    assert stream.salsa20_stream_xor(KEY, NONCE, data, 3, backend=name, rounds=rounds) == ref
+    assert ref != stream.salsa20_stream_xor(KEY, NONCE, data, 3, backend=name)
+
+
+def test_selection_per_call_context_and_env(monkeypatch):
+    ctx = cipher.Salsa20(KEY, NONCE, backend="reference")
+    assert ctx.backend.name == "reference"
+
+    monkeypatch.setenv(backends.ENV_VAR, "fast")
+    assert cipher.Salsa20(KEY, NONCE).backend.name == "fast"
+    assert cipher.Salsa20(KEY, NONCE, backend="reference").backend.name == "reference"
+
+    monkeypatch.delenv(backends.ENV_VAR)
+    assert cipher.Salsa20(KEY, NONCE).backend.name == backends.DEFAULT_BACKEND
+
+    data = b"per-call override"
+    assert ctx.stream_xor(data, backend="fast") == ctx.stream_xor(data)
+
+
+def test_unknown_backend_rejected():
+    with pytest.raises(ValueError):
+        backends.get_backend("no-such-engine")
+
+
+def test_registered_backend_is_selectable():
+    class Doubled(backends.FastBackend):
+        name = "test-doubled"
+
+    backends.register_backend(Doubled())
+    try:
+        assert "test-doubled" in backends.available_backends()
+        backends.verify_backend("test-doubled")
+    finally:
+        del backends._BACKENDS["test-doubled"]
+
+
+def test_backend_without_blocks_into_cannot_be_registered():
+    class Incomplete(backends.Backend):
+        name = "test-incomplete"
+
+    with pytest.raises(TypeError):
+        backends.register_backend(Incomplete())
+    with pytest.raises(TypeError):
+        backends.register_backend(object())
+    assert "test-incomplete" not in backends.available_backends()
@@ -0,0 +1,75 @@
+"""
+test_batch.py
+--------------
+
+Tests for the multi-key batch API in batch.py.
+
+"""
+
+import os
+
+import pytest
+
+import batch, chacha20, metrics, stream, vectorized
+
+
+def _inputs(m, nonce_size, max_len=200):
+    keys = [os.urandom(32) for _ in range(m)]
+    nonces = [os.urandom(nonce_size) for _ in range(m)]
+    messages = [os.urandom(i * 37 % max_len) for i in range(m)]   # includes empty ones
+    return keys, nonces, messages
+
+
+@pytest.mark.parametrize("backend", [None, "fast"])
+@pytest.mark.parametrize("rounds", [20, 8])
+def test_salsa20_batch_matches_per_message(backend, rounds):
+    keys, nonces, messages = _inputs(50, 8)
+    out = batch.salsa20_xor_batch(keys, nonces, messages, initial_block=5, rounds=rounds,
+                                  backend=backend)
+    assert out == [stream.salsa20_stream_xor(k, n, m, initial_block=5, rounds=rounds)
+                   for k, n, m in zip(keys, nonces, messages)]
+    # Same function for enc/dec
+    assert batch.salsa20_xor_batch(keys, nonces, out, 5, rounds, backend) == messages
+
+
+@pytest.mark.parametrize("backend", [None, "reference"])
+def test_chacha20_batch_matches_per_message(backend):
+    keys, nonces, messages = _inputs(20, 12)
+    out = batch.chacha20_xor_batch(keys, nonces, messages, initial_block=1, backend=backend)
+    assert out == [chacha20.chacha20_stream_xor(k, n, m, initial_block=1)
+                   for k, n, m in zip(keys, nonces, messages)]
+
+
+def test_groups_and_large_messages(monkeypatch):
+    monkeypatch.setattr(batch, "BATCH_BLOCKS", 4)
+    keys, nonces, _ = _inputs(6, 8)
+    messages = [b"a" * 100, b"b" * 300, b"", b"c" * 64 * 4, b"d", bytearray(b"e" * 129)]
+    out = batch.salsa20_xor_batch(keys, nonces, messages, initial_block=2**64 - 2)
+    assert out == [stream.salsa20_stream_xor(k, n, bytes(m), initial_block=2**64 - 2)
+                   for k, n, m in zip(keys, nonces, messages)]
+
+
+@pytest.mark.skipif(not vectorized.AVAILABLE, reason="needs NumPy")
+def test_vectorized_path_counts_blocks_once():
+    keys, nonces, messages = _inputs(10, 8)
+    with metrics.recording():
+        batch.salsa20_xor_batch(keys, nonces, messages)
+    snap = metrics.snapshot()
+    assert snap["blocks_generated"] == {"numpy": sum((len(m) + 63) // 64 for m in messages)}
+    assert snap["bytes_xored"] == sum(map(len, messages))
+    assert snap["contexts_created"] == {}
+
+
+def test_rejects_bad_input():
+    keys, nonces, messages = _inputs(3, 8)
+    assert batch.salsa20_xor_batch([], [], []) == []
+    with pytest.raises(ValueError):
+        batch.salsa20_xor_batch(keys, nonces[:2], messages)
+    with pytest.raises(ValueError):
+        batch.salsa20_xor_batch(keys, [b"short"] * 3, messages)
+    with pytest.raises(ValueError):
+        batch.salsa20_xor_batch([b"k" * 31] * 3, nonces, messages)
+    with pytest.raises(ValueError):
+        batch.salsa20_xor_batch(keys, nonces, messages, rounds=7)
+    with pytest.raises(ValueError):
+        batch.chacha20_xor_batch(keys[:1], [bytes(12)], [b"x" * 65], initial_block=2**32 - 1)
@@ -0,0 +1,70 @@
+"""
+test_bench.py
+--------------
+
+Tests for the benchmark suite and regression gate in bench.py.
+Runs are kept tiny (small sizes, very short min_time).
+
+"""
+
+import json
+
+import pytest
+
+import bench
+
+
+def _tiny(**kw):
+    return bench.run_benchmarks(sizes=(1, 64), backends=["fast"], min_time=0.0, repeat=1, **kw)
+
+
+def test_report_shape_and_units():
+    report = _tiny(ghz=2.0)
+    ids = [r["id"] for r in report["results"]]
+    assert ids[:4] == [
+        "_quarterround/reference/salsa20/0",
+        "_doubleround/reference/salsa20/0",
+        "_salsa20_hash/reference/salsa20/r20/64",
+        "salsa20_block/reference/salsa20/r20/64",
+    ]
+    assert report["results"][0]["rounds"] is None
+    assert "stream_xor/fast/chacha20/r20/64" in ids
+    assert "ctx_stream_xor/fast/chacha20/r20/64" in ids
+    assert len(ids) == len(set(ids))
+    r = next(r for r in report["results"] if r["id"] == "stream_xor/fast/salsa20/r20/64")
+    assert r["mb_per_s"] == pytest.approx(64 / r["ns_per_op"] * 1e3)
+    assert r["cycles_per_byte"] == pytest.approx(r["ns_per_op"] * 2.0 / 64)
+    assert report["meta"]["cpu_ghz_source"] == "argument"
+    json.dumps(report)
+
+
+def test_cpu_ghz_env_override(monkeypatch):
+    monkeypatch.setenv(bench.GHZ_ENV_VAR, "3.5")
+    assert bench.cpu_ghz() == (3.5, "env")
+    assert bench.cpu_ghz(1.2) == (1.2, "argument")
+
+
+def test_compare_flags_only_real_regressions():
+    base = {"results": [{"id": "a", "ns_per_op": 100.0}, {"id": "b", "ns_per_op": 100.0}]}
+    cur = {"results": [{"id": "a", "ns_per_op": 109.0}, {"id": "b", "ns_per_op": 150.0},
+                       {"id": "new", "ns_per_op": 1.0}]}
+    regs = bench.compare(cur, base, threshold=0.10)
+    assert [r["id"] for r in regs] == ["b"]
+    assert regs[0]["slowdown"] == pytest.approx(0.5)
+    assert bench.compare(cur, base, threshold=0.6) == []
+    with pytest.raises(ValueError):
+        bench.compare(cur, base, threshold=-1)
+
+
+def test_cli_gate_exit_status(tmp_path, monkeypatch):
+    out = tmp_path / "run.json"
+    args = ["--sizes", "64", "--backends", "fast", "--cores", "salsa20",
+            "--min-time", "0", "--repeat", "1"]
+    assert bench.main(args + ["--out", str(out)]) == 0
+    baseline = json.loads(out.read_text())
+    for r in baseline["results"]:
+        r["ns_per_op"] /= 100          # pretend the baseline was 100x faster
+    slow = tmp_path / "baseline.json"
+    slow.write_text(json.dumps(baseline))
+    assert bench.main(args + ["--baseline", str(slow)]) == 1
+    assert bench.main(args + ["--baseline", str(out), "--threshold", "100"]) == 0
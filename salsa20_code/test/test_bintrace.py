@@ -0,0 +1,91 @@
+"""
+test_bintrace.py
+-----------------
+
+Tests for the binary round-trace format (bintrace.py) and BinaryFileTracer.
+
+"""
+
+import pytest
+
+import bintrace, core, kscache, stream, tracer
+
+KEY = bytes(range(32))
+NONCE = bytes(range(8))
+
+
+def test_records_are_fixed_size(tmp_path):
+    path = tmp_path / "trace.bin"
+    stream.salsa20_stream_xor(KEY, NONCE, b"x" * 64 * 5, tracer=tracer.BinaryFileTracer(str(path)))
+    assert path.stat().st_size == bintrace.HEADER.size + 5 * (8 + 11 * 64)
+
+    with bintrace.TraceView(str(path)) as view:
+        assert len(view) == 5 and view.rounds == 20 and view.steps == 11
+        assert view.key_id == kscache.key_id(KEY)
+        assert view.nonce == NONCE
+        assert [view.counter(i) for i in range(5)] == [0, 1, 2, 3, 4]
+
+
+def test_view_matches_core(tmp_path):
+    path = tmp_path / "trace.bin"
+    data = bytes(300)
+    ct = stream.salsa20_stream_xor(KEY, NONCE, data, initial_block=7,
+                                   tracer=tracer.BinaryFileTracer(str(path), every=2))
+    with bintrace.TraceView(str(path)) as view:
+        assert [view.counter(i) for i in range(len(view))] == [7, 9, 11]
+        i = view.find(9)
+        state = core._initial_state_256(KEY, NONCE, 9)
+        assert view.states(i) == tracer.round_states(state)
+        assert view.state(i, 3) == tracer.round_states(state)[3]
+        assert view.keystream(i) == core.salsa20_block(KEY, NONCE, 9)
+        assert view.keystream(i) == ct[128:192]
+        assert view.find(8) is None and view.find(100) is None
+        with pytest.raises(IndexError):
+            view.state(i, 11)
+        with pytest.raises(IndexError):
+            view.counter(3)
+
+
+def test_reduced_rounds_and_truncation_per_message(tmp_path):
+    path = tmp_path / "trace.bin"
+    t = tracer.BinaryFileTracer(str(path))
+    stream.salsa20_stream_xor(KEY, NONCE, bytes(200), tracer=t)
+    stream.salsa20_stream_xor(KEY, NONCE, bytes(10), tracer=t, rounds=8)
+    with bintrace.TraceView(str(path)) as view:
+        assert len(view) == 1 and view.rounds == 8 and view.steps == 5
+        assert view.keystream(0) == core.salsa20_block(KEY, NONCE, 0, rounds=8)
+
+
+def test_rejects_other_files(tmp_path):
+    path = tmp_path / "trace.txt"
+    t = tracer.FileTracer(str(path))
+    stream.salsa20_stream_xor(KEY, NONCE, b"hello", tracer=t)
+    with pytest.raises(ValueError):
+        bintrace.TraceView(str(path))
+    (tmp_path / "short.bin").write_bytes(b"SALSA20T")
+    with pytest.raises(ValueError):
+        bintrace.TraceView(str(tmp_path / "short.bin"))
+
+
+def test_each_stream_call_truncates_and_opens_once(tmp_path, monkeypatch):
+    path = tmp_path / "trace.bin"
+    t = tracer.BinaryFileTracer(str(path))
+    stream.salsa20_stream_xor(KEY, NONCE, bytes(300), tracer=t)
+    # An empty message leaves an empty trace, not the previous one
+    stream.salsa20_stream_xor(KEY, NONCE, b"", tracer=t)
+    assert path.stat().st_size == 0
+    with pytest.raises(ValueError):
+        bintrace.TraceView(str(path))
+
+    opened = []
+    real_open = open
+    monkeypatch.setattr(tracer, "open", lambda *a: opened.append(a) or real_open(*a), raising=False)
+    stream.salsa20_stream_xor(KEY, NONCE, bytes(64 * 20), tracer=t)
+    assert len(opened) == 1
+    with bintrace.TraceView(str(path)) as view:
+        assert len(view) == 20
+
+    # Blocks traced outside a stream call are appended
+    core.salsa20_block(KEY, NONCE, 20, t)
+    with bintrace.TraceView(str(path)) as view:
+        assert [view.counter(i) for i in (19, 20)] == [19, 20]
@@ -0,0 +1,36 @@
+"""
+test_buffers.py
+----------------
+
+Tests for the reusable buffer pool in buffers.py.
+
+"""
+
+import buffers, stream
+
+KEY = bytes(range(32))
+NONCE = b"\x88" * 8
+
+
+def test_size_classes():
+    assert buffers.BufferPool.size_class(1) == buffers.MIN_CLASS_BYTES
+    assert buffers.BufferPool.size_class(65) == 128
+    assert buffers.BufferPool.size_class(1024) == 1024
+
+
+def test_pool_reuses_buffers_in_steady_state():
+    pool = buffers.BufferPool()
+    for n in (100, 120, 90, 128):
+        msg = bytes(n)
+        with pool.lease(n) as out:
+            stream.salsa20_stream_xor_into(KEY, NONCE, msg, out)
+            assert bytes(out) == stream.salsa20_stream_xor(KEY, NONCE, msg)
+    assert pool.allocations == 1 and pool.reuses == 3
+
+
+def test_pool_bounds_idle_buffers():
+    pool = buffers.BufferPool(per_class=1)
+    a, b = pool.acquire(64), pool.acquire(64)
+    pool.release(a)
+    pool.release(b)
+    assert pool.acquire(64) is a
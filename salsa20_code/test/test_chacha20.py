@@ -0,0 +1,84 @@
+"""
+test_chacha20.py
+-----------------
+
+Tests for the ChaCha20 context and stream API in chacha20.py.
+
+"""
+
+import pytest
+
+import backends, chacha20, chacha_core, kscache, tracer
+from vectors import CHACHA20_VECTORS
+
+KEY = bytes(range(32))
+NONCE = bytes(range(12))
+
+
+@pytest.mark.parametrize("name", backends.available_backends())
+@pytest.mark.parametrize("v", CHACHA20_VECTORS, ids=lambda v: v["name"])
+def test_vectors_through_context(name, v):
+    ctx = chacha20.ChaCha20(v["key"], v["nonce"], backend=name)
+    assert ctx.keystream_at(v["offset"], len(v["keystream"])) == v["keystream"]
+
+
+def test_blocks_match_reference_core():
+    ctx = chacha20.ChaCha20(KEY, NONCE)
+    assert ctx.blocks(3, 4) == b"".join(chacha_core.chacha20_block(KEY, NONCE, c) for c in range(3, 7))
+    assert ctx.state(9)[12] == 9
+
+
+def test_rfc_8439_2_4_2_sunscreen():
+    pt = (b"Ladies and Gentlemen of the class of '99: If I could offer you only one tip "
+          b"for the future, sunscreen would be it.")
+    nonce = bytes.fromhex("000000000000004a00000000")
+    ct = chacha20.chacha20_stream_xor(KEY, nonce, pt, initial_block=1)
+    assert ct[:16] == bytes.fromhex("6e2e359a2568f98041ba0728dd0d6981")
+    assert ct[-2:] == bytes.fromhex("874d")
+    assert chacha20.chacha20_stream_xor(KEY, nonce, ct, initial_block=1) == pt
+
+
+def test_reduced_rounds_and_round_check():
+    ks8 = chacha20.ChaCha20(KEY, NONCE, rounds=8).block(0)
+    assert ks8 == chacha_core.chacha20_block(KEY, NONCE, 0, rounds=8)
+    assert ks8 != chacha20.ChaCha20(KEY, NONCE).block(0)
+    with pytest.raises(ValueError):
+        chacha20.ChaCha20(KEY, NONCE, rounds=5)
+
+
+def test_counter_limit():
+    ctx = chacha20.ChaCha20(KEY, NONCE)
+    last = ctx.stream_xor(bytes(64), initial_block=2**32 - 1)
+    assert last == chacha_core.chacha20_block(KEY, NONCE, 2**32 - 1)
+    with pytest.raises(ValueError):
+        ctx.stream_xor(bytes(65), initial_block=2**32 - 1)
+    with pytest.raises(ValueError):
+        ctx.block(2**32)
+
+
+def test_encryptor_chunks_and_into():
+    msg = bytes(range(256)) * 5
+    expected = chacha20.chacha20_stream_xor(KEY, NONCE, msg, initial_block=2)
+    enc = chacha20.ChaCha20Encryptor(KEY, NONCE, initial_block=2)
+    assert enc.update(msg[:33]) + enc.update(msg[33:700]) + enc.update(msg[700:]) == expected
+    buf = bytearray(msg)
+    chacha20.chacha20_stream_xor_into(KEY, NONCE, buf, initial_block=2)
+    assert bytes(buf) == expected
+
+
+def test_cache_and_random_access():
+    cache = kscache.KeystreamCache()
+    ctx = chacha20.ChaCha20(KEY, NONCE, cache=cache)
+    msg = bytes(1000)
+    ct = ctx.stream_xor(msg)
+    assert ct == chacha20.ChaCha20(KEY, NONCE).stream_xor(msg)
+    assert ctx.decrypt_range(ct, 130, 300) == msg[130:430]
+    assert cache.stats()["hits"] > 0
+
+
+def test_differs_from_salsa20_and_rejects_tracer():
+    assert chacha20.CIPHERS["salsa20"](KEY, NONCE[:8]).block(0) != chacha20.ChaCha20(KEY, NONCE).block(0)
+    with pytest.raises(ValueError):
+        chacha20.ChaCha20(KEY, NONCE).stream_xor(b"x", tracer=tracer.RingBufferTracer())
+    with pytest.raises(ValueError):
+        chacha20.ChaCha20(KEY, bytes(8))
@@ -0,0 +1,51 @@
+"""
+test_chacha_core.py
+--------------------
+
+Tests for the reference ChaCha20 block function in chacha_core.py,
+using the worked examples from RFC 8439.
+
+"""
+
+import pytest
+
+import chacha_core
+
+RFC_KEY = bytes(range(32))
+RFC_NONCE = bytes.fromhex("000000090000004a00000000")
+
+
+def test_quarterround_rfc_2_1_1():
+    out = chacha_core._chacha_quarterround(0x11111111, 0x01020304, 0x9b8d6f43, 0x01234567)
+    assert out == (0xea2a92f4, 0xcb1cf8ce, 0x4581472e, 0x5881c4bb)
+
+
+def test_initial_state_layout_rfc_2_3_2():
+    s = chacha_core._initial_state_chacha20(RFC_KEY, RFC_NONCE, 1)
+    assert s[:4] == [0x61707865, 0x3320646e, 0x79622d32, 0x6b206574]
+    assert s[4] == 0x03020100 and s[11] == 0x1f1e1d1c
+    assert s[12:] == [0x00000001, 0x09000000, 0x4a000000, 0x00000000]
+
+
+def test_block_rfc_2_3_2():
+    ks = chacha_core.chacha20_block(RFC_KEY, RFC_NONCE, 1)
+    assert ks[:16] == bytes.fromhex("10f1e7e4d13b5915500fdd1fa32071c4")
+    assert ks[-16:] == bytes.fromhex("b5129cd1de164eb9cbd083e8a2503c4e")
+
+
+def test_doubleround_returns_new_list():
+    s = chacha_core._initial_state_chacha20(RFC_KEY, RFC_NONCE, 0)
+    before = s[:]
+    assert chacha_core._chacha_doubleround(s) != before
+    assert s == before
+
+
+def test_rejects_bad_inputs():
+    with pytest.raises(ValueError):
+        chacha_core._initial_state_chacha20(RFC_KEY, bytes(8), 0)
+    with pytest.raises(ValueError):
+        chacha_core._initial_state_chacha20(bytes(16), RFC_NONCE, 0)
+    with pytest.raises(ValueError):
+        chacha_core.chacha20_block(RFC_KEY, RFC_NONCE, 2**32)
+    with pytest.raises(ValueError):
+        chacha_core.chacha20_block(RFC_KEY, RFC_NONCE, 0, rounds=7)
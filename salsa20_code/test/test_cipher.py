@@ -0,0 +1,116 @@
+"""
+test_cipher.py
+---------------
+
+Tests for the reusable Salsa20 context in cipher.py.
+
+"""
+
+import pytest
+
+import backends, core, cipher, vectorized
+
+KEY = bytes(range(32))
+NONCE = b"\x11\x22\x33\x44\x55\x66\x77\x88"
+
+
+def test_context_rejects_bad_lengths():
+    with pytest.raises(ValueError):
+        cipher.Salsa20(b"\x00" * 31, NONCE)
+    with pytest.raises(ValueError):
+        cipher.Salsa20(KEY, b"\x00" * 7)
+
+
+def test_state_matches_initial_state():
+    ctx = cipher.Salsa20(KEY, NONCE)
+    for ctr in (0, 1, 0xffffffff, 0x1122334455667788, 2**64 - 1):
+        assert ctx.state(ctr) == core._initial_state_256(KEY, NONCE, ctr)
+
+
+def test_block_and_blocks_match_core():
+    ctx = cipher.Salsa20(KEY, NONCE)
+    assert ctx.block(5) == core.salsa20_block(KEY, NONCE, 5)
+    assert ctx.blocks(3, 4) == b"".join(core.salsa20_block(KEY, NONCE, c) for c in range(3, 7))
+    assert ctx.blocks(0, 0) == b""
+
+
+def test_estream_vector_256bit_set1_vector0():
+    # eSTREAM Salsa20/20, 256-bit key, Set 1 vector 0, stream[0..63]
+    key = b"\x80" + b"\x00" * 31
+    ctx = cipher.Salsa20(key, b"\x00" * 8)
+    assert ctx.block(0).hex() == (
+        "e3be8fdd8beca2e3ea8ef9475b29a6e7003951e1097a5c38d23b7a5fad9f6844"
+        "b22c97559e2723c7cbbd3fe4fc8d9a0744652a83e72a9c461876af4d7ef1a117"
+    )
+
+
+def test_stream_xor_roundtrip_and_seek():
+    ctx = cipher.Salsa20(KEY, NONCE)
+    msg = bytes(range(256)) * 3
+    ct = ctx.stream_xor(msg)
+    assert ctx.stream_xor(ct) == msg
+    assert ctx.stream_xor(msg[128:], initial_block=2) == ct[128:]
+
+
+def test_stream_xor_batches_match_per_block_xor(monkeypatch):
+    monkeypatch.setattr(vectorized, "AVAILABLE", False)
+    ctx = cipher.Salsa20(KEY, NONCE)
+    for n in (0, 1, 63, 64, 65, 64 * backends.XOR_BATCH_BLOCKS + 7):
+        data = bytes(i & 0xff for i in range(n))
+        ks = ctx.blocks(1, (n + 63) // 64)
+        assert ctx.stream_xor(data, initial_block=1) == bytes(d ^ k for d, k in zip(data, ks))
+
+
+def test_keystream_at_unaligned():
+    ctx = cipher.Salsa20(KEY, NONCE)
+    full = ctx.blocks(0, 6)
+    for offset, length in ((0, 64), (5, 10), (60, 10), (63, 130), (128, 0), (100, 284)):
+        assert ctx.keystream_at(offset, length) == full[offset:offset + length]
+
+
+def test_decrypt_range_matches_full_decrypt():
+    ctx = cipher.Salsa20(KEY, NONCE)
+    msg = bytes(range(256)) * 12
+    ct = ctx.stream_xor(msg)
+    for offset, length in ((0, 1), (10, 50), (63, 2), (64, 64), (1000, 2000), (3000, 72), (3070, 2)):
+        assert ctx.decrypt_range(ct, offset, length) == msg[offset:offset + length]
+
+
+def test_xor_at_far_offset_only_uses_overlapping_blocks():
+    ctx = cipher.Salsa20(KEY, NONCE)
+    offset = 10_000_000
+    first = offset // 64
+    expected_ks = ctx.blocks(first, 3)[offset % 64:offset % 64 + 100]
+    data = b"\x00" * 100
+    assert ctx.xor_at(data, offset) == expected_ks
+
+
+def test_range_rejects_negative():
+    ctx = cipher.Salsa20(KEY, NONCE)
+    with pytest.raises(ValueError):
+        ctx.keystream_at(-1, 4)
+    with pytest.raises(ValueError):
+        ctx.decrypt_range(b"abc", 0, -1)
+
+
+def test_decrypt_range_rejects_ranges_past_the_end():
+    ctx = cipher.Salsa20(KEY, NONCE)
+    ct = ctx.stream_xor(bytes(100))
+    assert ctx.decrypt_range(ct, 90, 10) == bytes(10)
+    assert ctx.decrypt_range(ct, 100, 0) == b""
+    with pytest.raises(ValueError):
+        ctx.decrypt_range(ct, 90, 11)       # runs past the end
+    with pytest.raises(ValueError):
+        ctx.decrypt_range(ct, 200, 1)       # starts beyond EOF
+
+
+@pytest.mark.parametrize("rounds", [0, 7, -2, 20.0])
+def test_context_rejects_bad_round_counts(rounds):
+    with pytest.raises(ValueError):
+        cipher.Salsa20(KEY, NONCE, rounds=rounds)
+
+
+def test_reduced_round_context_matches_core():
+    ctx = cipher.Salsa20(KEY, NONCE, rounds=12)
+    assert ctx.block(5) == core.salsa20_block(KEY, NONCE, 5, rounds=12)
+    assert ctx.block(5) != core.salsa20_block(KEY, NONCE, 5)
@@ -0,0 +1,92 @@
+"""
+test_cli.py
+------------
+
+Tests for the batch command line in cli.py.
+
+"""
+
+import os
+import subprocess
+import sys
+
+import pytest
+
+import chacha20, cli, stream, xsalsa20
+
+KEY = bytes(range(32))
+NONCE = bytes(range(8))
+HERE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture
+def keys(tmp_path, monkeypatch):
+    (tmp_path / "key.bin").write_bytes(KEY)
+    monkeypatch.setenv("SALSA20_NONCE", NONCE.hex())
+    return str(tmp_path / "key.bin")
+
+
+def test_encrypt_decrypt_files(tmp_path, keys):
+    data = os.urandom(3 * 64 * 5 + 17)
+    (tmp_path / "pt").write_bytes(data)
+    # A chunk that is not a whole number of reads still keeps the counter aligned
+    assert cli.main(["encrypt", "--key-file", keys, "-i", str(tmp_path / "pt"),
+                     "-o", str(tmp_path / "ct"), "--chunk", "192"]) == 0
+    assert (tmp_path / "ct").read_bytes() == stream.salsa20_stream_xor(KEY, NONCE, data)
+    assert cli.main(["decrypt", "--key-file", keys, "-i", str(tmp_path / "ct"),
+                     "-o", str(tmp_path / "back")]) == 0
+    assert (tmp_path / "back").read_bytes() == data
+
+
+def test_keystream_and_options(tmp_path, keys, monkeypatch):
+    out = str(tmp_path / "ks")
+    assert cli.main(["keystream", "--key-file", keys, "--length", "100",
+                     "--initial-block", "3", "--rounds", "12", "-o", out]) == 0
+    expected = stream.salsa20_stream_xor(KEY, NONCE, bytes(100), initial_block=3, rounds=12)
+    assert open(out, "rb").read() == expected
+
+    # Hex key file, a 12-byte nonce from another variable, ChaCha20
+    (tmp_path / "key.hex").write_text(KEY.hex() + "\n")
+    monkeypatch.setenv("CHACHA_NONCE", bytes(12).hex())
+    assert cli.main(["keystream", "--cipher", "chacha20", "--key-file", str(tmp_path / "key.hex"),
+                     "--nonce-env", "CHACHA_NONCE", "--length", "64", "-o", out]) == 0
+    assert open(out, "rb").read() == chacha20.ChaCha20(KEY, bytes(12)).blocks(0, 1)
+
+    monkeypatch.setenv("SALSA20_KEY", KEY.hex())
+    (tmp_path / "n24").write_bytes(bytes(24))
+    assert cli.main(["keystream", "--cipher", "xsalsa20", "--nonce-file", str(tmp_path / "n24"),
+                     "--length", "64", "-o", out]) == 0
+    assert open(out, "rb").read() == xsalsa20.xsalsa20_stream_xor(KEY, bytes(24), bytes(64))
+
+
+def test_rejects_bad_secrets(tmp_path, keys, monkeypatch):
+    monkeypatch.delenv("SALSA20_KEY", raising=False)
+    for argv in (["keystream", "--length", "1"],                          # no key at all
+                 ["keystream", "--key-file", keys, "--cipher", "chacha20", "--length", "1"],
+                 ["encrypt", "--key-file", keys, "--chunk", "100"]):
+        with pytest.raises(SystemExit) as e:
+            cli.main(argv)
+        assert e.value.code == 2
+    with pytest.raises(ValueError):
+        cli.load_secret(None, "SALSA20_NONCE", 24, "nonce")
+
+
+def test_pipes_without_demo_imports(tmp_path):
+    env = dict(os.environ, SALSA20_KEY=KEY.hex(), SALSA20_NONCE=NONCE.hex())
+    data = os.urandom(200_000)
+    run = subprocess.run([sys.executable, "cli.py", "encrypt"], input=data, cwd=HERE,
+                         env=env, capture_output=True, check=True)
+    assert run.stdout == stream.salsa20_stream_xor(KEY, NONCE, data)
+
+    code = "import sys, cli; print(sorted({'main', 'history', 'tracer', 'bintrace'} & set(sys.modules)))"
+    run = subprocess.run([sys.executable, "-c", code], cwd=HERE, capture_output=True, text=True, check=True)
+    assert run.stdout.strip() == "[]"
+
+
+def test_help_does_not_load_the_engines():
+    code = ("import contextlib, io, sys, cli\n"
+            "with contextlib.suppress(SystemExit), contextlib.redirect_stdout(io.StringIO()):\n"
+            "    cli.main(['encrypt', '--help'])\n"
+            "print(sorted({'backends', 'cipher', 'numpy'} & set(sys.modules)))")
+    run = subprocess.run([sys.executable, "-c", code], cwd=HERE, capture_output=True, text=True, check=True)
+    assert run.stdout.strip() == "[]"
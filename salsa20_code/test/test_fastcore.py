@@ -0,0 +1,50 @@
+"""
+test_fastcore.py
+-----------------
+
+Tests that the allocation-free core in fastcore.py matches the
+reference functions in core.py.
+
+"""
+
+from array import array
+
+import chacha_core, core, fastcore
+
+KEY = bytes(range(32))
+NONCE = b"\x00" * 8
+
+
+def test_hash_into_matches_reference():
+    for ctr in (0, 1, 0xffffffff, 2**64 - 1):
+        state = core._initial_state_256(KEY, NONCE, ctr)
+        out = bytearray(64)
+        fastcore.salsa20_hash_into(state, out)
+        assert bytes(out) == core._salsa20_hash(state)
+
+
+def test_hash_into_leaves_state_untouched_and_honours_offset():
+    state = array("I", core._initial_state_256(KEY, NONCE, 7))
+    before = state.tolist()
+    out = bytearray(b"\xaa" * 80)
+    fastcore.salsa20_hash_into(state, out, 8)
+    assert state.tolist() == before
+    assert out[:8] == b"\xaa" * 8 and out[72:] == b"\xaa" * 8
+    assert bytes(out[8:72]) == core._salsa20_hash(before)
+
+
+def test_blocks_into_wraps_counter():
+    state = array("I", core._initial_state_256(KEY, NONCE, 0))
+    out = bytearray(64 * 3)
+    fastcore.salsa20_blocks_into(state, 2**64 - 2, 3, out)
+    assert bytes(out) == b"".join(core.salsa20_block(KEY, NONCE, c) for c in (2**64 - 2, 2**64 - 1, 0))
+
+
+def test_chacha20_blocks_into_matches_reference():
+    nonce = bytes(range(12))
+    state = array("I", chacha_core._initial_state_chacha20(KEY, nonce, 0))
+    for rounds in (20, 8):
+        out = bytearray(64 * 3)
+        fastcore.chacha20_blocks_into(state, 2**32 - 3, 3, out, rounds=rounds)
+        assert bytes(out) == b"".join(chacha_core.chacha20_block(KEY, nonce, c, rounds)
+                                      for c in range(2**32 - 3, 2**32))
@@ -0,0 +1,56 @@
+"""
+test_fileio.py
+---------------
+
+Tests for memory-mapped file encryption in fileio.py.
+
+"""
+
+import mmap
+
+import pytest
+
+import fileio, stream
+
+KEY = bytes(range(32))
+NONCE = b"\x33" * 8
+WINDOW = max(64, mmap.ALLOCATIONGRANULARITY)
+
+
+@pytest.mark.parametrize("size", [0, 1, 100, WINDOW, 3 * WINDOW + 17])
+def test_file_to_file_matches_stream_xor(tmp_path, size):
+    data = bytes((i * 7) & 0xff for i in range(size))
+    src, dst = tmp_path / "plain", tmp_path / "cipher"
+    src.write_bytes(data)
+    assert fileio.salsa20_xor_file(KEY, NONCE, str(src), str(dst), window=WINDOW) == size
+    assert dst.read_bytes() == stream.salsa20_stream_xor(KEY, NONCE, data)
+    assert src.read_bytes() == data
+
+
+def test_in_place_roundtrip(tmp_path):
+    data = bytes(range(256)) * (WINDOW // 128 + 3)
+    path = tmp_path / "blob"
+    path.write_bytes(data)
+    fileio.salsa20_xor_file(KEY, NONCE, str(path), window=WINDOW, initial_block=2)
+    assert path.read_bytes() == stream.salsa20_stream_xor(KEY, NONCE, data, initial_block=2)
+    fileio.salsa20_xor_file(KEY, NONCE, str(path), window=WINDOW, initial_block=2)
+    assert path.read_bytes() == data
+
+
+def test_bad_window_rejected(tmp_path):
+    path = tmp_path / "blob"
+    path.write_bytes(b"x")
+    with pytest.raises(ValueError):
+        fileio.salsa20_xor_file(KEY, NONCE, str(path), window=100)
+
+
+def test_misaligned_start_rejected(tmp_path):
+    path = tmp_path / "blob"
+    path.write_bytes(bytes(2 * WINDOW))
+    ctx = fileio.Salsa20(KEY, NONCE)
+    with open(path, "r+b") as f:
+        for start in (64, WINDOW + 1, -WINDOW):
+            with pytest.raises(ValueError):
+                fileio.xor_mapped_range(ctx, f.fileno(), f.fileno(), start, 2 * WINDOW, window=WINDOW)
+        fileio.xor_mapped_range(ctx, f.fileno(), f.fileno(), WINDOW, 2 * WINDOW, window=WINDOW)
+    assert path.read_bytes()[WINDOW:] == stream.salsa20_stream_xor(KEY, NONCE, bytes(2 * WINDOW))[WINDOW:]
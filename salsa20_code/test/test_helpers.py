@@ -99,3 +99,11 @@ def test_u32_to_le_bytes():
 
     val2 = helpers._u32_to_le_bytes(w)
     assert val2 == b"iH\x00\x00" # little endian 4 bytes 
+
+def test_xor_bytes():
+    a = bytes(range(100))
+    b = bytes(reversed(range(100)))
+    assert helpers._xor_bytes(a, b) == bytes(x ^ y for x, y in zip(a, b))
+    # Leading zero bytes in the result must survive the int round-trip
+    assert helpers._xor_bytes(b"\x01\x02", b"\x01\x02") == b"\x00\x00"
+    assert helpers._xor_bytes(b"", b"") == b""
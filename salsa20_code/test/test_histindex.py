@@ -0,0 +1,155 @@
+"""
+test_histindex.py
+------------------
+
+Tests for the sidecar history index and its queries in histindex.py.
+
+"""
+
+import json
+
+import pytest
+
+import histindex
+import history
+
+
+def _record(i, op="encrypt", nonce=None):
+    return {
+        "timestamp": f"2026-01-01T00:00:{i:02d}",
+        "op": op,
+        "key": f"{i % 3:02x}" * 32,
+        "nonce": nonce or f"{i:016x}",
+        "i": i,
+    }
+
+
+def _write(path, n):
+    with history.HistoryWriter(str(path)) as w:
+        for i in range(n):
+            w.append(_record(i, "encrypt" if i % 2 == 0 else "decrypt", "aa" * 8 if i % 5 == 0 else None))
+
+
+def test_writer_keeps_index_current(tmp_path):
+    path = tmp_path / "history.log"
+    _write(path, 20)
+    idx = histindex.HistoryIndex(str(path))
+    assert len(idx) == 20 and idx.end == path.stat().st_size
+
+    # Every indexed offset points at the start of its own line
+    raw = path.read_bytes()
+    for i in range(len(idx)):
+        line = raw[idx._offsets[i]: idx._offsets[i] + idx._lengths[i]]
+        assert json.loads(line)["i"] == i
+
+    with history.HistoryWriter(str(path)) as w:
+        assert w.index is not None and len(w.index) == 20
+        w.append(_record(20))
+        assert len(w.index) == 21
+    assert histindex.HistoryIndex(str(path)).end == path.stat().st_size
+
+
+def test_queries(tmp_path):
+    path = tmp_path / "history.log"
+    _write(path, 20)
+    idx = histindex.HistoryIndex(str(path))
+
+    assert [r["i"] for r in idx.query(nonce="aa" * 8)] == [0, 5, 10, 15]
+    assert [r["i"] for r in idx.query(nonce="AA" * 8, op="decrypt")] == [5, 15]
+    assert [r["i"] for r in idx.query(key="01" * 32)] == [1, 4, 7, 10, 13, 16, 19]
+
+    last = idx.query(op="encrypt", since="2026-01-01T00:00:05", newest_first=True, limit=3)
+    assert [r["i"] for r in last] == [18, 16, 14]
+    until = idx.query(until="2026-01-01T00:00:02")
+    assert [r["i"] for r in until] == [0, 1, 2]
+
+    assert idx.count(op="encrypt") == 10
+    assert idx.count(nonce="ff" * 8) == 0
+    assert list(idx.query(op="rekey")) == []
+    assert list(idx.query(limit=0)) == []
+
+
+def test_query_reads_only_matches(tmp_path, monkeypatch):
+    path = tmp_path / "history.log"
+    _write(path, 50)
+    idx = histindex.HistoryIndex(str(path))
+    parsed = []
+    real_loads = histindex.json.loads
+    monkeypatch.setattr(histindex.json, "loads", lambda b: parsed.append(b) or real_loads(b))
+    assert [r["i"] for r in idx.query(nonce="aa" * 8, newest_first=True, limit=2)] == [45, 40]
+    assert len(parsed) == 2
+
+
+def test_pages(tmp_path):
+    path = tmp_path / "history.log"
+    _write(path, 12)
+    idx = histindex.HistoryIndex(str(path))
+    assert [r["i"] for r in idx.page(0, 5)] == [11, 10, 9, 8, 7]
+    assert [r["i"] for r in idx.page(2, 5)] == [1, 0]
+    assert idx.page(3, 5) == []
+    assert [r["i"] for r in idx.page(1, 3, newest_first=False, op="encrypt")] == [6, 8, 10]
+    with pytest.raises(ValueError):
+        idx.page(0, 0)
+
+
+def test_catches_up_and_rebuilds(tmp_path):
+    path = tmp_path / "history.log"
+    # A log written without the index is indexed on first load
+    with history.HistoryWriter(str(path), index=False) as w:
+        for i in range(6):
+            w.append(_record(i))
+        assert w.index is None
+    idx = histindex.HistoryIndex(str(path))
+    assert len(idx) == 6
+
+    # Records appended behind the index's back are picked up by refresh()
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(json.dumps(_record(6)) + "\n")
+    idx.refresh()
+    assert [r["i"] for r in idx.query(newest_first=True, limit=1)] == [6]
+
+    # A truncated log invalidates the index; it is rebuilt from the log
+    lines = path.read_bytes().splitlines(keepends=True)
+    path.write_bytes(b"".join(lines[:3]))
+    idx = histindex.HistoryIndex(str(path))
+    assert [r["i"] for r in idx.query()] == [0, 1, 2]
+
+    # So is a damaged index file
+    (tmp_path / "history.log.idx").write_text("garbage\n")
+    assert len(histindex.HistoryIndex(str(path))) == 3
+
+
+def test_pages_read_only_their_records(tmp_path, monkeypatch):
+    path = tmp_path / "history.log"
+    _write(path, 100)
+    idx = histindex.HistoryIndex(str(path))
+    parsed = []
+    real_loads = histindex.json.loads
+    monkeypatch.setattr(histindex.json, "loads", lambda b: parsed.append(b) or real_loads(b))
+    assert [r["i"] for r in idx.page(15, 5)] == [24, 23, 22, 21, 20]
+    assert len(parsed) == 5
+    assert [r["i"] for r in idx.query(op="decrypt", skip=3, limit=2)] == [7, 9]
+
+
+def test_skips_damaged_lines(tmp_path):
+    path = tmp_path / "history.log"
+    # A crash mid-write leaves a torn line; the writer appends after it
+    lines = [json.dumps(_record(i)) + "\n" for i in range(4)]
+    lines.insert(2, '{"timestamp": "2026-01-01T00:00:01", "op": "enc\n')
+    lines.insert(4, "not json\n")
+    path.write_text("".join(lines))
+    idx = histindex.HistoryIndex(str(path))
+    assert len(idx) == 4 and idx.count() == 4
+    assert [r["i"] for r in idx.query()] == [0, 1, 2, 3]
+    assert [r["i"] for r in idx.page(0, 3)] == [3, 2, 1]
+    assert [r["i"] for r in idx.page(1, 3)] == [0]
+    with history.HistoryWriter(str(path)) as w:
+        w.append(_record(4))
+    idx.refresh()
+    assert [r["i"] for r in idx.query(newest_first=True, limit=2)] == [4, 3]
+
+    # A record damaged after it was indexed is skipped when read
+    data = path.read_bytes()
+    start = data.index(lines[1].encode())
+    path.write_bytes(data[:start] + b"x" * (len(lines[1]) - 1) + data[start + len(lines[1]) - 1:])
+    assert [r["i"] for r in histindex.HistoryIndex(str(path)).query()] == [0, 2, 3, 4]
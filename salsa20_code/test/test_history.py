@@ -0,0 +1,89 @@
+"""
+test_history.py
+----------------
+
+Tests for the append-only history writer in history.py.
+
+"""
+
+import json
+import os
+
+import pytest
+
+import history
+
+
+def _lines(path):
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f]
+
+
+def test_appends_each_record_once(tmp_path):
+    path = tmp_path / "logs" / "history.log"
+    w = history.HistoryWriter(str(path))
+    for i in range(5):
+        w.append({"op": "encrypt", "i": i})
+        w.flush()
+    w.close()
+    w.close()
+    assert [r["i"] for r in _lines(path)] == list(range(5))
+
+    # A later session appends after the existing records
+    with history.HistoryWriter(str(path)) as w2:
+        w2.append({"op": "decrypt", "i": 5})
+    assert [r["i"] for r in _lines(path)] == list(range(6))
+
+
+def test_window_is_bounded(tmp_path):
+    w = history.HistoryWriter(str(tmp_path / "h.log"), window=3)
+    assert w.last() is None and w.recent() == []
+    for i in range(10):
+        w.append({"i": i})
+    assert [r["i"] for r in w.recent()] == [7, 8, 9]
+    assert w.last() == {"i": 9}
+    assert w.written == 10
+    w.close()
+    assert len(_lines(tmp_path / "h.log")) == 10
+
+
+def test_flush_every_batches_writes(tmp_path):
+    path = tmp_path / "h.log"
+    w = history.HistoryWriter(str(path), flush_every=3)
+    w.append({"i": 0})
+    w.append({"i": 1})
+    assert w.pending == 2 and path.stat().st_size == 0
+    w.append({"i": 2})
+    assert w.pending == 0 and w.persisted == 3
+    assert len(_lines(path)) == 3
+    w.close()
+
+
+def test_flush_interval(tmp_path, monkeypatch):
+    clock = [100.0]
+    monkeypatch.setattr(history.time, "monotonic", lambda: clock[0])
+    w = history.HistoryWriter(str(tmp_path / "h.log"), flush_every=0, flush_interval=5)
+    w.append({"i": 0})
+    assert w.pending == 1
+    clock[0] += 6
+    w.append({"i": 1})
+    assert w.pending == 0
+    w.close()
+
+
+def test_fsync_policy(tmp_path, monkeypatch):
+    calls = []
+    monkeypatch.setattr(history.os, "fsync", lambda fd: calls.append(fd))
+    w = history.HistoryWriter(str(tmp_path / "h.log"), fsync=True)
+    w.append({"i": 0})
+    w.append({"i": 1})
+    w.close()
+    assert len(calls) == 2
+
+
+def test_rejects_bad_policy(tmp_path):
+    with pytest.raises(ValueError):
+        history.HistoryWriter(str(tmp_path / "h.log"), window=-1)
+    with pytest.raises(ValueError):
+        history.HistoryWriter(str(tmp_path / "h.log"), flush_interval=0)
+    assert not os.path.exists(tmp_path / "h.log")
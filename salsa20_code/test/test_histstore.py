@@ -0,0 +1,202 @@
+"""
+test_histstore.py
+------------------
+
+Tests for history log rotation, compressed segments and cross-segment
+queries (histstore.py and HistoryWriter's rotation options).
+
+"""
+
+import gzip
+import os
+
+import pytest
+
+import histindex
+import histstore
+import history
+
+
+def _record(i, op="encrypt"):
+    return {
+        "timestamp": f"2026-01-01T00:{i // 60:02d}:{i % 60:02d}",
+        "op": op,
+        "key": "11" * 32,
+        "nonce": f"{i % 4:016x}",
+        "plaintext": "x" * 40,
+        "i": i,
+    }
+
+
+def _fill(path, n, **kw):
+    with history.HistoryWriter(str(path), **kw) as w:
+        for i in range(n):
+            w.append(_record(i, "encrypt" if i % 2 == 0 else "decrypt"))
+    return w
+
+
+def test_rotates_by_size_and_compresses(tmp_path):
+    path = tmp_path / "history.log"
+    _fill(path, 40, max_bytes=1000)
+    manifest = histstore.load_manifest(str(path))
+    segments = manifest["segments"]
+    assert len(segments) > 2
+    assert all(seg["compressed"] and seg["file"].endswith(".gz") for seg in segments)
+    for seg in segments:
+        assert seg["bytes"] >= 1000
+        assert not os.path.exists(tmp_path / seg["name"])
+        assert os.path.exists(tmp_path / seg["file"])
+        assert os.path.exists(tmp_path / (seg["name"] + ".idx"))
+    assert segments[0]["first"] == _record(0)["timestamp"]
+    assert [seg["seq"] for seg in segments] == list(range(1, len(segments) + 1))
+
+    # Every record is still there exactly once, in order, across segments
+    log = histstore.HistoryLog(str(path))
+    assert len(log) == 40
+    assert [r["i"] for r in log.query()] == list(range(40))
+    assert [r["i"] for r in log.query(newest_first=True, limit=3)] == [39, 38, 37]
+    assert log.count(nonce=f"{1:016x}") == 10
+    assert [r["i"] for r in log.query(op="encrypt", nonce=f"{2:016x}")] == list(range(2, 40, 4))
+    assert [r["i"] for r in log.page(1, 5)] == [34, 33, 32, 31, 30]
+
+
+def test_queries_decompress_only_needed_segments(tmp_path, monkeypatch):
+    path = tmp_path / "history.log"
+    _fill(path, 40, max_bytes=1000)
+    log = histstore.HistoryLog(str(path))
+    opened = []
+    real_open = histindex.gzip.open
+    monkeypatch.setattr(histindex.gzip, "open", lambda f, *a: opened.append(f) or real_open(f, *a))
+
+    # The newest records are in the active log: nothing to decompress
+    list(log.query(newest_first=True, limit=2))
+    assert opened == []
+
+    # A time range inside the first segment touches only that segment
+    first = log.segments[0]
+    assert [r["i"] for r in log.query(since=first["first"], until=first["first"])] == [0]
+    assert [os.path.basename(f) for f in opened] == [first["file"]]
+
+    # A nonce that was never used is rejected by the indexes alone
+    opened.clear()
+    assert list(log.query(nonce="ff" * 8)) == []
+    assert opened == []
+
+
+def test_keep_bounds_segments(tmp_path):
+    path = tmp_path / "history.log"
+    _fill(path, 60, max_bytes=800, keep=2)
+    segments = histstore.load_manifest(str(path))["segments"]
+    assert len(segments) == 2
+    names = {seg["file"] for seg in segments} | {seg["name"] + ".idx" for seg in segments}
+    on_disk = {f for f in os.listdir(tmp_path) if ".log." in f and "manifest" not in f}
+    assert on_disk == names | {"history.log.idx"}
+
+    # Queries see only what is kept, ending with the newest record
+    records = list(histstore.HistoryLog(str(path)).query())
+    assert records[-1]["i"] == 59 and records[0]["i"] > 0
+
+
+def test_rotates_by_age(tmp_path, monkeypatch):
+    clock = [1000.0]
+    monkeypatch.setattr(history.time, "time", lambda: clock[0])
+    path = tmp_path / "history.log"
+    w = history.HistoryWriter(str(path), max_age=60, compress=False)
+    w.append(_record(0))
+    clock[0] += 30
+    w.append(_record(1))
+    assert histstore.load_manifest(str(path))["segments"] == []
+    w.close()
+
+    # The segment's start time is kept across writers
+    clock[0] += 31
+    w = history.HistoryWriter(str(path), max_age=60, compress=False)
+    w.append(_record(2))
+    segments = histstore.load_manifest(str(path))["segments"]
+    assert len(segments) == 1 and segments[0]["records"] == 2
+    assert not segments[0]["compressed"]
+    assert [r["i"] for r in w.index.query()] == [0, 1, 2]
+    w.close()
+
+
+def test_manual_rotate_and_reader_refresh(tmp_path):
+    path = tmp_path / "history.log"
+    w = history.HistoryWriter(str(path))
+    assert w.rotate() is None
+    for i in range(3):
+        w.append(_record(i))
+    log = histstore.HistoryLog(str(path))
+    entry = w.rotate()
+    assert entry["records"] == 3 and entry["last"] == _record(2)["timestamp"]
+    w.append(_record(3))
+    w.close()
+
+    log.refresh()
+    assert [r["i"] for r in log.query()] == [0, 1, 2, 3]
+    seg, = histstore.load_manifest(str(path))["segments"]
+    with gzip.open(tmp_path / seg["file"]) as f:
+        assert len(f.read().splitlines()) == 3
+
+
+def test_segment_index_rebuilt_when_missing(tmp_path):
+    path = tmp_path / "history.log"
+    _fill(path, 30, max_bytes=1000)
+    seg = histstore.load_manifest(str(path))["segments"][0]
+    os.remove(tmp_path / (seg["name"] + ".idx"))
+    log = histstore.HistoryLog(str(path))
+    assert [r["i"] for r in log.query()] == list(range(30))
+    assert os.path.exists(tmp_path / (seg["name"] + ".idx"))
+
+
+def test_rejects_bad_rotation_policy(tmp_path):
+    with pytest.raises(ValueError):
+        history.HistoryWriter(str(tmp_path / "h.log"), max_bytes=0)
+    with pytest.raises(ValueError):
+        history.HistoryWriter(str(tmp_path / "h.log"), keep=-1)
+    with pytest.raises(ValueError):
+        history.HistoryWriter(str(tmp_path / "h.log"), max_age=10, index=False)
+
+
+def test_reader_follows_rotation_to_a_longer_log(tmp_path):
+    path = tmp_path / "history.log"
+    w = history.HistoryWriter(str(path), compress=False)
+    for i in range(3):
+        w.append(_record(i))
+    log = histstore.HistoryLog(str(path))
+    active = histindex.HistoryIndex(str(path))
+    old_end = log.active.end
+    w.rotate()
+    # Longer records than before, so the new log grows past the old end
+    for i in range(3, 9):
+        w.append(dict(_record(i), plaintext="y" * 97))
+    w.flush()
+    assert os.path.getsize(path) > old_end
+
+    log.refresh()
+    records = list(log.query())
+    assert [r["i"] for r in records] == list(range(9))
+    assert all(r["plaintext"] == "y" * 97 for r in records[3:])
+
+    # A bare index notices the replaced files too
+    active.refresh()
+    assert [r["i"] for r in active.query()] == list(range(3, 9))
+    w.close()
+
+
+def test_deep_pages_skip_whole_segments(tmp_path, monkeypatch):
+    path = tmp_path / "history.log"
+    _fill(path, 60, max_bytes=1000)
+    log = histstore.HistoryLog(str(path))
+    assert len(log.segments) > 3
+    parsed = []
+    real_loads = histindex.json.loads
+    monkeypatch.setattr(histindex.json, "loads", lambda b: parsed.append(b) or real_loads(b))
+    opened = []
+    real_open = histindex.gzip.open
+    monkeypatch.setattr(histindex.gzip, "open", lambda f, *a: opened.append(f) or real_open(f, *a))
+
+    assert [r["i"] for r in log.page(11, 5)] == [4, 3, 2, 1, 0]
+    assert len(parsed) == 5
+    assert [os.path.basename(f) for f in opened] == [log.segments[0]["file"]]
+    assert [r["i"] for r in log.page(2, 4, newest_first=False, op="encrypt")] == [16, 18, 20, 22]
+    assert log.page(12, 5) == []
@@ -0,0 +1,72 @@
+"""
+test_kscache.py
+----------------
+
+Tests for the LRU keystream cache and its hook into cipher.Salsa20.
+
+"""
+
+import pytest
+
+import cipher, kscache, stream
+
+KEY = bytes(range(32))
+NONCE = b"\x77" * 8
+
+
+def test_lru_eviction_and_counters():
+    c = kscache.KeystreamCache(max_bytes=2 * 64)
+    kid = kscache.key_id(KEY)
+    c.put(kid, NONCE, 0, b"a" * 64)
+    c.put(kid, NONCE, 1, b"b" * 64)
+    assert c.get(kid, NONCE, 0) == b"a" * 64     # 0 is now most recent
+    c.put(kid, NONCE, 2, b"c" * 64)              # evicts 1
+    assert c.get(kid, NONCE, 1) is None
+    st = c.stats()
+    assert (st["hits"], st["misses"], st["evictions"], st["blocks"]) == (1, 1, 1, 2)
+    assert st["bytes"] <= c.max_bytes
+    c.clear()
+    assert c.stats()["blocks"] == 0
+    with pytest.raises(ValueError):
+        kscache.KeystreamCache(max_bytes=10)
+
+
+def test_key_id_does_not_expose_key():
+    kid = kscache.key_id(KEY)
+    assert len(kid) == 16 and KEY not in kid
+    assert kid != kscache.key_id(bytes(32))
+    assert kid != kscache.key_id(KEY, rounds=12) != kscache.key_id(KEY, rounds=8)
+
+
+def test_cached_context_matches_uncached_and_hits_on_repeat():
+    plain = cipher.Salsa20(KEY, NONCE)
+    cache = kscache.KeystreamCache()
+    ctx = cipher.Salsa20(KEY, NONCE, cache=cache)
+    msg = bytes(range(256)) * 8
+    ct = plain.stream_xor(msg)
+
+    assert ctx.decrypt_range(ct, 100, 700) == msg[100:800]
+    misses = cache.stats()["misses"]
+    assert ctx.decrypt_range(ct, 150, 500) == msg[150:650]
+    st = cache.stats()
+    assert st["misses"] == misses and st["hits"] > 0
+
+    assert ctx.stream_xor(msg) == ct
+    assert ctx.blocks(3, 4) == plain.blocks(3, 4)
+    assert ctx.block(2) == plain.block(2)
+
+
+def test_cache_separates_keys_and_nonces():
+    cache = kscache.KeystreamCache()
+    a = cipher.Salsa20(KEY, NONCE, cache=cache)
+    b = cipher.Salsa20(KEY, b"\x78" * 8, cache=cache)
+    c = cipher.Salsa20(bytes(32), NONCE, cache=cache)
+    assert len({a.block(0), b.block(0), c.block(0)}) == 3
+
+
+def test_stream_range_api_uses_cache():
+    cache = kscache.KeystreamCache()
+    ct = stream.salsa20_stream_xor(KEY, NONCE, b"\x00" * 300, cache=cache)
+    assert cache.stats()["misses"] == 5
+    assert stream.salsa20_decrypt_range(KEY, NONCE, ct, 64, 128, cache=cache) == b"\x00" * 128
+    assert cache.stats()["hits"] == 2
@@ -0,0 +1,72 @@
+"""
+test_metrics.py
+----------------
+
+Tests for the opt-in performance counters in metrics.py.
+
+"""
+
+import pytest
+
+import chacha20, core, metrics, stream, tracer
+
+KEY = bytes(range(32))
+NONCE = b"\x05" * 8
+
+
+def test_disabled_collects_nothing():
+    metrics.reset()
+    assert not metrics.ENABLED
+    stream.salsa20_stream_xor(KEY, NONCE, bytes(500))
+    snap = metrics.snapshot()
+    assert snap["blocks_generated"] == {} and snap["bytes_xored"] == 0
+    assert all(p["calls"] == 0 for p in snap["phases"].values())
+
+
+@pytest.mark.parametrize("backend", ["reference", "fast", "numpy"])
+def test_counts_blocks_bytes_and_contexts(backend):
+    if backend == "numpy":
+        pytest.importorskip("numpy")
+    with metrics.recording():
+        stream.salsa20_stream_xor(KEY, NONCE, bytes(130), backend=backend)
+        chacha20.chacha20_stream_xor(KEY, bytes(12), bytes(64), backend=backend)
+    snap = metrics.snapshot()
+    assert not snap["enabled"]
+    assert snap["blocks_generated"] == {backend: 4}
+    assert snap["bytes_xored"] == 194
+    assert snap["contexts_created"] == {"chacha20": 1, "salsa20": 1}
+    assert snap["phases"]["keystream"]["calls"] >= 1
+    assert snap["phases"]["xor"]["seconds"] > 0
+
+
+def test_reference_block_phases():
+    with metrics.recording():
+        core.salsa20_block(KEY, NONCE, 0, tracer=tracer.RingBufferTracer())
+    phases = metrics.snapshot()["phases"]
+    for name in ("state_setup", "rounds", "serialize", "trace_write"):
+        assert phases[name]["calls"] == 1, name
+
+
+def test_recording_restores_state_and_reset():
+    metrics.enable()
+    try:
+        with metrics.recording():
+            pass
+        assert metrics.ENABLED
+    finally:
+        metrics.disable()
+    metrics.inc("bytes_xored", 5)
+    assert metrics.snapshot()["bytes_xored"] == 5
+    metrics.reset()
+    assert metrics.snapshot()["bytes_xored"] == 0
+
+
+def test_prometheus_text():
+    with metrics.recording():
+        stream.salsa20_stream_xor(KEY, NONCE, bytes(64), backend="fast")
+    text = metrics.prometheus_text()
+    assert "# TYPE salsa20_blocks_generated_total counter" in text
+    assert 'salsa20_blocks_generated_total{backend="fast"} 1' in text
+    assert "salsa20_bytes_xored_total 64" in text
+    assert 'salsa20_phase_calls_total{phase="keystream"} 1' in text
+    assert text.endswith("\n")
@@ -0,0 +1,65 @@
+"""
+test_parallel.py
+-----------------
+
+Tests for multi-process encryption in parallel.py.
+
+"""
+
+import mmap
+
+import pytest
+
+import backends, parallel, stream
+
+KEY = bytes(range(32))
+NONCE = b"\x44" * 8
+WINDOW = max(64, mmap.ALLOCATIONGRANULARITY)
+
+
+def test_segments_are_aligned_and_cover_input():
+    segs = parallel._segments(10_000, 3, 64, 100)
+    assert segs[0][0] == 0 and segs[-1][1] == 10_000
+    assert all(lo % 64 == 0 for lo, _ in segs)
+    assert all(a[1] == b[0] for a, b in zip(segs, segs[1:]))
+    assert parallel._segments(0, 4, 64, 100) == []
+
+
+def test_parallel_buffer_matches_serial():
+    data = bytes((i * 13) & 0xff for i in range(20_000 + 5))
+    expected = stream.salsa20_stream_xor(KEY, NONCE, data, initial_block=3)
+    got = parallel.parallel_stream_xor(KEY, NONCE, data, initial_block=3,
+                                       workers=2, min_segment=4096)
+    assert got == expected
+
+
+def test_parallel_file_in_place_and_to_dst(tmp_path):
+    data = bytes((i * 5) & 0xff for i in range(5 * WINDOW + 11))
+    expected = stream.salsa20_stream_xor(KEY, NONCE, data)
+
+    src, dst = tmp_path / "plain", tmp_path / "cipher"
+    src.write_bytes(data)
+    parallel.parallel_xor_file(KEY, NONCE, str(src), str(dst), workers=2,
+                               window=WINDOW, min_segment=WINDOW)
+    assert dst.read_bytes() == expected
+
+    parallel.parallel_xor_file(KEY, NONCE, str(src), workers=2,
+                               window=WINDOW, min_segment=WINDOW)
+    assert src.read_bytes() == expected
+
+
+def test_rejects_unregistered_backend_before_starting_workers(tmp_path):
+    class Private(backends.ReferenceBackend):
+        name = "private"
+
+    data = bytes(20_000)
+    with pytest.raises(ValueError, match="registered"):
+        parallel.parallel_stream_xor(KEY, NONCE, data, workers=2, backend=Private(),
+                                     min_segment=4096)
+    # An instance that shares a registered name but is not the registered one
+    with pytest.raises(ValueError, match="registered"):
+        parallel.parallel_stream_xor(KEY, NONCE, data, workers=2,
+                                     backend=backends.ReferenceBackend(), min_segment=4096)
+    # In-process runs use the instance directly
+    assert parallel.parallel_stream_xor(KEY, NONCE, data, workers=1, backend=Private()) == \
+        stream.salsa20_stream_xor(KEY, NONCE, data)
@@ -0,0 +1,79 @@
+"""
+test_stream.py
+---------------
+
+Tests for the high-level streaming API in stream.py.
+
+"""
+
+import random
+
+import pytest
+
+import stream
+
+KEY = bytes(range(32))
+NONCE = b"\x0a" * 8
+
+
+def test_decrypt_range_wrapper():
+    msg = bytes(range(200))
+    ct = stream.salsa20_stream_xor(KEY, NONCE, msg)
+    assert stream.salsa20_decrypt_range(KEY, NONCE, ct, 70, 60) == msg[70:130]
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_encryptor_random_chunks_match_one_shot(seed):
+    rng = random.Random(seed)
+    msg = bytes(rng.randrange(256) for _ in range(3000))
+    expected = stream.salsa20_stream_xor(KEY, NONCE, msg, initial_block=4)
+
+    enc = stream.Salsa20Encryptor(KEY, NONCE, initial_block=4)
+    out, i = [], 0
+    while i < len(msg):
+        n = rng.choice([0, 1, 7, 63, 64, 65, 200, 1500])
+        out.append(enc.update(msg[i:i + n]))
+        i += n
+    out.append(enc.finalize())
+    assert b"".join(out) == expected
+    assert enc.position == len(msg)
+
+
+def test_encryptor_rejects_update_after_finalize():
+    enc = stream.Salsa20Encryptor(KEY, NONCE)
+    enc.update(b"abc")
+    assert enc.finalize() == b""
+    with pytest.raises(ValueError):
+        enc.update(b"more")
+
+
+@pytest.mark.parametrize("backend", [None, "fast", "reference"])
+def test_stream_xor_into_buffer_types(backend):
+    msg = bytes(range(256)) * 6 + b"xyz"
+    expected = stream.salsa20_stream_xor(KEY, NONCE, msg, initial_block=2)
+
+    out = bytearray(len(msg))
+    assert stream.salsa20_stream_xor_into(KEY, NONCE, memoryview(msg), out, 2, backend) is out
+    assert out == expected
+
+    buf = bytearray(msg)
+    stream.salsa20_stream_xor_into(KEY, NONCE, buf, initial_block=2, backend=backend)
+    assert buf == expected
+
+
+def test_stream_xor_into_numpy_and_size_check():
+    np = pytest.importorskip("numpy")
+    msg = np.arange(2048, dtype=np.uint16)          # multi-byte items
+    raw = msg.tobytes()
+    out = np.zeros(len(raw), dtype=np.uint8)
+    stream.salsa20_stream_xor_into(KEY, NONCE, msg, out)
+    assert out.tobytes() == stream.salsa20_stream_xor(KEY, NONCE, raw)
+    with pytest.raises(ValueError):
+        stream.salsa20_stream_xor_into(KEY, NONCE, raw, bytearray(3))
+
+
+def test_encryptor_reduced_rounds_match_one_shot():
+    msg = bytes(range(256)) * 3
+    enc = stream.Salsa20Encryptor(KEY, NONCE, rounds=8)
+    out = enc.update(msg[:10]) + enc.update(msg[10:200]) + enc.update(msg[200:])
+    assert out == stream.salsa20_stream_xor(KEY, NONCE, msg, rounds=8)
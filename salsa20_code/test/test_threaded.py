@@ -0,0 +1,51 @@
+"""
+test_threaded.py
+-----------------
+
+Tests for thread-pool encryption in threaded.py.
+
+"""
+
+import threading
+
+import pytest
+
+import stream, threaded
+
+KEY = bytes(range(32))
+NONCE = b"\x55" * 8
+
+
+def test_scheduler_hands_out_each_range_once():
+    sched = threaded.RangeScheduler(1000, 128)
+    seen = []
+    lock = threading.Lock()
+
+    def drain():
+        while (r := sched.next_range()) is not None:
+            with lock:
+                seen.append(r)
+
+    ts = [threading.Thread(target=drain) for _ in range(4)]
+    for t in ts:
+        t.start()
+    for t in ts:
+        t.join()
+    assert sorted(seen) == [(lo, min(lo + 128, 1000)) for lo in range(0, 1000, 128)]
+    with pytest.raises(ValueError):
+        threaded.RangeScheduler(10, 100)
+
+
+@pytest.mark.parametrize("backend", [None, "fast"])
+def test_threaded_matches_serial(backend):
+    data = bytes((i * 3) & 0xff for i in range(10_000))
+    expected = stream.salsa20_stream_xor(KEY, NONCE, data, initial_block=1)
+    got = threaded.threaded_stream_xor(KEY, NONCE, data, initial_block=1,
+                                       threads=3, backend=backend, chunk=640)
+    assert got == expected
+
+
+def test_scaling_benchmark_shape():
+    rows = threaded.scaling_benchmark(max_threads=2, size=4096, backend="fast", repeat=1)
+    assert [r["threads"] for r in rows] == [1, 2]
+    assert rows[0]["speedup"] == 1.0
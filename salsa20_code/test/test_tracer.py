@@ -0,0 +1,122 @@
+"""
+test_tracer.py
+---------------
+
+Tests for the pluggable round tracers in tracer.py.
+
+"""
+
+import json
+
+import pytest
+
+import core, stream, tracer
+
+KEY = bytes(range(32))
+NONCE = b"\x00" * 8
+
+
+def test_untraced_output_unchanged():
+    data = b"A" * 200
+    traced = stream.salsa20_stream_xor(KEY, NONCE, data, tracer=tracer.RingBufferTracer())
+    assert traced == stream.salsa20_stream_xor(KEY, NONCE, data)
+
+
+def test_round_states_matches_core():
+    state = core._initial_state_256(KEY, NONCE, 0)
+    states = tracer.round_states(state)
+    assert len(states) == 11
+    assert states[0] == state
+    out = [(states[-1][i] + state[i]) & 0xffffffff for i in range(16)]
+    assert b"".join(w.to_bytes(4, "little") for w in out) == core._salsa20_hash(state)
+
+
+def test_reduced_round_trace():
+    ctx_state = core._initial_state_256(KEY, NONCE, 0)
+    t = tracer.RingBufferTracer()
+    ct = stream.salsa20_stream_xor(KEY, NONCE, b"x" * 64, tracer=t, rounds=8)
+    states = t.last()[1]
+    assert len(states) == 5
+    out = [(states[-1][i] + ctx_state[i]) & 0xffffffff for i in range(16)]
+    ks = b"".join(w.to_bytes(4, "little") for w in out)
+    assert bytes(a ^ b for a, b in zip(ct, ks)) == b"x" * 64
+
+
+def test_null_tracer_records_nothing():
+    t = tracer.NullTracer()
+    assert not t.wants(0)
+    assert core.salsa20_block(KEY, NONCE, 0, t) == core.salsa20_block(KEY, NONCE, 0)
+
+
+def test_ring_buffer_sampling_by_index_and_every():
+    t = tracer.RingBufferTracer(capacity=8, blocks={1, 3})
+    stream.salsa20_stream_xor(KEY, NONCE, b"x" * 64 * 5, tracer=t)
+    assert [c for c, _ in t.records] == [1, 3]
+
+    # every=2 counts from the first block of the call
+    t = tracer.RingBufferTracer(capacity=8, every=2)
+    stream.salsa20_stream_xor(KEY, NONCE, b"x" * 64 * 5, initial_block=7, tracer=t)
+    assert [c for c, _ in t.records] == [7, 9, 11]
+
+
+def test_ring_buffer_is_bounded():
+    t = tracer.RingBufferTracer(capacity=2)
+    stream.salsa20_stream_xor(KEY, NONCE, b"x" * 64 * 4, tracer=t)
+    assert [c for c, _ in t.records] == [2, 3]
+    assert t.last()[0] == 3
+
+
+def test_file_tracer_writes_header_for_last_message(tmp_path):
+    path = tmp_path / "trace.txt"
+    t = tracer.FileTracer(str(path), blocks={0})
+    stream.salsa20_stream_xor(KEY, NONCE, b"first", tracer=t)
+    stream.salsa20_stream_xor(KEY, b"\x01" * 8, b"second", tracer=t)
+    lines = path.read_text(encoding="utf-8").splitlines()
+    header = json.loads(lines[0])
+    assert header["initial_state"] == core._initial_state_256(KEY, b"\x01" * 8, 0)
+    assert sum(1 for line in lines if line.startswith("After doubleround")) == 10
+
+
+def test_file_tracer_truncates_for_untraced_message(tmp_path):
+    path = tmp_path / "trace.txt"
+    t = tracer.FileTracer(str(path), blocks={0})
+    stream.salsa20_stream_xor(KEY, NONCE, b"first", tracer=t)
+    assert path.stat().st_size > 0
+    stream.salsa20_stream_xor(KEY, NONCE, b"", tracer=t)
+    assert path.read_text(encoding="utf-8") == ""
+
+
+def test_tracer_is_abstract():
+    class Incomplete(tracer.Tracer):
+        pass
+
+    with pytest.raises(TypeError):
+        Incomplete()
+    with pytest.raises(TypeError):
+        tracer.Tracer()
+
+
+def test_counters_match_wants_without_asking_per_block():
+    t = tracer.RingBufferTracer(blocks={2, 5, 40, 1000}, every=7)
+    t.begin(3)
+    assert list(t.counters(3, 50)) == [c for c in range(3, 53) if t.wants(c)]
+    assert list(tracer.RingBufferTracer().counters(4, 3)) == [4, 5, 6]
+    assert list(tracer.NullTracer().counters(0, 100)) == []
+
+    calls = []
+
+    class Sampled(tracer.RingBufferTracer):
+        def wants(self, counter):
+            calls.append(counter)
+            return counter == 2
+
+    # A tracer that only overrides wants() is still asked block by block
+    t = Sampled()
+    stream.salsa20_stream_xor(KEY, NONCE, bytes(64 * 4), tracer=t)
+    assert calls == [0, 1, 2, 3] and [c for c, _ in t.records] == [2]
+
+    # The sampling tracers are not asked per block at all
+    t = tracer.RingBufferTracer(blocks={1})
+    t.wants = lambda counter: pytest.fail("wants() called per block")
+    stream.salsa20_stream_xor(KEY, NONCE, bytes(64 * 4), tracer=t)
+    assert [c for c, _ in t.records] == [1]
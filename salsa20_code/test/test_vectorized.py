@@ -0,0 +1,55 @@
+"""
+test_vectorized.py
+-------------------
+
+Tests for the optional NumPy engine in vectorized.py.
+Skipped when NumPy is not installed.
+
+"""
+
+import pytest
+
+pytest.importorskip("numpy")
+
+import chacha_core, core, cipher, tracer, vectorized
+
+KEY = bytes(range(32))
+NONCE = b"\x01\x02\x03\x04\x05\x06\x07\x08"
+
+
+@pytest.mark.parametrize("start", [0, 1, 0xfffffffe, 2**64 - 3])
+def test_blocks_match_reference_hash(start):
+    ctx = cipher.Salsa20(KEY, NONCE)
+    expected = b"".join(
+        core._salsa20_hash(core._initial_state_256(KEY, NONCE, (start + i) % 2**64))
+        for i in range(6)
+    )
+    assert vectorized.salsa20_blocks(ctx._template, start, 6) == expected
+
+
+def test_zero_blocks():
+    ctx = cipher.Salsa20(KEY, NONCE)
+    assert vectorized.salsa20_blocks(ctx._template, 0, 0) == b""
+
+
+def test_stream_xor_switches_to_numpy_and_matches(monkeypatch):
+    ctx = cipher.Salsa20(KEY, NONCE)
+    data = bytes(range(256)) * 9 + b"tail"   # not a multiple of 64
+    fast = ctx.stream_xor(data, initial_block=3)
+    monkeypatch.setattr(vectorized, "AVAILABLE", False)
+    assert ctx.stream_xor(data, initial_block=3) == fast
+
+
+def test_stream_xor_numpy_path_still_traces():
+    ctx = cipher.Salsa20(KEY, NONCE)
+    t = tracer.RingBufferTracer(blocks={2})
+    ctx.stream_xor(b"\x00" * 4096, tracer=t)
+    assert [c for c, _ in t.records] == [2]
+
+
+@pytest.mark.parametrize("rounds", [20, 12])
+def test_chacha20_blocks_match_reference(rounds):
+    nonce = bytes(range(12))
+    template = chacha_core._initial_state_chacha20(KEY, nonce, 0)
+    expected = b"".join(chacha_core.chacha20_block(KEY, nonce, c, rounds) for c in range(5, 10))
+    assert vectorized.chacha20_blocks(template, 5, 5, rounds) == expected
@@ -0,0 +1,52 @@
+"""
+test_xsalsa20.py
+-----------------
+
+Tests for HSalsa20 / XSalsa20 and the subkey cache in xsalsa20.py.
+
+"""
+
+import pytest
+
+import cipher, xsalsa20
+from vectors import HSALSA20_VECTORS, XSALSA20_VECTORS
+
+
+@pytest.mark.parametrize("v", HSALSA20_VECTORS, ids=lambda v: v["name"])
+def test_hsalsa20_vectors(v):
+    assert xsalsa20.hsalsa20(v["key"], v["nonce"]) == v["subkey"]
+
+
+@pytest.mark.parametrize("v", XSALSA20_VECTORS, ids=lambda v: v["name"])
+def test_xsalsa20_vectors(v):
+    n = len(v["keystream"])
+    assert xsalsa20.xsalsa20_stream_xor(v["key"], v["nonce"], bytes(n)) == v["keystream"]
+
+
+def test_xsalsa20_is_salsa20_on_subkey():
+    key, nonce = bytes(range(32)), bytes(range(24))
+    sub = xsalsa20.hsalsa20(key, nonce[:16])
+    ctx = xsalsa20.XSalsa20(key, nonce, subkeys=None)
+    assert ctx.blocks(0, 3) == cipher.Salsa20(sub, nonce[16:]).blocks(0, 3)
+    assert ctx.nonce == nonce
+
+
+def test_rejects_bad_lengths():
+    with pytest.raises(ValueError):
+        xsalsa20.XSalsa20(bytes(32), bytes(8))
+    with pytest.raises(ValueError):
+        xsalsa20.hsalsa20(bytes(31), bytes(16))
+
+
+def test_subkey_cache_hits_and_bound():
+    cache = xsalsa20.SubkeyCache(max_entries=2)
+    key = bytes(32)
+    prefix = b"p" * 16
+    a = xsalsa20.XSalsa20(key, prefix + b"\x00" * 8, subkeys=cache)
+    b = xsalsa20.XSalsa20(key, prefix + b"\x01" * 8, subkeys=cache)
+    assert cache.stats() == {"hits": 1, "misses": 1, "entries": 1}
+    assert a.block(0) != b.block(0)
+
+    for i in range(3):
+        cache.subkey(key, bytes([i]) * 16)
+    assert cache.stats()["entries"] == 2
@@ -2,6 +2,12 @@
 import pytest
 
 from salsa20 import (
+    _u32,
+    _rotl32,
+    _quarterround,
+    _rowround,
+    _columnround,
+    _doubleround,
     _u32_to_le_bytes,
     _le_bytes_to_u32,
     _salsa20_hash,
@@ -0,0 +1,183 @@
+"""
+vectors.py
+-----------
+
+Known-answer test vectors for Salsa20/20, Salsa20/12 and Salsa20/8
+(256-bit key), HSalsa20, XSalsa20 and ChaCha20 (RFC 8439).
+
+Each vector gives a key, an 8-byte nonce, a byte offset into the keystream
+and the expected keystream bytes at that offset. Reduced-round vectors
+carry a "rounds" entry; it is 20 when absent. They are used by
+`backends.verify_backend` and by the test suite.
+
+Sources:
+    1) Salsa20 specification, Section 10 (the Salsa20_k(n) expansion
+       example with k0 = 1..16, k1 = 201..216, n = 101..116)
+    2) eSTREAM verified test vectors, Salsa20/20 256-bit key,
+       Set 1, vector 0
+    3) eSTREAM Salsa20/12 and Salsa20/8 256-bit key, Set 1, vector 0,
+       cross-checked against libsodium's crypto_stream_salsa2012 and
+       crypto_stream_salsa208
+    4) NaCl test suite (tests/core1.c): HSalsa20 "firstkey"
+    5) XSalsa20 keystream, cross-checked against libsodium's
+       crypto_stream_xsalsa20
+    6) RFC 8439 Section 2.3.2 and Appendix A.1 ChaCha20 block function
+       vectors (12-byte nonce; offset = 64 * block counter), cross-checked
+       against libsodium's crypto_stream_chacha20_ietf
+"""
+
+SALSA20_VECTORS = [
+    {
+        "name": "spec-expansion-32",
+        "key": bytes(range(1, 17)) + bytes(range(201, 217)),
+        "nonce": bytes(range(101, 109)),
+        # n[8..15] = 109..116 is the little-endian block counter
+        "offset": 64 * int.from_bytes(bytes(range(109, 117)), "little"),
+        "keystream": bytes([
+            69, 37, 68, 39, 41, 15, 107, 193, 255, 139, 122, 6, 170, 233, 217, 98,
+            89, 144, 182, 106, 21, 51, 200, 65, 239, 49, 222, 34, 215, 114, 40, 126,
+            104, 197, 7, 225, 197, 153, 31, 2, 102, 78, 76, 176, 84, 245, 246, 184,
+            177, 160, 133, 130, 6, 72, 149, 119, 192, 195, 132, 236, 234, 103, 246, 74,
+        ]),
+    },
+    {
+        "name": "estream-256-set1-v0-0",
+        "key": b"\x80" + b"\x00" * 31,
+        "nonce": b"\x00" * 8,
+        "offset": 0,
+        "keystream": bytes.fromhex(
+            "e3be8fdd8beca2e3ea8ef9475b29a6e7003951e1097a5c38d23b7a5fad9f6844"
+            "b22c97559e2723c7cbbd3fe4fc8d9a0744652a83e72a9c461876af4d7ef1a117"
+        ),
+    },
+    {
+        "name": "estream-256-set1-v0-192",
+        "key": b"\x80" + b"\x00" * 31,
+        "nonce": b"\x00" * 8,
+        "offset": 192,
+        "keystream": bytes.fromhex(
+            "57be81f47b17d9ae7c4ff15429a73e10acf250ed3a90a93c711308a74c6216a9"
+            "ed84cd126da7f28e8abf8bb63517e1ca98e712f4fb2e1a6aed9fdc73291faa17"
+        ),
+    },
+    {
+        "name": "estream-256-set1-v0-448",
+        "key": b"\x80" + b"\x00" * 31,
+        "nonce": b"\x00" * 8,
+        "offset": 448,
+        "keystream": bytes.fromhex(
+            "696afcfd0cddcc83c7e77f11a649d79acdc3354e9635ff137e929933a0bd6f53"
+            "77efa105a3a4266b7c0d089d08f1e855cc32b15b93784a36e56a76cc64bc8477"
+        ),
+    },
+    {
+        "name": "estream-256-set1-v0-0-r12",
+        "key": b"\x80" + b"\x00" * 31,
+        "nonce": b"\x00" * 8,
+        "offset": 0,
+        "rounds": 12,
+        "keystream": bytes.fromhex(
+            "afe411ed1c4e07e4d0cde3b33e31ec190fa4cc796a58bafb848ead8d07d02cd2"
+            "d4b6f9f30cb0b57007e3733895cc8d1060107975acaeeb689b6cf614ab64a3d6"
+        ),
+    },
+    {
+        "name": "estream-256-set1-v0-448-r12",
+        "key": b"\x80" + b"\x00" * 31,
+        "nonce": b"\x00" * 8,
+        "offset": 448,
+        "rounds": 12,
+        "keystream": bytes.fromhex(
+            "87a5191ec2e3c9049fa524cd8673e0677c77adcf8ab5328fd828c4acb3eccca5"
+            "49adeda04872518ecdf874adcb2420c7bd1ccfe561b074080224fa7176f0cb5f"
+        ),
+    },
+    {
+        "name": "estream-256-set1-v0-0-r8",
+        "key": b"\x80" + b"\x00" * 31,
+        "nonce": b"\x00" * 8,
+        "offset": 0,
+        "rounds": 8,
+        "keystream": bytes.fromhex(
+            "b1f599e9b0d96df436ae31f5ef589565b92d245db5a1d4c7a78e5e8d0146f8a4"
+            "9d326c1a3bf50c052c9c8f114dc74972c4469591e31c9ed11927aa9871f38583"
+        ),
+    },
+    {
+        "name": "estream-256-set1-v0-448-r8",
+        "key": b"\x80" + b"\x00" * 31,
+        "nonce": b"\x00" * 8,
+        "offset": 448,
+        "rounds": 8,
+        "keystream": bytes.fromhex(
+            "53bf865c66a344cfcd19177476a05aca5851cc45224b196abf3206d899e7fe3b"
+            "13b3f028fa849b5564561a9181ea69e512bc34da29180cdf6811e40a9a06a8d1"
+        ),
+    },
+]
+
+HSALSA20_VECTORS = [
+    {
+        "name": "nacl-core1-firstkey",
+        "key": bytes.fromhex("4a5d9d5ba4ce2de1728e3bf480350f25e07e21c947d19e3376f09b3c1e161742"),
+        "nonce": b"\x00" * 16,
+        "subkey": bytes.fromhex("1b27556473e985d462cd51197a9a46c76009549eac6474f206c4ee0844f68389"),
+    },
+]
+
+XSALSA20_VECTORS = [
+    {
+        "name": "libsodium-xsalsa20-0",
+        "key": bytes(range(32)),
+        "nonce": bytes(range(100, 124)),
+        "offset": 0,
+        "keystream": bytes.fromhex(
+            "687dffe12afa5fef7e0feb195d6cd992f49572d6194281e3c87fbb4e2106932c"
+            "02b999c93ab6cee9b0fd23943784a3183eaa38a7e4a64b1ba60c42940a8bc988"
+        ),
+    },
+]
+
+
+CHACHA20_VECTORS = [
+    {
+        "name": "rfc8439-2.3.2",
+        "key": bytes(range(32)),
+        "nonce": bytes.fromhex("000000090000004a00000000"),
+        "offset": 64,
+        "keystream": bytes.fromhex(
+            "10f1e7e4d13b5915500fdd1fa32071c4c7d1f4c733c068030422aa9ac3d46c4e"
+            "d2826446079faa0914c2d705d98b02a2b5129cd1de164eb9cbd083e8a2503c4e"
+        ),
+    },
+    {
+        "name": "rfc8439-a1-1",
+        "key": b"\x00" * 32,
+        "nonce": b"\x00" * 12,
+        "offset": 0,
+        "keystream": bytes.fromhex(
+            "76b8e0ada0f13d90405d6ae55386bd28bdd219b8a08ded1aa836efcc8b770dc7"
+            "da41597c5157488d7724e03fb8d84a376a43b8f41518a11cc387b669b2ee6586"
+        ),
+    },
+    {
+        "name": "rfc8439-a1-4",
+        "key": b"\x00\xff" + b"\x00" * 30,
+        "nonce": b"\x00" * 12,
+        "offset": 128,
+        "keystream": bytes.fromhex(
+            "72d54dfbf12ec44b362692df94137f328fea8da73990265ec1bbbea1ae9af0ca"
+            "13b25aa26cb4a648cb9b9d1be65b2c0924a66c54d545ec1b7374f4872e99f096"
+        ),
+    },
+    {
+        "name": "rfc8439-a1-5",
+        "key": b"\x00" * 32,
+        "nonce": b"\x00" * 11 + b"\x02",
+        "offset": 0,
+        "keystream": bytes.fromhex(
+            "c2c64d378cd536374ae204b9ef933fcd1a8b2288b3dfa49672ab765b54ee27c7"
+            "8a970e0e955c14f3a88e741b97c286f75f8fc299e8148362fa198a39531bed6d"
+        ),
+    },
+]
@@ -0,0 +1,128 @@
+"""
+xsalsa20.py
+------------
+
+XSalsa20: Salsa20 with a 24-byte nonce, built on the existing rounds.
+
+Provides:
+    1) hsalsa20(key, nonce16)   --— derive a 32-byte subkey (no feed-forward)
+    2) SubkeyCache              --— bounded LRU of derived subkeys
+    3) XSalsa20(key, nonce24)   --— a cipher.Salsa20 context on the subkey
+    4) xsalsa20_stream_xor(key, nonce24, data, initial_block=0, ...)
+
+XSalsa20 runs HSalsa20 on the key and the first 16 nonce bytes, then
+plain Salsa20/20 with the derived subkey and the last 8 nonce bytes.
+24-byte nonces are long enough to pick at random, so no per-key nonce
+counter is needed. Messages that share a 16-byte nonce prefix share a
+subkey, which the cache hands back without another HSalsa20 core call.
+"""
+
+from collections import OrderedDict
+import threading
+
+from cipher import Salsa20
+from constants import SIGMA
+from helpers import _le_bytes_to_u32, _u32_to_le_bytes
+from kscache import key_id
+from rounds import _doubleround
+
+
+def hsalsa20(key32: bytes, nonce16: bytes) -> bytes:
+    """
+    HSalsa20 core: build the Salsa20 state with a 16-byte nonce in words
+    6..9, run 10 doublerounds, and return words 0, 5, 10, 15, 6, 7, 8, 9
+    (the constant and nonce positions) as a 32-byte subkey.
+    """
+    if len(key32) != 32:
+        raise ValueError("key must be 32 bytes")
+    if len(nonce16) != 16:
+        raise ValueError("hsalsa20 nonce must be 16 bytes")
+
+    c = SIGMA
+    w = [
+        _le_bytes_to_u32(c[0:4]),
+        *(_le_bytes_to_u32(key32[i:i + 4]) for i in range(0, 16, 4)),
+        _le_bytes_to_u32(c[4:8]),
+        *(_le_bytes_to_u32(nonce16[i:i + 4]) for i in range(0, 16, 4)),
+        _le_bytes_to_u32(c[8:12]),
+        *(_le_bytes_to_u32(key32[i:i + 4]) for i in range(16, 32, 4)),
+        _le_bytes_to_u32(c[12:16]),
+    ]
+    for _ in range(10):
+        w = _doubleround(w)
+    return b"".join(_u32_to_le_bytes(w[i]) for i in (0, 5, 10, 15, 6, 7, 8, 9))
+
+
+class SubkeyCache:
+    """
+    LRU map from (key id, 16-byte nonce prefix) to HSalsa20 subkeys,
+    holding at most `max_entries`. Thread-safe.
+    """
+
+    def __init__(self, max_entries: int = 1024):
+        if max_entries <= 0:
+            raise ValueError("max_entries must be positive")
+        self.max_entries = max_entries
+        self._subkeys: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def subkey(self, key32: bytes, nonce16: bytes) -> bytes:
+        """Return hsalsa20(key32, nonce16), computing it only on a miss."""
+        k = (key_id(key32), bytes(nonce16))
+        with self._lock:
+            sub = self._subkeys.get(k)
+            if sub is not None:
+                self._subkeys.move_to_end(k)
+                self.hits += 1
+                return sub
+            self.misses += 1
+        sub = hsalsa20(key32, nonce16)
+        with self._lock:
+            self._subkeys[k] = sub
+            self._subkeys.move_to_end(k)
+            while len(self._subkeys) > self.max_entries:
+                self._subkeys.popitem(last=False)
+        return sub
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "entries": len(self._subkeys)}
+
+    def clear(self) -> None:
+        with self._lock:
+            self._subkeys.clear()
+            self.hits = self.misses = 0
+
+
+DEFAULT_SUBKEY_CACHE = SubkeyCache()
+
+
+class XSalsa20(Salsa20):
+    """
+    XSalsa20 keystream generator for a 32-byte key and 24-byte nonce.
+    Same API as cipher.Salsa20. Pass subkeys=None to skip the subkey cache.
+    """
+
+    nonce_size = 24
+
+    def __init__(self, key32: bytes, nonce24: bytes, backend=None, cache=None,
+                 subkeys: SubkeyCache | None = DEFAULT_SUBKEY_CACHE):
+        if len(nonce24) != 24:
+            raise ValueError("nonce must be 24 bytes")
+        if subkeys is None:
+            sub = hsalsa20(key32, nonce24[:16])
+        else:
+            sub = subkeys.subkey(key32, nonce24[:16])
+        super().__init__(sub, nonce24[16:], backend, cache)
+        self.nonce = bytes(nonce24)
+
+
+def xsalsa20_stream_xor(key32: bytes, nonce24: bytes, data, initial_block: int = 0,
+                        backend=None) -> bytes:
+    """
+    XOR 'data' with the XSalsa20 keystream. Same function for enc/dec.
+    IMPORTANT: Never reuse (key, nonce) across distinct messages.
+    """
+    return XSalsa20(key32, nonce24, backend).stream_xor(data, initial_block)